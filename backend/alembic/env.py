@@ -19,7 +19,7 @@ if DATABASE_URL:
     config.set_main_option("sqlalchemy.url", DATABASE_URL)
 
 # Import models Base
-from app.models import event, announcement, participant, role, schedule, event_media, user, recurrence
+from app.models import event, announcement, participant, role, schedule, event_media, event_media_variant, media_blob, user, recurrence, attendance, attendance_sync, attendance_rollup
 from app.database.base import Base
 
 target_metadata = Base.metadata
@@ -0,0 +1,28 @@
+"""participants event index
+
+Revision ID: 05fdec98cea8
+Revises: a31d776eddf0
+Create Date: 2026-10-18 10:03:27.551840
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '05fdec98cea8'
+down_revision: Union[str, Sequence[str], None] = 'a31d776eddf0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_participants_event_id'), 'participants', ['event_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_participants_event_id'), table_name='participants')
@@ -0,0 +1,45 @@
+"""attendance unique daily
+
+Revision ID: 07a61beb3e4c
+Revises: 58a9aa337e6e
+Create Date: 2026-10-18 20:05:41.318274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '07a61beb3e4c'
+down_revision: Union[str, Sequence[str], None] = '58a9aa337e6e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep the earliest check-in of each participant per event and day
+    op.execute("""
+        WITH ranked AS (
+            SELECT id,
+                   first_value(id) OVER (
+                       PARTITION BY event_id, participant_id, attendance_day
+                       ORDER BY attended_at, id
+                   ) AS keeper
+            FROM attendances
+        )
+        DELETE FROM attendances a
+        USING ranked r
+        WHERE a.id = r.id AND r.id <> r.keeper
+    """)
+    op.create_unique_constraint(
+        'uq_attendance_unique_daily', 'attendances',
+        ['event_id', 'participant_id', 'attendance_day'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_attendance_unique_daily', 'attendances', type_='unique')
@@ -0,0 +1,35 @@
+"""events recurrence date
+
+Revision ID: 11fb8bfe5d25
+Revises: 490abbf32a5d
+Create Date: 2026-10-18 18:21:07.915342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '11fb8bfe5d25'
+down_revision: Union[str, Sequence[str], None] = '490abbf32a5d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('events', sa.Column('recurrence_date', sa.DateTime(timezone=True), nullable=True))
+    op.execute("UPDATE events SET recurrence_date = event_date WHERE recurrence_id IS NOT NULL")
+
+    # An occurrence is identified by its rule slot, not its (editable) date
+    op.drop_constraint('uq_events_recurrence_occurrence', 'events', type_='unique')
+    op.create_unique_constraint('uq_events_recurrence_occurrence', 'events', ['recurrence_id', 'recurrence_date'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_events_recurrence_occurrence', 'events', type_='unique')
+    op.create_unique_constraint('uq_events_recurrence_occurrence', 'events', ['recurrence_id', 'event_date'])
+    op.drop_column('events', 'recurrence_date')
@@ -0,0 +1,37 @@
+"""attendance sync keys
+
+Revision ID: 240cb48f188b
+Revises: 07a61beb3e4c
+Create Date: 2026-10-18 20:31:09.612044
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '240cb48f188b'
+down_revision: Union[str, Sequence[str], None] = '07a61beb3e4c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('attendance_sync_keys',
+    sa.Column('key_digest', sa.LargeBinary(length=16), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attendance_id', sa.UUID(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['attendance_id'], ['attendances.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('key_digest')
+    )
+    op.create_index(op.f('ix_attendance_sync_keys_created_at'), 'attendance_sync_keys', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_attendance_sync_keys_created_at'), table_name='attendance_sync_keys')
+    op.drop_table('attendance_sync_keys')
@@ -0,0 +1,34 @@
+"""recurrences next run
+
+Revision ID: 31c944b471af
+Revises: 11fb8bfe5d25
+Create Date: 2026-10-18 19:12:36.520938
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '31c944b471af'
+down_revision: Union[str, Sequence[str], None] = '11fb8bfe5d25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # existing rules get now(): the first scheduler tick plans all of them
+    op.add_column('recurrences', sa.Column('next_run', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True))
+    op.create_index(
+        'ix_recurrences_next_run_active', 'recurrences', ['next_run'],
+        unique=False, postgresql_where=sa.text('active'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_recurrences_next_run_active', table_name='recurrences', postgresql_where=sa.text('active'))
+    op.drop_column('recurrences', 'next_run')
@@ -0,0 +1,46 @@
+"""full text search
+
+Revision ID: 4024204e5c19
+Revises: 05fdec98cea8
+Create Date: 2026-10-18 11:21:05.402913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4024204e5c19'
+down_revision: Union[str, Sequence[str], None] = '05fdec98cea8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Kept in sync with app.database.search.tsvector_expression
+EVENTS_DOCUMENT = (
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'B')"
+)
+ANNOUNCEMENTS_DOCUMENT = (
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(body, '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Generated columns are computed for existing rows when added
+    op.add_column('events', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(EVENTS_DOCUMENT, persisted=True), nullable=True))
+    op.add_column('announcements', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(ANNOUNCEMENTS_DOCUMENT, persisted=True), nullable=True))
+    op.create_index('ix_events_search_vector', 'events', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index('ix_announcements_search_vector', 'announcements', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_announcements_search_vector', table_name='announcements', postgresql_using='gin')
+    op.drop_index('ix_events_search_vector', table_name='events', postgresql_using='gin')
+    op.drop_column('announcements', 'search_vector')
+    op.drop_column('events', 'search_vector')
@@ -0,0 +1,30 @@
+"""recurrence rule parts
+
+Revision ID: 490abbf32a5d
+Revises: 8ee1315d78c0
+Create Date: 2026-10-18 17:02:51.604117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '490abbf32a5d'
+down_revision: Union[str, Sequence[str], None] = '8ee1315d78c0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('recurrences', sa.Column('by_day', sa.String(length=64), nullable=True))
+    op.add_column('recurrences', sa.Column('count', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('recurrences', 'count')
+    op.drop_column('recurrences', 'by_day')
@@ -0,0 +1,41 @@
+"""events series id
+
+Revision ID: 58a9aa337e6e
+Revises: 31c944b471af
+Create Date: 2026-10-18 19:40:12.204117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '58a9aa337e6e'
+down_revision: Union[str, Sequence[str], None] = '31c944b471af'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('events', sa.Column('series_id', sa.UUID(), nullable=True))
+
+    # templates head their own series; occurrences join their rule's template
+    op.execute(
+        "UPDATE events SET series_id = id "
+        "WHERE id IN (SELECT event_id FROM recurrences)"
+    )
+    op.execute(
+        "UPDATE events e SET series_id = r.event_id "
+        "FROM recurrences r WHERE e.recurrence_id = r.id"
+    )
+
+    op.create_index('ix_events_series_id_event_date', 'events', ['series_id', 'event_date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_events_series_id_event_date', table_name='events')
+    op.drop_column('events', 'series_id')
@@ -0,0 +1,28 @@
+"""attendances event day index
+
+Revision ID: 6083cb40e224
+Revises: 6f1d2c9a7b40
+Create Date: 2026-10-18 21:48:03.552917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6083cb40e224'
+down_revision: Union[str, Sequence[str], None] = '6f1d2c9a7b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_attendances_event_id_attendance_day', 'attendances', ['event_id', 'attendance_day'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_attendances_event_id_attendance_day', table_name='attendances')
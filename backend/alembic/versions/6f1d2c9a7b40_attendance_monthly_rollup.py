@@ -0,0 +1,78 @@
+"""attendance monthly rollup
+
+Revision ID: 6f1d2c9a7b40
+Revises: 240cb48f188b
+Create Date: 2026-10-18 21:12:44.180392
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6f1d2c9a7b40'
+down_revision: Union[str, Sequence[str], None] = '240cb48f188b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('attendance_monthly_rollup',
+    sa.Column('event_id', sa.UUID(), nullable=False),
+    sa.Column('participant_id', sa.UUID(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('attended_days', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.ForeignKeyConstraint(['event_id'], ['events.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['participant_id'], ['participants.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('event_id', 'participant_id', 'month')
+    )
+    op.create_index(op.f('ix_attendance_monthly_rollup_month'), 'attendance_monthly_rollup', ['month'], unique=False)
+
+    # Backfill from the current attendance rows
+    op.execute("""
+        INSERT INTO attendance_monthly_rollup (event_id, participant_id, month, attended_days)
+        SELECT event_id, participant_id, date_trunc('month', attendance_day)::date, count(*)
+        FROM attendances
+        GROUP BY 1, 2, 3
+    """)
+
+    # Keep it exact on every path that adds, moves or removes a check-in,
+    # including ON DELETE CASCADE from events and participants. When the
+    # cascade has already removed the rollup row the decrement is a no-op.
+    op.execute("""
+        CREATE FUNCTION attendances_monthly_rollup() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP IN ('DELETE', 'UPDATE') THEN
+                UPDATE attendance_monthly_rollup
+                SET attended_days = attended_days - 1
+                WHERE event_id = OLD.event_id
+                  AND participant_id = OLD.participant_id
+                  AND month = date_trunc('month', OLD.attendance_day)::date;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO attendance_monthly_rollup (event_id, participant_id, month, attended_days)
+                VALUES (NEW.event_id, NEW.participant_id, date_trunc('month', NEW.attendance_day)::date, 1)
+                ON CONFLICT (event_id, participant_id, month)
+                DO UPDATE SET attended_days = attendance_monthly_rollup.attended_days + 1;
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER attendances_monthly_rollup
+        AFTER INSERT OR DELETE OR UPDATE OF event_id, participant_id, attendance_day ON attendances
+        FOR EACH ROW EXECUTE FUNCTION attendances_monthly_rollup()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS attendances_monthly_rollup ON attendances")
+    op.execute("DROP FUNCTION IF EXISTS attendances_monthly_rollup()")
+    op.drop_index(op.f('ix_attendance_monthly_rollup_month'), table_name='attendance_monthly_rollup')
+    op.drop_table('attendance_monthly_rollup')
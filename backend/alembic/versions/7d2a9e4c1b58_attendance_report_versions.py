@@ -0,0 +1,71 @@
+"""attendance report versions
+
+Revision ID: 7d2a9e4c1b58
+Revises: c47a0e5b19f3
+Create Date: 2026-10-19 09:41:07.503216
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2a9e4c1b58'
+down_revision: Union[str, Sequence[str], None] = 'c47a0e5b19f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+ROLLUP_FUNCTION = """
+    CREATE OR REPLACE FUNCTION attendances_monthly_rollup() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP IN ('DELETE', 'UPDATE') THEN
+            UPDATE attendance_monthly_rollup
+            SET attended_days = attended_days - 1
+            WHERE event_id = OLD.event_id
+              AND participant_id = OLD.participant_id
+              AND month = date_trunc('month', OLD.attendance_day)::date;
+            {bump_old}
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO attendance_monthly_rollup (event_id, participant_id, month, attended_days)
+            VALUES (NEW.event_id, NEW.participant_id, date_trunc('month', NEW.attendance_day)::date, 1)
+            ON CONFLICT (event_id, participant_id, month)
+            DO UPDATE SET attended_days = attendance_monthly_rollup.attended_days + 1;
+            {bump_new}
+        END IF;
+        RETURN NULL;
+    END
+    $$
+"""
+
+BUMP = """
+            INSERT INTO attendance_report_versions (event_id, version)
+            VALUES ({row}.event_id, 1)
+            ON CONFLICT (event_id)
+            DO UPDATE SET version = attendance_report_versions.version + 1;"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # No FK to events: a deleted event's row stays, so the sum over the table
+    # (the all-events report version) never goes back to an earlier value
+    op.create_table('attendance_report_versions',
+    sa.Column('event_id', sa.UUID(), nullable=False),
+    sa.Column('version', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+    sa.PrimaryKeyConstraint('event_id')
+    )
+
+    # The rollup trigger already fires on every change the report can see
+    # (added, moved or removed check-ins, cascades included): bump the
+    # event's report version there too
+    op.execute(ROLLUP_FUNCTION.format(bump_old=BUMP.format(row="OLD"), bump_new=BUMP.format(row="NEW")))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(ROLLUP_FUNCTION.format(bump_old="", bump_new=""))
+    op.drop_table('attendance_report_versions')
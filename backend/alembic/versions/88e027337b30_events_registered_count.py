@@ -0,0 +1,62 @@
+"""events registered count
+
+Revision ID: 88e027337b30
+Revises: 9aea15d6984b
+Create Date: 2026-10-18 15:02:19.846571
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '88e027337b30'
+down_revision: Union[str, Sequence[str], None] = '9aea15d6984b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('events', sa.Column('registered_count', sa.Integer(), server_default=sa.text('0'), nullable=False))
+
+    # Backfill from the current registrations
+    op.execute("""
+        UPDATE events e
+        SET registered_count = c.n
+        FROM (SELECT event_id, count(*) AS n FROM participants GROUP BY event_id) c
+        WHERE e.id = c.event_id
+    """)
+
+    # Keep it exact on every path that adds or removes a participant,
+    # including ON DELETE CASCADE from users, which never reaches the ORM.
+    op.execute("""
+        CREATE FUNCTION participants_registered_count() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP IN ('DELETE', 'UPDATE') THEN
+                UPDATE events SET registered_count = registered_count - 1
+                WHERE id = OLD.event_id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                UPDATE events SET registered_count = registered_count + 1
+                WHERE id = NEW.event_id;
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER participants_registered_count
+        AFTER INSERT OR DELETE OR UPDATE OF event_id ON participants
+        FOR EACH ROW EXECUTE FUNCTION participants_registered_count()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS participants_registered_count ON participants")
+    op.execute("DROP FUNCTION IF EXISTS participants_registered_count()")
+    op.drop_column('events', 'registered_count')
@@ -0,0 +1,55 @@
+"""events recurrence occurrence
+
+Revision ID: 8ee1315d78c0
+Revises: 88e027337b30
+Create Date: 2026-10-18 16:10:42.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8ee1315d78c0'
+down_revision: Union[str, Sequence[str], None] = '88e027337b30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('events', sa.Column('recurrence_id', postgresql.UUID(as_uuid=True), nullable=True))
+    op.create_foreign_key(
+        'fk_events_recurrence_id', 'events', 'recurrences',
+        ['recurrence_id'], ['id'], ondelete='SET NULL',
+    )
+
+    # Link occurrences generated before this column existed. The old
+    # generator copied the template title and only ever moved forward, so
+    # match on that; keep the oldest row if a date was generated twice.
+    op.execute("""
+        UPDATE events e
+        SET recurrence_id = m.recurrence_id
+        FROM (
+            SELECT DISTINCT ON (r.id, o.event_date) o.id, r.id AS recurrence_id
+            FROM recurrences r
+            JOIN events t ON t.id = r.event_id
+            JOIN events o ON o.title = t.title
+                         AND o.event_date > t.event_date
+                         AND o.id <> t.id
+            ORDER BY r.id, o.event_date, o.created_at
+        ) m
+        WHERE e.id = m.id
+    """)
+
+    op.create_unique_constraint('uq_events_recurrence_occurrence', 'events', ['recurrence_id', 'event_date'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_events_recurrence_occurrence', 'events', type_='unique')
+    op.drop_constraint('fk_events_recurrence_id', 'events', type_='foreignkey')
+    op.drop_column('events', 'recurrence_id')
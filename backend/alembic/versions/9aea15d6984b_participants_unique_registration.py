@@ -0,0 +1,57 @@
+"""participants unique registration
+
+Revision ID: 9aea15d6984b
+Revises: 4024204e5c19
+Create Date: 2026-10-18 13:40:52.730164
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9aea15d6984b'
+down_revision: Union[str, Sequence[str], None] = '4024204e5c19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Collapse duplicate registrations onto the earliest one, moving their
+    # attendance rows over first so no history is lost to the cascade.
+    op.execute("""
+        WITH ranked AS (
+            SELECT id,
+                   first_value(id) OVER (
+                       PARTITION BY event_id, user_id
+                       ORDER BY registered_at NULLS LAST, id
+                   ) AS keeper
+            FROM participants
+        )
+        UPDATE attendances a
+        SET participant_id = r.keeper
+        FROM ranked r
+        WHERE a.participant_id = r.id AND r.id <> r.keeper
+    """)
+    op.execute("""
+        WITH ranked AS (
+            SELECT id,
+                   first_value(id) OVER (
+                       PARTITION BY event_id, user_id
+                       ORDER BY registered_at NULLS LAST, id
+                   ) AS keeper
+            FROM participants
+        )
+        DELETE FROM participants p
+        USING ranked r
+        WHERE p.id = r.id AND r.id <> r.keeper
+    """)
+    op.create_unique_constraint('uq_participants_event_user', 'participants', ['event_id', 'user_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_participants_event_user', 'participants', type_='unique')
@@ -0,0 +1,42 @@
+"""event media variants
+
+Revision ID: 9b3e71c4d2a5
+Revises: 6083cb40e224
+Create Date: 2026-10-18 22:31:12.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b3e71c4d2a5'
+down_revision: Union[str, Sequence[str], None] = '6083cb40e224'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'event_media_variants',
+        sa.Column('id', postgresql.UUID(as_uuid=True), server_default=sa.text('gen_random_uuid()'), nullable=False),
+        sa.Column('media_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('name', sa.String(length=20), nullable=False),
+        sa.Column('format', sa.String(length=10), nullable=False),
+        sa.Column('width', sa.Integer(), nullable=False),
+        sa.Column('height', sa.Integer(), nullable=False),
+        sa.Column('size_bytes', sa.Integer(), nullable=False),
+        sa.Column('file_url', sa.Text(), nullable=False),
+        sa.ForeignKeyConstraint(['media_id'], ['event_media.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('media_id', 'name', 'format', name='uq_event_media_variants_media_name_format'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('event_media_variants')
@@ -0,0 +1,28 @@
+"""events keyset index
+
+Revision ID: a31d776eddf0
+Revises: bf7f4b4102b2
+Create Date: 2026-10-18 09:12:40.118202
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a31d776eddf0'
+down_revision: Union[str, Sequence[str], None] = 'bf7f4b4102b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_events_event_date_id', 'events', ['event_date', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_events_event_date_id', table_name='events')
@@ -0,0 +1,77 @@
+"""media blobs
+
+Revision ID: c47a0e5b19f3
+Revises: 9b3e71c4d2a5
+Create Date: 2026-10-18 23:14:52.118640
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c47a0e5b19f3'
+down_revision: Union[str, Sequence[str], None] = '9b3e71c4d2a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'media_blobs',
+        sa.Column('id', postgresql.UUID(as_uuid=True), server_default=sa.text('gen_random_uuid()'), nullable=False),
+        sa.Column('content_hash', sa.LargeBinary(length=32), nullable=False),
+        sa.Column('source_hash', sa.LargeBinary(length=32), nullable=False),
+        sa.Column('ref_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('renditions', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('content_hash'),
+    )
+    op.create_index(op.f('ix_media_blobs_source_hash'), 'media_blobs', ['source_hash'], unique=False)
+    op.create_index('ix_media_blobs_unreferenced', 'media_blobs', ['id'], unique=False,
+                    postgresql_where=sa.text('ref_count = 0'))
+
+    op.add_column('event_media', sa.Column('blob_id', postgresql.UUID(as_uuid=True), nullable=True))
+    op.create_index(op.f('ix_event_media_blob_id'), 'event_media', ['blob_id'], unique=False)
+    op.create_foreign_key('event_media_blob_id_fkey', 'event_media', 'media_blobs', ['blob_id'], ['id'])
+
+    # Reference count on every path that adds or removes media, including
+    # ON DELETE CASCADE from events, which never reaches the ORM.
+    op.execute("""
+        CREATE FUNCTION event_media_blob_refcount() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP IN ('DELETE', 'UPDATE') AND OLD.blob_id IS NOT NULL THEN
+                UPDATE media_blobs SET ref_count = ref_count - 1
+                WHERE id = OLD.blob_id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.blob_id IS NOT NULL THEN
+                UPDATE media_blobs SET ref_count = ref_count + 1
+                WHERE id = NEW.blob_id;
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER event_media_blob_refcount
+        AFTER INSERT OR DELETE OR UPDATE OF blob_id ON event_media
+        FOR EACH ROW EXECUTE FUNCTION event_media_blob_refcount()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS event_media_blob_refcount ON event_media")
+    op.execute("DROP FUNCTION IF EXISTS event_media_blob_refcount()")
+    op.drop_constraint('event_media_blob_id_fkey', 'event_media', type_='foreignkey')
+    op.drop_index(op.f('ix_event_media_blob_id'), table_name='event_media')
+    op.drop_column('event_media', 'blob_id')
+    op.drop_index('ix_media_blobs_unreferenced', table_name='media_blobs')
+    op.drop_index(op.f('ix_media_blobs_source_hash'), table_name='media_blobs')
+    op.drop_table('media_blobs')
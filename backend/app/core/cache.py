@@ -0,0 +1,207 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Iterable, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 30))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 16 * 1024 * 1024))  # 16 MB
+
+
+# =============================================
+# TTL / LRU cache with a byte budget
+# =============================================
+class TTLCache:
+    """In-process LRU bounded by total payload bytes, with a per-entry TTL.
+
+    Entries carry tags (table names); invalidate_tag() drops every entry that
+    was built from that table. Not thread-safe: use from the event loop only.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        item = self._entries.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+
+        value, size, tags, expires_at = item
+        if expires_at < time.monotonic():
+            self._drop(key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any, size: int, tags: Iterable[str] = ()):
+        if size > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._drop(key)
+
+        self._entries[key] = (value, size, frozenset(tags), time.monotonic() + self.ttl_seconds)
+        self.size += size
+
+        while self.size > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+
+    def invalidate_tag(self, tag: str):
+        stale = [k for k, item in self._entries.items() if tag in item[2]]
+        for key in stale:
+            self._drop(key)
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _drop(self, key: Hashable):
+        _, size, _, _ = self._entries.pop(key)
+        self.size -= size
+
+
+response_cache = TTLCache(RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_TTL_SECONDS)
+
+
+# =============================================
+# Per-table data versions
+# =============================================
+# Every committed write bumps the version of the tables it touched (see
+# install_write_tracking). Cache keys include the versions they were built
+# from, so a write makes older entries unreachable at once; the versions are
+# also reused by other caches (exports, analytics) as a data-version key.
+#
+# The versions are per process: they only see writes committed through this
+# process's sessions. That is exact for the deployment in start.sh (one
+# uvicorn process). With several workers, each one sees the others' writes
+# only when its entries expire (RESPONSE_CACHE_TTL_SECONDS, and each
+# cache's own TTL); caches that must not lag behind other workers key on a
+# version read from the database instead (attendance_export.report_data_version).
+_table_versions: dict = {}
+
+
+def table_version(table: str) -> int:
+    return _table_versions.get(table, 0)
+
+
+def bump_tables(tables: Iterable[str]):
+    for table in tables:
+        _table_versions[table] = _table_versions.get(table, 0) + 1
+        response_cache.invalidate_tag(table)
+
+
+def mark_written(session, *tables: str):
+    """Record writes the listeners cannot see, e.g. DML inside a CTE."""
+    session.info.setdefault("written_tables", set()).update(tables)
+
+
+def install_write_tracking(session_cls):
+    """Record the tables written by ORM flushes and ORM-enabled DML
+    statements, and bump their versions once the transaction commits."""
+
+    def _written(session) -> set:
+        return session.info.setdefault("written_tables", set())
+
+    @event.listens_for(session_cls, "after_flush")
+    def _track_flush(session, flush_context):
+        tables = _written(session)
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            table = getattr(obj, "__table__", None)
+            if table is not None:
+                tables.add(table.name)
+
+    @event.listens_for(session_cls, "do_orm_execute")
+    def _track_dml(orm_execute_state):
+        if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+            table = getattr(orm_execute_state.statement, "table", None)
+            if table is not None:
+                _written(orm_execute_state.session).add(table.name)
+
+    @event.listens_for(session_cls, "after_commit")
+    def _bump_on_commit(session):
+        tables = session.info.pop("written_tables", None)
+        if tables:
+            bump_tables(tables)
+
+    @event.listens_for(session_cls, "after_rollback")
+    def _discard_on_rollback(session):
+        session.info.pop("written_tables", None)
+
+
+# =============================================
+# Cached JSON responses with ETag / 304
+# =============================================
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison function (RFC 9110 13.1.2)
+    candidates = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return etag in candidates
+
+
+async def cached_json(
+    request: Request,
+    tables: Iterable[str],
+    build: Callable[[], Awaitable[Any]],
+) -> Response:
+    """Serve build()'s payload from the response cache.
+
+    The cache key is the request path + query string + the current versions
+    of the tables the payload reads, so writes are visible immediately in
+    this process (and after RESPONSE_CACHE_TTL_SECONDS in other workers, see
+    the table versions above). The ETag is a digest of the serialized body: it stays a
+    correct strong validator across workers and restarts, where in-process
+    version counters are not shared. Conditional requests that match are
+    answered with 304 and no database work.
+    """
+    tables = tuple(tables)
+    key = (
+        request.url.path,
+        request.url.query,
+        tuple(table_version(t) for t in tables),
+    )
+
+    entry = response_cache.get(key)
+    if entry is None:
+        payload = await build()
+        body = json.dumps(jsonable_encoder(payload), separators=(",", ":")).encode()
+        etag = '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+        entry = (body, etag)
+        response_cache.put(key, entry, size=len(body), tags=tables)
+
+    body, etag = entry
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
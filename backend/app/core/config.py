@@ -10,6 +10,8 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 120
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # Test mode: any relationship load not requested up front raises
+    STRICT_LOADING: bool = False
     
     class Config:
         # This allows pydantic to read from environment variables
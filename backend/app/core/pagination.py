@@ -0,0 +1,50 @@
+import base64
+from datetime import datetime
+from typing import Any, Callable, Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+# ---------------------------------------------------------
+# KEYSET CURSORS
+# ---------------------------------------------------------
+# A cursor is the (sort value, id) of the last row on a page, encoded as
+# an opaque url-safe token. The next page starts strictly after it, so
+# page N costs the same as page 1 regardless of table size.
+
+def encode_cursor(value: datetime, row_id) -> str:
+    raw = f"{value.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(
+    cursor: Optional[str],
+    parse_id: Callable[[str], Any] = UUID,
+) -> Optional[Tuple[datetime, Any]]:
+    if not cursor:
+        return None
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        value, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(value), parse_id(row_id)
+    except Exception:
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "INVALID_CURSOR", "message": "Cursor tidak valid"},
+        )
+
+
+def split_page(rows, limit: int):
+    """Page and next cursor from up to limit + 1 (event_date, id) rows."""
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.event_date, last.id)
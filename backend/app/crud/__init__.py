@@ -1 +1 @@
-from . import event, announcement, role, user, participation, attendance
+from . import event, announcement, role, user, participation, attendance, search
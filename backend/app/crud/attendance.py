@@ -1,30 +1,54 @@
-from sqlalchemy import select
+import os
+import time
+import hashlib
+from sqlalchemy import select, delete, func, literal, tuple_, union_all, values, column
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID, insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.types import Date, DateTime, Integer, Text
 from app.models.attendance import Attendance
-from datetime import datetime, date
+from app.models.attendance_sync import AttendanceSyncKey
+from app.models.attendance_rollup import AttendanceMonthlyRollup
+from app.models.participant import Participant
+from app.core.cache import mark_written
+from app.core.pagination import DEFAULT_PAGE_SIZE, encode_cursor
+from datetime import datetime, date, timedelta
 
-async def create_attendance(
-    session: AsyncSession,
-    event_id: str,
-    participant_id: str,
-    attended_at=None,
-    notes=None
-):
+# Offline sync: scans applied per transaction, and how long one request may
+# keep applying chunks before handing the client a cursor to resume from
+ATTENDANCE_SYNC_CHUNK = int(os.getenv("ATTENDANCE_SYNC_CHUNK", 500))
+ATTENDANCE_SYNC_BUDGET_SECONDS = float(os.getenv("ATTENDANCE_SYNC_BUDGET_SECONDS", 20))
+# How long applied scan keys are remembered; devices must replay within this
+ATTENDANCE_SYNC_KEY_TTL_DAYS = int(os.getenv("ATTENDANCE_SYNC_KEY_TTL_DAYS", 30))
+
+
+def _attendance_time(attended_at=None):
     # If attended_at not provided, use current time
     if attended_at is None:
         attended_at = datetime.now()
-    
+
     # Extract the date from attended_at for attendance_day
     if isinstance(attended_at, str):
         attended_at = datetime.fromisoformat(attended_at.replace('Z', '+00:00'))
-    
-    attendance_day = attended_at.date()
+
+    return attended_at, attended_at.date()
+
+
+async def create_attendance(
+    session: AsyncSession,
+    event_id: str,
+    participant_id: str,
+    attended_at=None,
+    notes=None,
+    marked_by=None
+):
+    attended_at, attendance_day = _attendance_time(attended_at)
     
     attendance = Attendance(
         event_id=event_id,
         participant_id=participant_id,
         attended_at=attended_at,
         attendance_day=attendance_day,  # Add this field
+        marked_by=marked_by,
         notes=notes
     )
     
@@ -34,6 +58,267 @@ async def create_attendance(
     return attendance
 
 
+async def bulk_create_attendance(
+    session: AsyncSession,
+    event_id,
+    participant_ids: list,
+    attended_at=None,
+    notes=None,
+    marked_by=None
+):
+    """Check in many participants of one event for one day, in one statement.
+
+    Only participants registered for event_id are inserted; rows that already
+    exist for that day are skipped by ON CONFLICT on uq_attendance_unique_daily.
+    Returns (attendance_day, [(participant_id, status, attendance_id)]) in
+    request order, status being "created", "duplicate" or "not_registered".
+    """
+    attended_at, attendance_day = _attendance_time(attended_at)
+    participant_ids = list(dict.fromkeys(participant_ids))
+
+    attendances = Attendance.__table__
+    participants = Participant.__table__
+
+    registered = (
+        select(participants.c.id)
+        .where(participants.c.event_id == event_id, participants.c.id.in_(participant_ids))
+        .cte("registered")
+    )
+
+    inserted = (
+        pg_insert(attendances)
+        .from_select(
+            ["event_id", "participant_id", "attended_at", "attendance_day", "marked_by", "notes"],
+            select(
+                literal(event_id, PG_UUID(as_uuid=True)),
+                registered.c.id,
+                literal(attended_at, DateTime(timezone=True)),
+                literal(attendance_day, Date()),
+                literal(marked_by, PG_UUID(as_uuid=True)),
+                literal(notes, Text()),
+            ),
+        )
+        .on_conflict_do_nothing(constraint="uq_attendance_unique_daily")
+        .returning(attendances.c.id, attendances.c.participant_id)
+        .cte("inserted")
+    )
+
+    rows = (
+        await session.execute(
+            select(registered.c.id, inserted.c.id.label("attendance_id"))
+            .outerjoin(inserted, inserted.c.participant_id == registered.c.id)
+        )
+    ).all()
+
+    # the insert sits in a CTE, which the write-tracking listeners cannot see
+    mark_written(session, "attendances")
+    await session.commit()
+
+    found = {row.id: row.attendance_id for row in rows}
+    results = []
+    for pid in participant_ids:
+        if pid not in found:
+            results.append((pid, "not_registered", None))
+        elif found[pid] is None:
+            results.append((pid, "duplicate", None))
+        else:
+            results.append((pid, "created", found[pid]))
+    return attendance_day, results
+
+
+# ---------------------------------------------------------
+# OFFLINE SYNC (idempotent replay of queued scans)
+# ---------------------------------------------------------
+def sync_key_digest(device_id: str, key: str) -> bytes:
+    return hashlib.blake2b(f"{device_id}:{key}".encode(), digest_size=16).digest()
+
+
+async def _apply_scan_chunk(session: AsyncSession, device_id: str, scans: list, marked_by) -> list:
+    digests = [sync_key_digest(device_id, scan["key"]) for scan in scans]
+
+    seen = {
+        row.key_digest: row
+        for row in (
+            await session.execute(
+                select(AttendanceSyncKey).where(AttendanceSyncKey.key_digest.in_(set(digests)))
+            )
+        ).scalars()
+    }
+
+    # first scan per new key -> the first scan with its (event, participant,
+    # day), which is the only one inserted
+    fresh = {}
+    candidates = {}
+    for idx, (scan, digest) in enumerate(zip(scans, digests)):
+        if digest in seen or digest in fresh:
+            continue
+        if scan["event_id"] is None:
+            fresh[digest] = (idx, None)
+            continue
+        attended_at, day = _attendance_time(scan["scanned_at"])
+        first = candidates.setdefault(
+            (scan["event_id"], scan["participant_id"], day),
+            (idx, scan["event_id"], scan["participant_id"], attended_at, day, scan.get("notes")),
+        )
+        fresh[digest] = (idx, first[0])
+
+    registered_at = set()
+    created = {}
+    if candidates:
+        attendances = Attendance.__table__
+        participants = Participant.__table__
+
+        batch = values(
+            column("idx", Integer),
+            column("event_id", PG_UUID(as_uuid=True)),
+            column("participant_id", PG_UUID(as_uuid=True)),
+            column("attended_at", DateTime(timezone=True)),
+            column("attendance_day", Date()),
+            column("notes", Text()),
+            name="batch",
+        ).data(list(candidates.values()))
+
+        registered = (
+            select(batch)
+            .join(
+                participants,
+                (participants.c.id == batch.c.participant_id) & (participants.c.event_id == batch.c.event_id),
+            )
+            .cte("registered")
+        )
+
+        inserted = (
+            pg_insert(attendances)
+            .from_select(
+                ["event_id", "participant_id", "attended_at", "attendance_day", "marked_by", "notes"],
+                select(
+                    registered.c.event_id,
+                    registered.c.participant_id,
+                    registered.c.attended_at,
+                    registered.c.attendance_day,
+                    literal(marked_by, PG_UUID(as_uuid=True)),
+                    registered.c.notes,
+                ),
+            )
+            .on_conflict_do_nothing(constraint="uq_attendance_unique_daily")
+            .returning(
+                attendances.c.id,
+                attendances.c.event_id,
+                attendances.c.participant_id,
+                attendances.c.attendance_day,
+            )
+            .cte("inserted")
+        )
+
+        rows = (
+            await session.execute(
+                select(registered.c.idx, inserted.c.id.label("attendance_id"))
+                .outerjoin(
+                    inserted,
+                    (inserted.c.event_id == registered.c.event_id)
+                    & (inserted.c.participant_id == registered.c.participant_id)
+                    & (inserted.c.attendance_day == registered.c.attendance_day),
+                )
+            )
+        ).all()
+        registered_at = {row.idx for row in rows}
+        created = {row.idx: row.attendance_id for row in rows if row.attendance_id is not None}
+
+    outcomes = {}
+    for digest, (idx, first) in fresh.items():
+        if idx in created:
+            outcomes[digest] = ("created", created[idx])
+        elif first in registered_at:
+            # checked in already, or by an earlier scan in this batch
+            outcomes[digest] = ("duplicate", None)
+        else:
+            outcomes[digest] = ("not_registered", None)
+
+    if outcomes:
+        recorded = set(
+            (
+                await session.execute(
+                    pg_insert(AttendanceSyncKey)
+                    .values([
+                        {"key_digest": digest, "status": status, "attendance_id": attendance_id}
+                        for digest, (status, attendance_id) in outcomes.items()
+                    ])
+                    .on_conflict_do_nothing(index_elements=["key_digest"])
+                    .returning(AttendanceSyncKey.key_digest)
+                )
+            ).scalars()
+        )
+        lost = set(outcomes) - recorded
+        if lost:
+            # a concurrent replay of the same keys won (the insert waited for
+            # its commit): its recorded outcome is the answer, not ours
+            # (which would say "duplicate" of its own check-in)
+            seen.update(
+                (row.key_digest, row)
+                for row in (
+                    await session.execute(
+                        select(AttendanceSyncKey).where(AttendanceSyncKey.key_digest.in_(lost))
+                    )
+                ).scalars()
+            )
+
+    mark_written(session, "attendances", "attendance_sync_keys")
+    await session.commit()
+
+    results = []
+    for idx, (scan, digest) in enumerate(zip(scans, digests)):
+        if digest in seen:
+            stored = seen[digest]
+            results.append((scan["key"], stored.status, stored.attendance_id, True))
+        else:
+            status, attendance_id = outcomes[digest]
+            # the same key twice in one batch: the second is a replay
+            results.append((scan["key"], status, attendance_id, fresh[digest][0] != idx))
+    return results
+
+
+async def sync_scans(
+    session: AsyncSession,
+    device_id: str,
+    scans: list,
+    marked_by=None,
+    start: int = 0,
+    chunk_size: int = ATTENDANCE_SYNC_CHUNK,
+    budget_seconds: float = ATTENDANCE_SYNC_BUDGET_SECONDS,
+):
+    """Apply queued offline scans, chunk by chunk, each chunk in its own
+    transaction.
+
+    scans are dicts with key, event_id (None if unknown), participant_id,
+    scanned_at and notes. Every key is recorded in attendance_sync_keys with
+    its outcome, so a replayed scan costs one indexed lookup and returns the
+    original result. Returns (results, next_cursor): results are
+    (key, status, attendance_id, replayed) for scans[start:next_cursor], and
+    next_cursor is None once the whole batch is applied, else the index to
+    resume from (the time budget ran out).
+    """
+    deadline = time.monotonic() + budget_seconds
+    results = []
+
+    for offset in range(start, len(scans), chunk_size):
+        if results and time.monotonic() >= deadline:
+            return results, offset
+        results.extend(
+            await _apply_scan_chunk(session, device_id, scans[offset:offset + chunk_size], marked_by)
+        )
+
+    return results, None
+
+
+async def prune_sync_keys(session: AsyncSession, ttl_days: int = ATTENDANCE_SYNC_KEY_TTL_DAYS) -> int:
+    result = await session.execute(
+        delete(AttendanceSyncKey)
+        .where(AttendanceSyncKey.created_at < func.now() - timedelta(days=ttl_days))
+    )
+    await session.commit()
+    return result.rowcount
+
+
 async def delete_attendance(session: AsyncSession, attendance_id: str):
     a = await session.get(Attendance, attendance_id)
     if not a:
@@ -50,38 +335,157 @@ async def list_attendances_for_event(session: AsyncSession, event_id: str):
     return result.scalars().all()
 
 
-async def attendance_report(
+async def list_attendances_with_user(
     session: AsyncSession,
+    event_id,
+    day: date = None,
+    after=None,
+    limit: int = DEFAULT_PAGE_SIZE
+):
+    """One page of an event's attendances, newest first, with the
+    participant's name, email and phone from a single projected join.
+    Returns (rows, next_cursor)."""
+    from app.models.user import User
+
+    stmt = (
+        select(
+            Attendance.id,
+            Attendance.event_id,
+            Attendance.participant_id,
+            Participant.user_id,
+            Attendance.attended_at,
+            Attendance.attendance_day,
+            Attendance.marked_by,
+            Attendance.notes,
+            User.full_name.label("user_full_name"),
+            User.email.label("user_email"),
+            User.phone.label("user_phone"),
+        )
+        .join(Participant, Participant.id == Attendance.participant_id)
+        .join(User, User.id == Participant.user_id)
+        # ix_attendances_event_id_attendance_day
+        .where(Attendance.event_id == event_id)
+    )
+    if day:
+        stmt = stmt.where(Attendance.attendance_day == day)
+    if after:
+        stmt = stmt.where(tuple_(Attendance.attended_at, Attendance.id) < tuple_(*after))
+
+    stmt = stmt.order_by(Attendance.attended_at.desc(), Attendance.id.desc()).limit(limit + 1)
+    rows = (await session.execute(stmt)).all()
+
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].attended_at, rows[-1].id)
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _next_month_start(day: date) -> date:
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def report_month_split(start_date: date = None, end_date: date = None):
+    """Split [start_date, end_date] into the whole months the rollup can
+    answer and the partial edge months read from raw attendances.
+
+    Returns (months, raw_ranges): months is (from, to) for rollup rows with
+    from <= month < to (None bounds are open), or None when no whole month
+    lies inside the range; raw_ranges are inclusive (low, high) day ranges.
+    """
+    full_from = None if start_date is None else (
+        start_date if start_date.day == 1 else _next_month_start(start_date)
+    )
+    full_to = None if end_date is None else _month_start(end_date + timedelta(days=1))
+
+    if full_from is not None and full_to is not None and full_from >= full_to:
+        return None, [(start_date, end_date)]
+
+    raw_ranges = []
+    if start_date is not None and start_date < full_from:
+        raw_ranges.append((start_date, full_from - timedelta(days=1)))
+    if end_date is not None and full_to <= end_date:
+        raw_ranges.append((full_to, end_date))
+    return (full_from, full_to), raw_ranges
+
+
+def attendance_counts_query(
     event_id: str = None,
     start_date: date = None,
     end_date: date = None
 ):
-    from sqlalchemy import func
-    from app.models.participant import Participant
+    """(participant_id, attended_count) for the range: whole months from
+    attendance_monthly_rollup, at most two partial edge months from raw
+    attendances, so the cost does not grow with attendance history."""
+    months, raw_ranges = report_month_split(start_date, end_date)
+
+    parts = []
+    if months is not None:
+        full_from, full_to = months
+        rollup = select(
+            AttendanceMonthlyRollup.participant_id,
+            AttendanceMonthlyRollup.attended_days.label("n"),
+        )
+        if event_id:
+            rollup = rollup.where(AttendanceMonthlyRollup.event_id == event_id)
+        if full_from is not None:
+            rollup = rollup.where(AttendanceMonthlyRollup.month >= full_from)
+        if full_to is not None:
+            rollup = rollup.where(AttendanceMonthlyRollup.month < full_to)
+        parts.append(rollup)
+
+    for low, high in raw_ranges:
+        raw = select(Attendance.participant_id, literal(1).label("n")).where(
+            Attendance.attendance_day >= low,
+            Attendance.attendance_day <= high,
+        )
+        if event_id:
+            raw = raw.where(Attendance.event_id == event_id)
+        parts.append(raw)
+
+    counted = union_all(*parts).subquery("counted")
+    return (
+        select(counted.c.participant_id, func.sum(counted.c.n).label("attended_count"))
+        .group_by(counted.c.participant_id)
+        .having(func.sum(counted.c.n) > 0)
+    )
+
+
+def attendance_report_query(
+    event_id: str = None,
+    start_date: date = None,
+    end_date: date = None
+):
+    """Per-participant attendance counts with names, for the report and the
+    exports (which stream it instead of loading it)."""
     from app.models.user import User
-    
-    # Base query
+
+    counts = attendance_counts_query(event_id, start_date, end_date).subquery("counts")
+
     query = select(
-        Attendance.participant_id,
+        counts.c.participant_id,
         User.full_name.label('participant_name'),
-        func.count(Attendance.id).label('attended_count')
+        counts.c.attended_count.cast(Integer).label('attended_count')
     ).join(
-        Participant, Attendance.participant_id == Participant.id
+        Participant, counts.c.participant_id == Participant.id
     ).join(
         User, Participant.user_id == User.id
-    ).group_by(
-        Attendance.participant_id,
-        User.full_name
     )
-    
-    # Apply filters
-    if event_id:
-        query = query.where(Attendance.event_id == event_id)
-    if start_date:
-        query = query.where(Attendance.attendance_day >= start_date)
-    if end_date:
-        query = query.where(Attendance.attendance_day <= end_date)
-    
+
+    # same row order in the JSON report and the exports
+    return query.order_by(User.full_name, counts.c.participant_id)
+
+
+async def attendance_report(
+    session: AsyncSession,
+    event_id: str = None,
+    start_date: date = None,
+    end_date: date = None
+):
+    query = attendance_report_query(event_id, start_date, end_date)
     result = await session.execute(query)
     rows = result.all()
     
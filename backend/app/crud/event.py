@@ -1,8 +1,52 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_, func
+from sqlalchemy import select, update, delete, func, tuple_
 from sqlalchemy.orm import selectinload
-from typing import Optional
+from typing import Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
 from app.models.event import Event
+from app.models.event_media import EventMedia
+from app.models.recurrence import Recurrence
+from app.core.pagination import DEFAULT_PAGE_SIZE
+from app.database.search import search_query
+
+
+# ---------------------------------------------------------
+# LOADER PROFILES
+# ---------------------------------------------------------
+# Event relationships are declared lazy="raise", so every query states the
+# eager loads it needs here instead of paying for all six on every select.
+EVENT_LOADER_PROFILES = {
+    # columns only: existence checks, capacity checks, deletes
+    "bare": (),
+    # list cards: posters and their renditions (srcset)
+    "card": (selectinload(Event.media).selectinload(EventMedia.variants),),
+    # single event: everything EventOut serializes
+    "detail": (selectinload(Event.media).selectinload(EventMedia.variants),),
+}
+
+
+def event_loader_options(profile: str):
+    return EVENT_LOADER_PROFILES[profile]
+
+
+# ---------------------------------------------------------
+# GET EVENT
+# ---------------------------------------------------------
+async def get_event(session: AsyncSession, event_id: str, profile: str = "detail"):
+    # anything but a UUID (e.g. a virtual occurrence id) has no row
+    try:
+        event_id = UUID(str(event_id))
+    except ValueError:
+        return None
+
+    stmt = (
+        select(Event)
+        .where(Event.id == event_id)
+        .options(*event_loader_options(profile))
+    )
+    result = await session.execute(stmt)
+    return result.scalar_one_or_none()
 
 
 # ---------------------------------------------------------
@@ -33,15 +77,17 @@ async def create_event(
 
     # optional recurrence creation
     if recurrence_pattern:
-        from app.models.recurrence import Recurrence
-
         rec = Recurrence(
             event_id=new_event.id,
-            pattern=recurrence_pattern.lower(),
+            start_date=event_date,
+            frequency=recurrence_pattern.lower(),
+            interval=1,
             active=True,
-            next_run=event_date,
+            next_run=datetime.now(timezone.utc),
         )
         session.add(rec)
+        # the template heads its own series
+        new_event.series_id = new_event.id
         await session.commit()
 
     return new_event
@@ -52,14 +98,7 @@ async def create_event(
 # UPDATE EVENT
 # ---------------------------------------------------------
 async def update_event(session: AsyncSession, event_id: str, update_data: dict):
-    stmt = (
-        select(Event)
-        .where(Event.id == event_id)
-        .options(selectinload(Event.media))   # ensure media loaded on refresh
-    )
-
-    result = await session.execute(stmt)
-    ev = result.scalar_one_or_none()
+    ev = await get_event(session, event_id, profile="detail")
 
     if ev is None:
         return None
@@ -78,9 +117,7 @@ async def update_event(session: AsyncSession, event_id: str, update_data: dict):
 # DELETE EVENT
 # ---------------------------------------------------------
 async def delete_event(session: AsyncSession, event_id: str):
-    stmt = select(Event).where(Event.id == event_id)
-    result = await session.execute(stmt)
-    ev = result.scalar_one_or_none()
+    ev = await get_event(session, event_id, profile="bare")
 
     if ev is None:
         return None
@@ -92,31 +129,170 @@ async def delete_event(session: AsyncSession, event_id: str):
 
 
 # ---------------------------------------------------------
-# LIST EVENTS (WITH MEDIA PRELOADED)
+# SERIES: "THIS AND FOLLOWING" BULK UPDATES
 # ---------------------------------------------------------
-async def list_events(
-    session: AsyncSession,
-    q: Optional[str] = None,
-    upcoming: bool = False
-):
-    stmt = (
-        select(Event)
-        .options(
-            selectinload(Event.media),         # posters
-            selectinload(Event.recurrence)     # recurrence object
+# The rule math (where to split, how the rule shifts) is in services.series.
+async def lock_series_rule(session: AsyncSession, series_id: UUID) -> Optional[Recurrence]:
+    """The series' recurrence row, locked FOR UPDATE until commit."""
+    result = await session.execute(
+        select(Recurrence).where(Recurrence.event_id == series_id).with_for_update()
+    )
+    return result.scalars().first()
+
+
+async def get_rule_occurrence(session: AsyncSession, recurrence_id: UUID, when: datetime) -> Optional[Event]:
+    """The stored occurrence in a rule's slot at when, if any."""
+    result = await session.execute(
+        select(Event).where(Event.recurrence_id == recurrence_id, Event.recurrence_date == when)
+    )
+    return result.scalar_one_or_none()
+
+
+async def update_occurrences(session: AsyncSession, criteria, values: dict, shift: timedelta, **reassign) -> int:
+    # recurrence_date moves with event_date: the slots belong to the shifted rule
+    values = {**values, **reassign}
+    if shift:
+        values["event_date"] = Event.event_date + shift
+        values["recurrence_date"] = Event.recurrence_date + shift
+    if not values:
+        return 0
+
+    result = await session.execute(
+        update(Event)
+        .where(*criteria)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+async def delete_recurrence(session: AsyncSession, recurrence_id: UUID):
+    await session.execute(delete(Recurrence).where(Recurrence.id == recurrence_id))
+
+
+async def cancel_series(session: AsyncSession, series_id: UUID, from_date: datetime) -> int:
+    """Cancel every stored occurrence from from_date on and end the series'
+    rules just before it, so no later occurrence is generated or expanded."""
+    result = await session.execute(
+        update(Event)
+        .where(
+            Event.series_id == series_id,
+            Event.event_date >= from_date,
+            Event.is_cancelled.isnot(True),
         )
+        .values(is_cancelled=True)
+        .execution_options(synchronize_session=False)
     )
 
+    until = from_date - timedelta(microseconds=1)
+    await session.execute(
+        update(Recurrence)
+        .where(Recurrence.event_id == series_id)
+        .values(
+            repeat_until=func.least(func.coalesce(Recurrence.repeat_until, until), until),
+            next_run=func.now(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+    return result.rowcount
+
+
+
+# ---------------------------------------------------------
+# LIST EVENTS (KEYSET PAGINATED, WITH MEDIA PRELOADED)
+# ---------------------------------------------------------
+def _apply_event_filters(
+    stmt,
+    q: Optional[str] = None,
+    upcoming: bool = False,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+):
     # filter: upcoming only
     if upcoming:
         stmt = stmt.where(Event.event_date >= func.now())
 
-    # filter: search
+    # filter: date range (calendar views)
+    if start_date:
+        stmt = stmt.where(Event.event_date >= start_date)
+    if end_date:
+        stmt = stmt.where(Event.event_date <= end_date)
+
+    # filter: search (GIN-indexed full-text match)
     if q:
-        like = f"%{q}%"
-        stmt = stmt.where(
-            or_(Event.title.ilike(like), Event.description.ilike(like))
-        )
+        stmt = stmt.where(Event.search_vector.op("@@")(search_query(q)))
+
+    return stmt
+
+
+def _apply_keyset(stmt, after: Optional[Tuple[datetime, UUID]], limit: int):
+    # (event_date, id) is unique and backed by ix_events_event_date_id, so
+    # every page is an index range scan of at most limit + 1 rows.
+    if after and not isinstance(after[1], UUID):
+        # virtual occurrence ids (str) sort after every stored id with the
+        # same date
+        stmt = stmt.where(Event.event_date > after[0])
+    elif after:
+        stmt = stmt.where(tuple_(Event.event_date, Event.id) > tuple_(*after))
+
+    return stmt.order_by(Event.event_date.asc(), Event.id.asc()).limit(limit + 1)
+
+
+async def list_event_rows(
+    session: AsyncSession,
+    q: Optional[str] = None,
+    upcoming: bool = False,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    after: Optional[Tuple[datetime, UUID]] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+):
+    """Up to limit + 1 events after the cursor: one page and, if there is a
+    next one, its first row (see core.pagination.split_page)."""
+    stmt = select(Event).options(*event_loader_options("card"))
+    stmt = _apply_event_filters(stmt, q, upcoming, start_date, end_date)
+    stmt = _apply_keyset(stmt, after, limit)
+
+    result = await session.execute(stmt)
+    return result.scalars().all()
+
+
+# ---------------------------------------------------------
+# LIST EVENT SUMMARIES (PROJECTION, NO ORM OBJECTS)
+# ---------------------------------------------------------
+async def list_event_summary_rows(
+    session: AsyncSession,
+    q: Optional[str] = None,
+    upcoming: bool = False,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    after: Optional[Tuple[datetime, UUID]] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+):
+    """Same rows as list_event_rows, but one query and plain rows.
+
+    Occupancy comes from the trigger-maintained registered_count column, so
+    no Participant rows are read or materialized.
+    """
+    stmt = select(
+        Event.id,
+        Event.title,
+        Event.description,
+        Event.location,
+        Event.event_date,
+        Event.created_at,
+        Event.updated_at,
+        Event.is_cancelled,
+        Event.requires_registration,
+        Event.slots_available,
+        Event.recurrence_id,
+        Event.series_id,
+        Event.registered_count.label("participant_count"),
+        (Event.slots_available - Event.registered_count).label("slots_remaining"),
+    )
+    stmt = _apply_event_filters(stmt, q, upcoming, start_date, end_date)
+    stmt = _apply_keyset(stmt, after, limit)
 
     result = await session.execute(stmt)
-    return result.scalars().all()
\ No newline at end of file
+    return result.all()
@@ -1,8 +1,13 @@
-from sqlalchemy import select
+from sqlalchemy import select, literal, or_, exists
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID, insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from uuid import UUID
 from app.models.participant import Participant
+from app.models.event import Event
 from fastapi import HTTPException
 from app.models.user import User
+from app.core.cache import mark_written
 
 
 # ---------------------------------------------------------
@@ -21,11 +26,105 @@ async def create_participant(session, data):
 
     participant = Participant(**data)
     session.add(participant)
-    await session.commit()
+    try:
+        await session.commit()
+    except IntegrityError:
+        # lost a race against a concurrent registration (uq_participants_event_user)
+        await session.rollback()
+        raise HTTPException(400, "User already registered in event")
     await session.refresh(participant)
     return participant
 
 
+# ---------------------------------------------------------
+# SELF REGISTRATION (capacity-checked, race-free)
+# ---------------------------------------------------------
+async def register_for_event(session: AsyncSession, event_id, user_id):
+    """Register user_id for event_id without overbooking, in one statement.
+
+    The event row is read FOR UPDATE, so concurrent sign-ups for the same
+    event queue on that lock and each sees the registered_count left by the
+    previous one. The insert only happens while registered_count is below
+    capacity; the participants trigger then bumps the counter inside the
+    same transaction. Returns slots remaining (or None when the event has
+    no capacity limit).
+    """
+    try:
+        event_id = UUID(str(event_id))
+    except ValueError:
+        raise HTTPException(404, "Event not found")
+
+    events = Event.__table__
+    participants = Participant.__table__
+
+    ev = (
+        select(
+            events.c.id,
+            events.c.requires_registration,
+            events.c.slots_available,
+            events.c.registered_count,
+            exists()
+            .where(participants.c.event_id == event_id, participants.c.user_id == user_id)
+            .label("mine"),
+        )
+        .where(events.c.id == event_id)
+        .with_for_update()
+        .cte("ev")
+    )
+
+    inserted = (
+        pg_insert(participants)
+        .from_select(
+            ["event_id", "user_id"],
+            select(ev.c.id, literal(user_id, PG_UUID(as_uuid=True)))
+            .where(
+                ev.c.requires_registration.is_(True),
+                ~ev.c.mine,
+                or_(
+                    ev.c.slots_available.is_(None),
+                    ev.c.registered_count < ev.c.slots_available,
+                ),
+            ),
+        )
+        .on_conflict_do_nothing(index_elements=["event_id", "user_id"])
+        .returning(participants.c.id)
+        .cte("inserted")
+    )
+
+    row = (
+        await session.execute(
+            select(
+                ev.c.requires_registration,
+                ev.c.slots_available,
+                ev.c.registered_count,
+                ev.c.mine,
+                select(inserted.c.id).scalar_subquery().label("participant_id"),
+            )
+        )
+    ).one_or_none()
+
+    if row is None:
+        await session.rollback()
+        raise HTTPException(404, "Event not found")
+
+    if row.participant_id is None:
+        await session.rollback()
+        if not row.requires_registration:
+            raise HTTPException(400, "Event does not require registration")
+        if row.mine:
+            raise HTTPException(400, "You already registered")
+        if row.slots_available is not None and row.registered_count >= row.slots_available:
+            raise HTTPException(400, "Event is full")
+        raise HTTPException(400, "You already registered")
+
+    mark_written(session, "participants", "events")
+    await session.commit()
+
+    if row.slots_available is None:
+        return None
+    return row.slots_available - (row.registered_count + 1)
+
+
 # ---------------------------------------------------------
 # LIST BY EVENT
 # ---------------------------------------------------------
@@ -1,6 +1,8 @@
+from datetime import datetime, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.orm import selectinload
+from app.models.event import Event
 from app.models.recurrence import Recurrence
 
 
@@ -10,6 +12,14 @@ from app.models.recurrence import Recurrence
 async def create_recurrence(session: AsyncSession, data):
     rec = Recurrence(**data)
     session.add(rec)
+
+    # the template heads the series its occurrences belong to
+    await session.execute(
+        update(Event)
+        .where(Event.id == rec.event_id, Event.series_id.is_(None))
+        .values(series_id=Event.id)
+        .execution_options(synchronize_session=False)
+    )
     await session.commit()
     await session.refresh(rec)
     return rec
@@ -57,6 +67,9 @@ async def update_recurrence(session: AsyncSession, id, updates: dict):
     for key, value in updates.items():
         setattr(rec, key, value)
 
+    # re-plan on the next scheduler tick
+    rec.next_run = datetime.now(timezone.utc)
+
     await session.commit()
     await session.refresh(rec)
     return rec
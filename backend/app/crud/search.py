@@ -0,0 +1,80 @@
+from sqlalchemy import select, func, literal_column, union_all, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.event import Event
+from app.models.announcement import Announcement
+from app.database.search import SEARCH_CONFIG, search_query
+
+# ts_headline options: short fragments around matches, <mark> for the UI
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=30, MinWords=10, MaxFragments=2"
+
+
+# ---------------------------------------------------------
+# RANKED SEARCH
+# ---------------------------------------------------------
+async def search(
+    session: AsyncSession,
+    q: str,
+    kind: str = "all",
+    limit: int = 20,
+    offset: int = 0,
+):
+    """Ranked full-text search over events and announcements.
+
+    Matching and ranking run against the GIN-indexed search_vector columns;
+    ts_headline (the expensive part) is only evaluated for the rows on the
+    returned page. Returns (hits, has_more).
+    """
+    query = search_query(q)
+    branches = []
+
+    if kind in ("all", "events"):
+        branches.append(
+            select(
+                literal_column("'event'").label("type"),
+                Event.id.label("id"),
+                func.ts_rank_cd(Event.search_vector, query).label("rank"),
+                Event.event_date.label("date"),
+            ).where(Event.search_vector.op("@@")(query))
+        )
+
+    if kind in ("all", "announcements"):
+        branches.append(
+            select(
+                literal_column("'announcement'").label("type"),
+                Announcement.id.label("id"),
+                func.ts_rank_cd(Announcement.search_vector, query).label("rank"),
+                Announcement.created_at.label("date"),
+            ).where(Announcement.search_vector.op("@@")(query))
+        )
+
+    ranked = union_all(*branches).subquery("ranked")
+    page = (
+        select(ranked)
+        .order_by(ranked.c.rank.desc(), ranked.c.date.desc(), ranked.c.id)
+        .limit(limit + 1)
+        .offset(offset)
+        .cte("page")
+    )
+
+    config = literal_column(f"'{SEARCH_CONFIG}'")
+    stmt = (
+        select(
+            page.c.type,
+            page.c.id,
+            page.c.rank,
+            page.c.date,
+            func.coalesce(Event.title, Announcement.title).label("title"),
+            func.ts_headline(
+                config,
+                func.coalesce(Event.description, Announcement.body, ""),
+                query,
+                HEADLINE_OPTIONS,
+            ).label("snippet"),
+        )
+        .outerjoin(Event, and_(page.c.type == "event", Event.id == page.c.id))
+        .outerjoin(Announcement, and_(page.c.type == "announcement", Announcement.id == page.c.id))
+        .order_by(page.c.rank.desc(), page.c.date.desc(), page.c.id)
+    )
+
+    rows = (await session.execute(stmt)).all()
+    return rows[:limit], len(rows) > limit
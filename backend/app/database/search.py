@@ -0,0 +1,20 @@
+from sqlalchemy import func, literal_column
+
+# Village content mixes Indonesian and local-language words, so we index
+# with the language-agnostic 'simple' configuration (lower-casing, no
+# stemming) rather than guessing a dictionary.
+SEARCH_CONFIG = "simple"
+
+
+def tsvector_expression(*weighted_columns) -> str:
+    """SQL for a generated tsvector column from (column, weight) pairs."""
+    parts = [
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({column}, '')), '{weight}')"
+        for column, weight in weighted_columns
+    ]
+    return " || ".join(parts)
+
+
+def search_query(q: str):
+    """websearch_to_tsquery accepts user syntax ("quoted", or, -not) safely."""
+    return func.websearch_to_tsquery(literal_column(f"'{SEARCH_CONFIG}'"), q)
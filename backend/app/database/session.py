@@ -1,6 +1,8 @@
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker, raiseload
 from app.core.config import settings
+from app.core.cache import install_write_tracking
 import logging
 
 logger = logging.getLogger(__name__)
@@ -52,6 +54,30 @@ AsyncSessionLocal = sessionmaker(
     expire_on_commit=False
 )
 
+# Committed writes bump per-table data versions (HTTP response cache & co.)
+install_write_tracking(Session)
+
+# =============================================
+# Strict Loading (test mode)
+# =============================================
+# With STRICT_LOADING=true every top-level ORM select gets raiseload("*"),
+# so a relationship that was not eager-loaded by the caller's loader profile
+# fails loudly instead of silently issuing (or, under asyncio, crashing on)
+# an extra query. Loads issued by eager loaders and refreshes are left alone.
+if settings.STRICT_LOADING:
+    logger.info("[DB] Strict loading enabled: lazy loads will raise")
+
+    @event.listens_for(Session, "do_orm_execute")
+    def _raise_on_lazy_load(orm_execute_state):
+        if (
+            orm_execute_state.is_select
+            and not orm_execute_state.is_relationship_load
+            and not orm_execute_state.is_column_load
+        ):
+            orm_execute_state.statement = orm_execute_state.statement.options(
+                raiseload("*")
+            )
+
 # Dependency for FastAPI
 async def get_session():
     async with AsyncSessionLocal() as session:
@@ -6,6 +6,7 @@ from typing import Optional
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
 
 from app.database.session import init_db
 from app.routes import (
@@ -18,8 +19,12 @@ from app.routes import (
     user,
     media,
     attendance,
+    search,
 )
-from app.services.recurrence_engine import generate_recurring_events
+from app.services.scheduler import scheduler
+from app.services.export_jobs import export_jobs
+from app.services.maintenance import maintenance
+from app.services import media_pipeline, storage
 
 
 # ------------------------------------------------------
@@ -34,7 +39,6 @@ RUN_GENERATE_ON_STARTUP = os.getenv("RUN_GENERATE_ON_STARTUP", "true").lower() i
     "1",
     "true",
 )
-RECURRENCE_INTERVAL_SECONDS = int(os.getenv("RECURRENCE_INTERVAL_SECONDS", 86400))
 
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 
@@ -47,30 +51,6 @@ logging.basicConfig(level=LOG_LEVEL)
 logger = logging.getLogger("village_events")
 
 
-# ------------------------------------------------------
-# Recurrence Worker Loop
-# ------------------------------------------------------
-
-async def _recurrence_loop(interval_seconds: int, stop_event: asyncio.Event):
-    logger.info(f"[Worker] Recurrence loop started (interval={interval_seconds}s)")
-
-    try:
-        while not stop_event.is_set():
-            try:
-                await generate_recurring_events()
-                logger.info("[Worker] Recurrence generation completed")
-            except Exception as exc:
-                logger.exception("[Worker] Error generating recurring events: %s", exc)
-
-            try:
-                await asyncio.wait_for(stop_event.wait(), timeout=interval_seconds)
-            except asyncio.TimeoutError:
-                continue
-
-    finally:
-        logger.info("[Worker] Recurrence loop stopped")
-
-
 # ------------------------------------------------------
 # Application Lifespan
 # ------------------------------------------------------
@@ -81,15 +61,26 @@ async def lifespan(app: FastAPI):
     await init_db()
     logger.info("Database connection OK")
 
-    # Run initial generation once per deployment
+    # Run initial generation once per deployment; only the process that gets
+    # the scheduler lock does it, the others skip
     if RUN_GENERATE_ON_STARTUP:
         logger.info("Running initial recurrence generation...")
         try:
-            await generate_recurring_events()
-            logger.info("Initial recurrence generation completed")
+            created = await scheduler.run_once()
+            if created is None:
+                logger.info("Initial recurrence generation skipped (another process is leader)")
+            else:
+                logger.info("Initial recurrence generation completed (%d new events)", created)
         except Exception as exc:
             logger.exception("Initial recurrence generation FAILED: %s", exc)
 
+    # Export workers + sweep timer (also clears files left by an earlier run)
+    export_jobs.start()
+
+    # Reconciler, sync-key expiry and blob collection: always on, whatever
+    # ENABLE_RECURRENCE_WORKER says (one process does them, under a lock)
+    maintenance.start()
+
     # Start optional background worker
     stop_event: Optional[asyncio.Event] = None
     worker_task: Optional[asyncio.Task] = None
@@ -97,9 +88,7 @@ async def lifespan(app: FastAPI):
     if ENABLE_RECURRENCE_WORKER:
         logger.info("Recurrence worker enabled via ENV")
         stop_event = asyncio.Event()
-        worker_task = asyncio.create_task(
-            _recurrence_loop(RECURRENCE_INTERVAL_SECONDS, stop_event)
-        )
+        worker_task = asyncio.create_task(scheduler.run(stop_event))
         app.state.recurrence_task = worker_task
         app.state.recurrence_stop_event = stop_event
     else:
@@ -110,6 +99,11 @@ async def lifespan(app: FastAPI):
         yield
     finally:
         # Graceful shutdown
+        await export_jobs.stop()
+        await maintenance.stop()
+        media_pipeline.shutdown()
+        await storage.close_storage()
+
         if worker_task:
             logger.info("Shutting down recurrence worker...")
             stop_event.set()
@@ -167,6 +161,12 @@ app.include_router(participation.router, prefix="/api/participants", tags=["part
 app.include_router(user.router, prefix="/api/users", tags=["users"])
 app.include_router(media.router, prefix="/api/media", tags=["media"])
 app.include_router(attendance.router, prefix="/api/attendance", tags=["attendance"])
+app.include_router(search.router, prefix="/api/search", tags=["search"])
+
+# Local storage backend: uploaded media is served by the app itself
+if storage.STORAGE_BACKEND == "local" and storage.LOCAL_STORAGE_URL.startswith("/"):
+    os.makedirs(storage.LOCAL_STORAGE_DIR, exist_ok=True)
+    app.mount(storage.LOCAL_STORAGE_URL, StaticFiles(directory=storage.LOCAL_STORAGE_DIR), name="media-files")
 
 
 # ------------------------------------------------------
@@ -189,12 +189,19 @@ async def healthz():
 @app.post("/internal/recurrences/run-now")
 async def run_recurrences_now():
     try:
-        await generate_recurring_events()
-        return {"success": True}
+        created = await scheduler.run_once()
+        if created is None:
+            return {"success": False, "error": "Another process holds the scheduler lock"}
+        return {"success": True, "created": created}
     except Exception as exc:
         logger.exception("Manual recurrence run failed: %s", exc)
         return {"success": False, "error": str(exc)}
 
+@app.get("/internal/scheduler/metrics")
+async def scheduler_metrics():
+    # per-process view: only the leader's tick numbers move
+    return {"success": True, "data": scheduler.metrics.snapshot()}
+
 
 # ------------------------------------------------------
 # Local Development Entrypoint
@@ -4,6 +4,10 @@ from app.models.participant import Participant
 from app.models.role import Role
 from app.models.schedule import Schedule
 from app.models.event_media import EventMedia
+from app.models.event_media_variant import EventMediaVariant
+from app.models.media_blob import MediaBlob
 from app.models.user import User
 from app.models.recurrence import Recurrence
 from app.models.attendance import Attendance
+from app.models.attendance_sync import AttendanceSyncKey
+from app.models.attendance_rollup import AttendanceMonthlyRollup, AttendanceReportVersion
@@ -1,13 +1,24 @@
-from sqlalchemy import Column, String, Text, DateTime
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Text, DateTime, Index, Computed
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
 from sqlalchemy.sql import func
+from sqlalchemy.orm import deferred
 from app.database.base import Base
+from app.database.search import tsvector_expression
 from sqlalchemy import text
 
 class Announcement(Base):
     __tablename__ = 'announcements'
+    __table_args__ = (
+        Index("ix_announcements_search_vector", "search_vector", postgresql_using="gin"),
+    )
     id = Column(UUID(as_uuid=True), primary_key=True, server_default=text('gen_random_uuid()'))
     title = Column(String(200), nullable=False)
     body = Column(Text, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # Full-text search document, maintained by Postgres (never loaded by default)
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(tsvector_expression(("title", "A"), ("body", "B")), persisted=True),
+    ))
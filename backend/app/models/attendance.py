@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, DateTime, Date, Text, text, Computed
+from sqlalchemy import Column, ForeignKey, DateTime, Date, Text, text, Computed, UniqueConstraint, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -6,6 +6,13 @@ from app.database.base import Base
 
 class Attendance(Base):
     __tablename__ = "attendances"
+    __table_args__ = (
+        # one check-in per participant per event per day (bulk check-in
+        # conflict target)
+        UniqueConstraint("event_id", "participant_id", "attendance_day", name="uq_attendance_unique_daily"),
+        # check-in screen: one event's attendances, optionally for one day
+        Index("ix_attendances_event_id_attendance_day", "event_id", "attendance_day"),
+    )
 
     id = Column(
         UUID(as_uuid=True),
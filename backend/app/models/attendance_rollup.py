@@ -0,0 +1,28 @@
+from sqlalchemy import Column, ForeignKey, BigInteger, Date, Integer, text
+from sqlalchemy.dialects.postgresql import UUID
+from app.database.base import Base
+
+class AttendanceMonthlyRollup(Base):
+    """Check-ins per participant, event and month, maintained by the
+    attendances_monthly_rollup trigger (see migration 6f1d2c9a7b40); never
+    written by the app except by services.attendance_rollup.rebuild."""
+    __tablename__ = "attendance_monthly_rollup"
+
+    event_id = Column(UUID(as_uuid=True), ForeignKey("events.id", ondelete="CASCADE"), primary_key=True)
+    participant_id = Column(UUID(as_uuid=True), ForeignKey("participants.id", ondelete="CASCADE"), primary_key=True)
+
+    # First day of the month
+    month = Column(Date, primary_key=True, index=True)
+
+    # Days attended in that month (rows are kept at 0 after deletes)
+    attended_days = Column(Integer, nullable=False, server_default=text("0"))
+
+
+class AttendanceReportVersion(Base):
+    """Per-event counter bumped by the same trigger on every check-in change
+    (see migration 7d2a9e4c1b58); keys the attendance export caches across
+    processes. Rows outlive their event on purpose (no FK)."""
+    __tablename__ = "attendance_report_versions"
+
+    event_id = Column(UUID(as_uuid=True), primary_key=True)
+    version = Column(BigInteger, nullable=False, server_default=text("0"))
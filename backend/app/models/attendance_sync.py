@@ -0,0 +1,19 @@
+from sqlalchemy import Column, ForeignKey, DateTime, String, LargeBinary
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from app.database.base import Base
+
+class AttendanceSyncKey(Base):
+    """Idempotency key store for offline check-in replay (one row per scan
+    ever applied), see crud.attendance.sync_scans."""
+    __tablename__ = "attendance_sync_keys"
+
+    # blake2b-128 of "<device_id>:<client key>": fixed 16 bytes however long
+    # the client keys are
+    key_digest = Column(LargeBinary(16), primary_key=True)
+
+    # Outcome of the first application, returned again on every replay
+    status = Column(String(20), nullable=False)
+    attendance_id = Column(UUID(as_uuid=True), ForeignKey("attendances.id", ondelete="SET NULL"), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
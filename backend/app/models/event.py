@@ -1,12 +1,22 @@
-from sqlalchemy import Column, String, Boolean, DateTime, Text, Integer
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Boolean, DateTime, Text, Integer, Index, Computed, ForeignKey, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
 from sqlalchemy.sql import func
 from app.database.base import Base
 from sqlalchemy import text
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
+from app.database.search import tsvector_expression
 
 class Event(Base):
     __tablename__ = "events"
+    __table_args__ = (
+        # keyset pagination order for list endpoints
+        Index("ix_events_event_date_id", "event_date", "id"),
+        Index("ix_events_search_vector", "search_vector", postgresql_using="gin"),
+        # one generated occurrence per rule and date (recurrence generator key)
+        UniqueConstraint("recurrence_id", "recurrence_date", name="uq_events_recurrence_occurrence"),
+        # "this and following" series operations: one index range per series
+        Index("ix_events_series_id_event_date", "series_id", "event_date"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
 
@@ -19,17 +29,45 @@ class Event(Base):
     # Capacity (registration only)
     requires_registration = Column(Boolean, default=False)
     slots_available = Column(Integer, nullable=True)  # capacity per event
+    # Number of participants, maintained by the participants_registered_count
+    # trigger (see migration 88e027337b30); never written by the app
+    registered_count = Column(Integer, nullable=False, server_default=text("0"))
     
     # Event status
     is_cancelled = Column(Boolean, default=False)
 
+    # Set on occurrences generated from a Recurrence (NULL for templates and
+    # one-off events; the template of a series split off by a "this and
+    # following" edit keeps its slot in the new rule)
+    recurrence_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("recurrences.id", ondelete="SET NULL", use_alter=True, name="fk_events_recurrence_id"),
+        nullable=True,
+    )
+    # The rule date this occurrence stands for (iCal RECURRENCE-ID). Stays put
+    # when the occurrence is rescheduled, so the slot is never generated twice.
+    recurrence_date = Column(DateTime(timezone=True), nullable=True)
+    # Series identity: the template event's id, on the template itself and on
+    # every occurrence generated from its rules (NULL for one-off events).
+    # Not a foreign key, so a series stays addressable after its template or
+    # rule is deleted.
+    series_id = Column(UUID(as_uuid=True), nullable=True)
+
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now(), nullable=False)
 
+    # Full-text search document, maintained by Postgres (never loaded by default)
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(tsvector_expression(("title", "A"), ("description", "B")), persisted=True),
+    ))
+
     # Relationships
-    schedules = relationship("Schedule", back_populates="event", cascade="all, delete", lazy="selectin")
-    participants = relationship("Participant", back_populates="event", cascade="all, delete", lazy="selectin")
-    roles = relationship("Role", back_populates="event", cascade="all, delete", lazy="selectin")
-    media = relationship("EventMedia", back_populates="event", lazy="selectin", cascade="all, delete")
-    recurrence = relationship("Recurrence", back_populates="event", uselist=False, lazy="selectin", cascade="all, delete")
-    attendances = relationship("Attendance", back_populates="event", cascade="all, delete", lazy="selectin")
\ No newline at end of file
+    # Nothing is loaded implicitly: callers opt in through the loader profiles
+    # in app.crud.event, and children are removed by the FK ON DELETE CASCADE.
+    schedules = relationship("Schedule", back_populates="event", cascade="all, delete", passive_deletes=True, lazy="raise")
+    participants = relationship("Participant", back_populates="event", cascade="all, delete", passive_deletes=True, lazy="raise")
+    roles = relationship("Role", back_populates="event", cascade="all, delete", passive_deletes=True, lazy="raise")
+    media = relationship("EventMedia", back_populates="event", cascade="all, delete", passive_deletes=True, lazy="raise")
+    recurrence = relationship("Recurrence", back_populates="event", foreign_keys="Recurrence.event_id", uselist=False, cascade="all, delete", passive_deletes=True, lazy="raise")
+    attendances = relationship("Attendance", back_populates="event", cascade="all, delete", passive_deletes=True, lazy="raise")
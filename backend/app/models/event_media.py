@@ -11,6 +11,12 @@ class EventMedia(Base):
     event_id = Column(UUID(as_uuid=True), ForeignKey("events.id", ondelete="CASCADE"), nullable=False)
     file_url = Column(Text, nullable=False)
     file_type = Column(String(50))
+    # shared stored renditions; NULL for media uploaded before deduplication
+    blob_id = Column(UUID(as_uuid=True), ForeignKey("media_blobs.id"), nullable=True, index=True)
     uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
 
-    event = relationship("Event", back_populates="media")
\ No newline at end of file
+    event = relationship("Event", back_populates="media")
+    variants = relationship(
+        "EventMediaVariant", back_populates="media", order_by="EventMediaVariant.width",
+        cascade="all, delete-orphan", passive_deletes=True, lazy="raise",
+    )
\ No newline at end of file
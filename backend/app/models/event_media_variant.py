@@ -0,0 +1,24 @@
+from sqlalchemy import Column, String, Text, Integer, ForeignKey, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import text
+from sqlalchemy.orm import relationship
+from app.database.base import Base
+
+class EventMediaVariant(Base):
+    """One stored rendition (size x format) of an uploaded image, see
+    services.media_pipeline.RENDITIONS."""
+    __tablename__ = "event_media_variants"
+    __table_args__ = (
+        UniqueConstraint("media_id", "name", "format", name="uq_event_media_variants_media_name_format"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+    media_id = Column(UUID(as_uuid=True), ForeignKey("event_media.id", ondelete="CASCADE"), nullable=False)
+    name = Column(String(20), nullable=False)    # thumb | card | full
+    format = Column(String(10), nullable=False)  # webp | jpeg
+    width = Column(Integer, nullable=False)
+    height = Column(Integer, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    file_url = Column(Text, nullable=False)
+
+    media = relationship("EventMedia", back_populates="variants")
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, DateTime, LargeBinary, Index
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.sql import func, text
+from app.database.base import Base
+
+class MediaBlob(Base):
+    """One set of encoded renditions in storage, shared by every EventMedia
+    whose upload decodes to the same image (see services.media_service).
+
+    ref_count is maintained by a trigger on event_media, so it also drops
+    when media rows go away through ON DELETE CASCADE from events;
+    unreferenced blobs are deleted with their objects by
+    media_service.collect_media_blobs()."""
+    __tablename__ = "media_blobs"
+    __table_args__ = (
+        Index("ix_media_blobs_unreferenced", "id", postgresql_where=text("ref_count = 0")),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+
+    # sha256 of the decoded, normalized pixels: the identity of the blob
+    content_hash = Column(LargeBinary(32), nullable=False, unique=True)
+    # sha256 of the uploaded file that produced it: re-uploading the same
+    # file matches without decoding it
+    source_hash = Column(LargeBinary(32), nullable=False, index=True)
+
+    ref_count = Column(Integer, nullable=False, server_default=text("0"))
+    # [{name, format, width, height, size_bytes, key}], see media_pipeline.RENDITIONS
+    renditions = Column(JSONB, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime, Integer, ForeignKey
+from sqlalchemy import Column, String, Boolean, DateTime, Integer, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func, text
 from sqlalchemy.orm import relationship
@@ -6,6 +6,10 @@ from app.database.base import Base
 
 class Recurrence(Base):
     __tablename__ = "recurrences"
+    __table_args__ = (
+        # scheduler tick: "active rules due now", idle ticks read nothing else
+        Index("ix_recurrences_next_run_active", "next_run", postgresql_where=text("active")),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
 
@@ -21,15 +25,28 @@ class Recurrence(Base):
     # Repeat every N units (e.g. every 2 weeks)
     interval = Column(Integer, nullable=False, default=1)
 
+    # BYMONTHDAY: 1..31, or negative to count from the month end (-1 = last day)
     day_of_month = Column(Integer, nullable=True)
 
+    # BYDAY: comma-separated weekdays with optional ordinal, e.g. "MO,WE",
+    # "2TU" (second Tuesday), "-1FR" (last Friday); see services/rrule.py
+    by_day = Column(String(64), nullable=True)
+
+    # COUNT: total number of occurrences, the first event included
+    count = Column(Integer, nullable=True)
+
     # Stop generating after this date
     repeat_until = Column(DateTime(timezone=True), nullable=True)
 
     # When false → system stops generating new occurrences
     active = Column(Boolean, nullable=False, default=True)
 
+    # When the scheduler next has to look at this rule: the next occurrence
+    # minus the generation horizon. NULL once the rule has no occurrences
+    # left. New and edited rules are due immediately.
+    next_run = Column(DateTime(timezone=True), nullable=True, server_default=func.now())
+
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
 
-    event = relationship("Event", back_populates="recurrence")
\ No newline at end of file
+    event = relationship("Event", back_populates="recurrence", foreign_keys=[event_id])
\ No newline at end of file
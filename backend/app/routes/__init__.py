@@ -1 +1 @@
-from . import event, announcement, role, recurrence, participation, auth, user, media, attendance
+from . import event, announcement, role, recurrence, participation, auth, user, media, attendance, search
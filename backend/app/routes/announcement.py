@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from typing import Optional
 from app.core.deps import require_admin_user
+from app.core.cache import cached_json
 from app.database.session import get_session
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.announcement import Announcement
@@ -17,16 +18,22 @@ async def create_announcement(payload: AnnouncementCreate, current_user = Depend
     return {'success': True, 'data': AnnouncementOut.from_orm(a).dict()}
 
 @router.get('', response_model=dict)
-async def list_announcements(session: AsyncSession = Depends(get_session)):
-    rows = await crud.announcement.list_announcements(session)
-    return {'success': True, 'data': [AnnouncementOut.from_orm(r).dict() for r in rows]}
+async def list_announcements(request: Request, session: AsyncSession = Depends(get_session)):
+    async def build():
+        rows = await crud.announcement.list_announcements(session)
+        return {'success': True, 'data': [AnnouncementOut.from_orm(r).dict() for r in rows]}
+
+    return await cached_json(request, ("announcements",), build)
 
 @router.get("/{id}", response_model=dict)
-async def get_announcement(id: UUID, session: AsyncSession = Depends(get_session)):
-    row = await session.get(Announcement, id)
-    if not row:
-        raise HTTPException(status_code=404, detail="Announcement not found")
-    return {"success": True, "data": AnnouncementOut.from_orm(row).dict()}
+async def get_announcement(id: UUID, request: Request, session: AsyncSession = Depends(get_session)):
+    async def build():
+        row = await session.get(Announcement, id)
+        if not row:
+            raise HTTPException(status_code=404, detail="Announcement not found")
+        return {"success": True, "data": AnnouncementOut.from_orm(row).dict()}
+
+    return await cached_json(request, ("announcements",), build)
 
 
 @router.put("/{id}", response_model=dict)
@@ -1,15 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional
+from typing import Literal, Optional
 from app.database.session import get_session
 from app.core.deps import require_admin_user, require_user
 from app import crud
-from app.schemas.attendance import AttendanceCreate, AttendanceOut, AttendanceReportRow
+from app.services.occurrences import materialize_event_id
+from app.schemas.attendance import (
+    AttendanceCreate,
+    AttendanceOut,
+    AttendanceReportRow,
+    AttendanceBulkCreate,
+    AttendanceBulkItem,
+    AttendanceBulkOut,
+    AttendanceSyncIn,
+    AttendanceSyncResult,
+    AttendanceSyncOut,
+    ExportJobCreate,
+    ExportJobOut,
+    AttendanceListItem,
+)
 from datetime import date
+from uuid import UUID
 from fastapi.responses import StreamingResponse
-import io
-from openpyxl import Workbook
-from reportlab.pdfgen import canvas
+from app.services import attendance_export, attendance_analytics
+from app.core.cache import cached_json
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor
+from app.services.export_jobs import export_jobs, ExportQueueFull
 
 router = APIRouter()
 
@@ -19,13 +36,16 @@ async def mark_attendance(payload: AttendanceCreate, current_user=Depends(requir
     Admin endpoint to mark attendance for a participant.
     attendance_day uniqueness is enforced by DB (unique constraint).
     """
+    # attendance on a virtual recurrence occurrence stores the occurrence first
+    event_id = await materialize_event_id(session, payload.event_id)
     try:
         a = await crud.attendance.create_attendance(
             session,
-            event_id=payload.event_id,
+            event_id=event_id,
             participant_id=payload.participant_id,
             attended_at=payload.attended_at,
-            notes=payload.notes
+            notes=payload.notes,
+            marked_by=current_user.id
         )
         return a
     except Exception as e:
@@ -34,6 +54,84 @@ async def mark_attendance(payload: AttendanceCreate, current_user=Depends(requir
             raise HTTPException(400, "Attendance already recorded for this participant today")
         raise HTTPException(400, str(e))
 
+@router.post("/bulk", response_model=AttendanceBulkOut)
+async def mark_attendance_bulk(payload: AttendanceBulkCreate, current_user=Depends(require_admin_user), session: AsyncSession = Depends(get_session)):
+    """
+    Admin door check-in: marks many participants of one event for one day in
+    a single round trip. Already checked-in participants are reported as
+    duplicates instead of failing the batch.
+    """
+    event_id = await materialize_event_id(session, payload.event_id)
+    try:
+        event_id = UUID(event_id)
+    except ValueError:
+        raise HTTPException(404, "Event not found")
+
+    attendance_day, results = await crud.attendance.bulk_create_attendance(
+        session,
+        event_id=event_id,
+        participant_ids=payload.participant_ids,
+        attended_at=payload.attended_at,
+        notes=payload.notes,
+        marked_by=current_user.id
+    )
+    return AttendanceBulkOut(
+        event_id=event_id,
+        attendance_day=attendance_day,
+        created=sum(1 for _, status, _ in results if status == "created"),
+        results=[
+            AttendanceBulkItem(participant_id=pid, status=status, attendance_id=aid)
+            for pid, status, aid in results
+        ],
+    )
+
+@router.post("/sync", response_model=AttendanceSyncOut)
+async def sync_attendance(payload: AttendanceSyncIn, current_user=Depends(require_admin_user), session: AsyncSession = Depends(get_session)):
+    """
+    Offline check-in replay: applies scans queued on a device in chunked
+    transactions. Every scan key is applied at most once, so a retry of the
+    same batch only looks the keys up. When next_cursor is set the request
+    ran out of time: send the same batch again with cursor=next_cursor.
+    """
+    # resolve each distinct event id once; unknown events become None and
+    # their scans come back as not_registered
+    event_ids = {}
+    for scan in payload.scans[payload.cursor:]:
+        raw = str(scan.event_id)
+        if raw in event_ids:
+            continue
+        try:
+            event_ids[raw] = UUID(await materialize_event_id(session, raw))
+        except (HTTPException, ValueError):
+            event_ids[raw] = None
+
+    scans = [
+        {
+            "key": scan.key,
+            "event_id": event_ids.get(str(scan.event_id)),
+            "participant_id": scan.participant_id,
+            "scanned_at": scan.scanned_at,
+            "notes": scan.notes,
+        }
+        for scan in payload.scans
+    ]
+
+    results, next_cursor = await crud.attendance.sync_scans(
+        session,
+        payload.device_id,
+        scans,
+        marked_by=current_user.id,
+        start=payload.cursor,
+    )
+    return AttendanceSyncOut(
+        applied=len(results),
+        results=[
+            AttendanceSyncResult(key=key, status=status, attendance_id=aid, replayed=replayed)
+            for key, status, aid, replayed in results
+        ],
+        next_cursor=next_cursor,
+    )
+
 @router.delete("/{attendance_id}", response_model=dict)
 async def delete_attendance(attendance_id: str, current_user=Depends(require_admin_user), session: AsyncSession = Depends(get_session)):
     ok = await crud.attendance.delete_attendance(session, attendance_id)
@@ -49,6 +147,28 @@ async def list_event_attendance(event_id: Optional[str] = Query(None), session:
     rows = await crud.attendance.list_attendances_for_event(session, event_id)
     return rows
 
+@router.get("/events/{event_id}", response_model=dict)
+async def list_event_attendance_page(
+    event_id: UUID,
+    day: Optional[date] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_session),
+    current_user = Depends(require_admin_user)
+):
+    """
+    Check-in screen: one page of an event's attendances (optionally one day),
+    newest first, with participant name, email and phone.
+    """
+    rows, next_cursor = await crud.attendance.list_attendances_with_user(
+        session, event_id, day=day, after=decode_cursor(cursor), limit=limit
+    )
+    return {
+        "success": True,
+        "data": [AttendanceListItem.model_validate(r).dict() for r in rows],
+        "next_cursor": next_cursor,
+    }
+
 @router.get("/report", response_model=list[AttendanceReportRow])
 async def attendance_report(
     event_id: Optional[str] = Query(None),
@@ -64,32 +184,52 @@ async def attendance_report(
     rows = await crud.attendance.attendance_report(session, event_id, start_date, end_date)
     return rows
 
+# Tables the analytics read (response cache keys)
+ANALYTICS_TABLES = ("attendances", "events")
+
+@router.get("/analytics")
+async def attendance_analytics_view(
+    request: Request,
+    event_id: Optional[UUID] = Query(None),
+    series_id: Optional[UUID] = Query(None),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    period: Literal["week", "month"] = Query("month"),
+    window: int = Query(4, ge=1, le=52),
+    session: AsyncSession = Depends(get_session),
+    current_user = Depends(require_admin_user)
+):
+    """
+    Weekly check-ins / unique attendees with a moving average, how often
+    participants come back (histogram), per-event totals and a cohort
+    retention matrix by week or month. Cached until attendance changes.
+    """
+    async def build():
+        columns = await attendance_analytics.load_columns(session, event_id, series_id, start_date, end_date)
+        data = await asyncio.to_thread(attendance_analytics.compute_analytics, *columns, period, window)
+        return {"success": True, "data": data}
+
+    return await cached_json(request, ANALYTICS_TABLES, build)
+
 @router.get("/export/excel")
 async def export_excel(
     event_id: str,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_session),
+    current_user = Depends(require_admin_user)
 ):
-    rows = await crud.attendance.attendance_report(session, event_id, start_date, end_date)
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Attendance Report"
-
-    ws.append(["Participant ID", "Total Hadir"])
-
-    for row in rows:
-        ws.append([row["participant_id"], row["attended_count"]])
-
-    stream = io.BytesIO()
-    wb.save(stream)
-    stream.seek(0)
+    # cursor -> write-only workbook in a worker thread -> temp file -> chunks
+    path = await attendance_export.write_attendance_xlsx(session, event_id, start_date, end_date)
+    body, size = attendance_export.open_file_stream(path)
 
     return StreamingResponse(
-        stream,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": "attachment; filename=attendance.xlsx"}
+        body,
+        media_type=attendance_export.XLSX_MEDIA_TYPE,
+        headers={
+            "Content-Disposition": "attachment; filename=attendance.xlsx",
+            "Content-Length": str(size),
+        }
     )
 
 @router.get("/export/pdf")
@@ -97,27 +237,67 @@ async def export_pdf(
     event_id: str,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_session),
+    current_user = Depends(require_admin_user)
 ):
-    rows = await crud.attendance.attendance_report(session, event_id, start_date, end_date)
+    async def render():
+        # paginated table, drawn in a worker thread as rows stream in
+        return await attendance_export.write_attendance_pdf(session, event_id, start_date, end_date)
+
+    key = await attendance_export.export_cache_key(session, "pdf", event_id, start_date, end_date)
+    path, owned = await attendance_export.export_cache.get_or_render(key, render)
+    body, size = attendance_export.open_file_stream(path, delete=owned)
+
+    return StreamingResponse(
+        body,
+        media_type=attendance_export.PDF_MEDIA_TYPE,
+        headers={
+            "Content-Disposition": "attachment; filename=attendance.pdf",
+            "Content-Length": str(size),
+        }
+    )
 
-    buffer = io.BytesIO()
-    c = canvas.Canvas(buffer)
-    c.setFont("Helvetica", 12)
+def _job_out(request: Request, job) -> ExportJobOut:
+    data = job.snapshot()
+    if job.status == "done":
+        data["download_url"] = str(request.url_for("download_export_job", job_id=job.id))
+    return ExportJobOut(**data)
 
-    y = 800
-    c.drawString(50, y, f"Attendance Report — Event {event_id}")
-    y -= 40
+@router.post("/exports", response_model=ExportJobOut, status_code=202)
+async def create_export_job(payload: ExportJobCreate, request: Request, current_user=Depends(require_admin_user)):
+    """
+    Queue an export (xlsx, pdf or csv) and return its job right away; poll
+    GET /exports/{job_id} until status is "done", then download it. The same
+    export of unchanged data returns the existing job.
+    """
+    try:
+        job = await export_jobs.enqueue(payload.kind, payload.event_id, payload.start_date, payload.end_date)
+    except ExportQueueFull:
+        raise HTTPException(503, "Export queue is full, try again later")
+    return _job_out(request, job)
 
-    for row in rows:
-        c.drawString(50, y, f"{row['participant_id']} — {row['attended_count']} hadir")
-        y -= 20
+@router.get("/exports/{job_id}", response_model=ExportJobOut)
+async def get_export_job(job_id: str, request: Request, current_user=Depends(require_admin_user)):
+    job = export_jobs.get(job_id)
+    if not job:
+        raise HTTPException(404, "Export job not found")
+    return _job_out(request, job)
 
-    c.save()
-    buffer.seek(0)
+@router.get("/exports/{job_id}/download", name="download_export_job")
+async def download_export_job(job_id: str, current_user=Depends(require_admin_user)):
+    job = export_jobs.get(job_id)
+    if not job:
+        raise HTTPException(404, "Export job not found")
+    if job.status != "done":
+        raise HTTPException(409, f"Export job is {job.status}")
 
+    # the file stays for other downloads until the job expires
+    body, size = attendance_export.open_file_stream(job.path, delete=False)
     return StreamingResponse(
-        buffer,
-        media_type="application/pdf",
-        headers={"Content-Disposition": "attachment; filename=attendance.pdf"}
-    )
\ No newline at end of file
+        body,
+        media_type=job.media_type,
+        headers={
+            "Content-Disposition": f"attachment; filename={job.filename}",
+            "Content-Length": str(size),
+        }
+    )
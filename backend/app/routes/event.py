@@ -1,13 +1,25 @@
 # app/routes/event.py
-from fastapi import APIRouter, Depends, HTTPException, Query
-from typing import Optional, List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from typing import Optional, List, Literal
+from datetime import datetime
+from uuid import UUID
 from app.database.session import get_session
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.schemas.event import EventCreate, EventUpdate, EventOut
+from app.schemas.event import (
+    EventCreate,
+    EventUpdate,
+    EventOut,
+    EventSummaryOut,
+    SeriesUpdate,
+    SeriesReschedule,
+    SeriesCancel,
+)
 from app import crud
 from app.core.deps import require_admin_user, require_user
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor
+from app.core.cache import cached_json
+from app.services import occurrences, series
 from sqlalchemy import select
-from sqlalchemy.orm import selectinload
 
 from app.models.event import Event
 from app.models.participant import Participant
@@ -15,22 +27,11 @@ from app.schemas.participant import ParticipantAdminCreate, ParticipantOut
 
 router = APIRouter()
 
-# Helper: re-query event with relationships loaded
-async def load_event_with_relations(session: AsyncSession, event_id: str) -> Optional[Event]:
-    stmt = (
-        select(Event)
-        .where(Event.id == event_id)
-        .options(
-            selectinload(Event.media),
-            selectinload(Event.participants),
-            selectinload(Event.recurrence),
-            selectinload(Event.roles),
-            selectinload(Event.schedules),
-            selectinload(Event.attendances),
-        )
-    )
-    result = await session.execute(stmt)
-    return result.scalar_one_or_none()
+# Helper: re-query event with the relationships a loader profile asks for
+async def load_event_with_relations(
+    session: AsyncSession, event_id: str, profile: str = "detail"
+) -> Optional[Event]:
+    return await crud.event.get_event(session, event_id, profile=profile)
 
 # CREATE EVENT
 @router.post("", response_model=dict)
@@ -71,6 +72,8 @@ async def edit_event(
     if payload.slots_available is not None: updates["slots_available"] = payload.slots_available
     if payload.recurrence_pattern is not None: updates["recurrence_pattern"] = payload.recurrence_pattern
 
+    # editing a virtual occurrence stores it first
+    event_id = await occurrences.materialize_event_id(session, event_id)
     ev = await crud.event.update_event(session, event_id, updates)
 
     if not ev:
@@ -108,41 +111,122 @@ async def delete_event(
 
     return {"success": True, "data": EventOut.from_orm(ev_full).dict()}
 
+# SERIES – edit this and following occurrences (splits the series at from_date)
+@router.patch("/series/{series_id}", response_model=dict)
+async def edit_series(
+    series_id: UUID,
+    payload: SeriesUpdate,
+    current_user=Depends(require_admin_user),
+    session: AsyncSession = Depends(get_session)
+):
+    values = {
+        field: getattr(payload, field)
+        for field in series.SERIES_EDITABLE_FIELDS
+        if getattr(payload, field) is not None
+    }
+    if not values:
+        raise HTTPException(400, "Tidak ada perubahan")
+
+    try:
+        updated, new_series_id = await series.update_series(session, series_id, payload.from_date, values)
+    except series.UnsupportedShift as exc:
+        raise HTTPException(400, str(exc))
+    return {"success": True, "updated": updated, "series_id": str(new_series_id)}
+
+# SERIES – move this and following occurrences by a fixed offset
+@router.post("/series/{series_id}/reschedule", response_model=dict)
+async def reschedule_series(
+    series_id: UUID,
+    payload: SeriesReschedule,
+    current_user=Depends(require_admin_user),
+    session: AsyncSession = Depends(get_session)
+):
+    try:
+        updated, new_series_id = await series.update_series(
+            session, series_id, payload.from_date, {}, shift=payload.shift
+        )
+    except series.UnsupportedShift as exc:
+        raise HTTPException(400, str(exc))
+    return {"success": True, "updated": updated, "series_id": str(new_series_id)}
+
+# SERIES – cancel this and following occurrences and end the rule
+@router.post("/series/{series_id}/cancel", response_model=dict)
+async def cancel_series(
+    series_id: UUID,
+    payload: SeriesCancel,
+    current_user=Depends(require_admin_user),
+    session: AsyncSession = Depends(get_session)
+):
+    cancelled = await crud.event.cancel_series(session, series_id, payload.from_date)
+    return {"success": True, "cancelled": cancelled}
+
+# Tables read by the public event endpoints (response cache keys);
+# participants writes change events.registered_count through a trigger;
+# recurrences feed virtual occurrences (RECURRENCE_MODE=virtual)
+EVENT_LIST_TABLES = ("events", "event_media", "event_media_variants", "participants", "recurrences")
+EVENT_DETAIL_TABLES = ("events", "event_media", "event_media_variants", "participants", "recurrences")
+
 # LIST EVENTS
 @router.get("", response_model=dict)
 async def list_events(
+    request: Request,
     q: Optional[str] = Query(None),
     upcoming: Optional[bool] = Query(False),
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    view: Literal["full", "summary"] = Query("full"),
     session: AsyncSession = Depends(get_session)
 ):
-    stmt = (
-        select(Event)
-        .options(
-            selectinload(Event.media),
-            selectinload(Event.participants)
-        )
-        .order_by(Event.event_date.asc())
+    filters = dict(
+        q=q,
+        upcoming=upcoming,
+        start_date=start_date,
+        end_date=end_date,
+        after=decode_cursor(cursor, parse_id=occurrences.parse_event_id),
+        limit=limit,
     )
 
-    events = (await session.execute(stmt)).scalars().all()
+    async def build():
+        # summary: one query, column projection + aggregated participant counts
+        if view == "summary":
+            rows, next_cursor = await occurrences.list_page(session, crud.event.list_event_summary_rows, **filters)
+            data = [EventSummaryOut.model_validate(r).dict() for r in rows]
+        else:
+            events, next_cursor = await occurrences.list_page(session, crud.event.list_event_rows, **filters)
+            data = [EventOut.from_orm(e).dict() for e in events]
 
-    return {
-        "success": True,
-        "data": [EventOut.from_orm(e).dict() for e in events]
-    }
+        return {
+            "success": True,
+            "data": data,
+            "next_cursor": next_cursor,
+        }
+
+    # "upcoming" depends on now(), so it is only as fresh as the cache TTL
+    return await cached_json(request, EVENT_LIST_TABLES, build)
 
 # GET EVENT BY ID
 @router.get("/{event_id}", response_model=dict)
-async def get_event(event_id: str, session: AsyncSession = Depends(get_session)):
-    ev = await load_event_with_relations(session, event_id)
+async def get_event(event_id: str, request: Request, session: AsyncSession = Depends(get_session)):
+    async def build():
+        if occurrences.is_virtual_id(event_id):
+            found = await occurrences.get_virtual_occurrence(session, event_id)
+            if isinstance(found, occurrences.VirtualOccurrence):
+                return {"success": True, "data": EventOut.from_orm(found).dict()}
+            ev = await load_event_with_relations(session, str(found))
+        else:
+            ev = await load_event_with_relations(session, event_id)
 
-    if not ev:
-        raise HTTPException(
-            status_code=404,
-            detail={"code": "EVENT_NOT_FOUND", "message": "Event tidak ditemukan"},
-        )
+        if not ev:
+            raise HTTPException(
+                status_code=404,
+                detail={"code": "EVENT_NOT_FOUND", "message": "Event tidak ditemukan"},
+            )
+
+        return {"success": True, "data": EventOut.from_orm(ev).dict()}
 
-    return {"success": True, "data": EventOut.from_orm(ev).dict()}
+    return await cached_json(request, EVENT_DETAIL_TABLES, build)
 
 # REGISTER FOR EVENT
 @router.post("/{event_id}/register", response_model=dict)
@@ -151,44 +235,9 @@ async def register_for_event(
     current_user=Depends(require_user),
     session: AsyncSession = Depends(get_session)
 ):
-    # Load event with participants count and media (safe)
-    event = await load_event_with_relations(session, event_id)
-
-    if not event:
-        raise HTTPException(404, "Event not found")
-
-    if not event.requires_registration:
-        raise HTTPException(400, "Event does not require registration")
-
-    # Already registered?
-    q = await session.execute(
-        select(Participant).where(
-            Participant.event_id == event_id,
-            Participant.user_id == current_user.id,
-        )
-    )
-    existing = q.scalars().first()
-
-    if existing:
-        raise HTTPException(400, "You already registered")
-
-    # Slot limit
-    if event.slots_available is not None:
-        if len(event.participants) >= event.slots_available:
-            raise HTTPException(400, "Event is full")
-
-    # Register
-    p = Participant(event_id=event_id, user_id=current_user.id)
-    session.add(p)
-    await session.commit()
-    await session.refresh(p)
-
-    # Re-load event to get updated participants safely if needed
-    event = await load_event_with_relations(session, event_id)
-    remaining = (
-        event.slots_available - len(event.participants)
-        if event.slots_available is not None else None
-    )
+    # Lock, capacity check and insert happen atomically in the crud layer
+    event_id = await occurrences.materialize_event_id(session, event_id)
+    remaining = await crud.participation.register_for_event(session, event_id, current_user.id)
 
     return {
         "success": True,
@@ -237,7 +286,7 @@ async def register_participant_by_admin(
             await session.refresh(user)
     
     participant_data = {
-        "event_id": event_id,
+        "event_id": await occurrences.materialize_event_id(session, event_id),
         "user_id": str(user.id),
         "role_id": None
     }
@@ -251,7 +300,16 @@ async def unregister_from_event(
     current_user = Depends(require_user),
     session: AsyncSession = Depends(get_session)
 ):
-    event = await load_event_with_relations(session, event_id)
+    if occurrences.is_virtual_id(event_id):
+        found = await occurrences.get_virtual_occurrence(session, event_id)
+        if isinstance(found, occurrences.VirtualOccurrence):
+            return {
+                "success": True,
+                "message": "You were not registered for this event."
+            }
+        event_id = str(found)
+
+    event = await load_event_with_relations(session, event_id, profile="bare")
 
     if not event:
         raise HTTPException(404, "Event not found")
@@ -1,10 +1,62 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+import os
+from datetime import timezone
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Literal, Optional
+from uuid import UUID
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import RedirectResponse
+from fastapi.routing import APIRoute
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database.session import get_session
-from app.services.media_service import upload_media, delete_media
+from app.services.media_service import upload_media, delete_media, resolve_media_object
+from app.services.media_cache import media_cache, object_digest
+from app.services.media_pipeline import MAX_MEDIA_BYTES
+from app.services.storage import get_storage
+from app.core.cache import etag_matches
 from app.core.deps import require_admin_user
+from app.schemas.event import EventMediaOut
 
-router = APIRouter()  
+# A media id + variant + format always names the same bytes
+MEDIA_MAX_AGE_SECONDS = int(os.getenv("MEDIA_MAX_AGE_SECONDS", 86400))
+
+# Multipart framing (boundaries, part headers) allowed on top of the file
+MEDIA_FORM_OVERHEAD_BYTES = int(os.getenv("MEDIA_FORM_OVERHEAD_BYTES", 16 * 1024))
+
+
+class MediaUploadRoute(APIRoute):
+    """Rejects request bodies larger than an allowed upload with 413 before
+    the form is parsed (FastAPI parses it before any dependency runs, and
+    Starlette spools the whole file): on Content-Length up front, and while
+    receiving a body sent without one."""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        limit = MAX_MEDIA_BYTES + MEDIA_FORM_OVERHEAD_BYTES
+
+        async def limited_handler(request: Request) -> Response:
+            declared = request.headers.get("content-length", "")
+            if declared.isdigit() and int(declared) > limit:
+                raise HTTPException(413, f"File exceeds {MAX_MEDIA_BYTES} bytes")
+
+            receive = request.receive
+            received = 0
+
+            async def limited_receive():
+                nonlocal received
+                message = await receive()
+                if message["type"] == "http.request":
+                    received += len(message.get("body", b""))
+                    if received > limit:
+                        raise HTTPException(413, f"File exceeds {MAX_MEDIA_BYTES} bytes")
+                return message
+
+            return await handler(Request(request.scope, limited_receive))
+
+        return limited_handler
+
+
+# only uploads have a body; the other routes pass through unchanged
+router = APIRouter(route_class=MediaUploadRoute)
 
 @router.post("/{event_id}", response_model=dict)
 async def upload_event_banner(
@@ -15,7 +67,12 @@ async def upload_event_banner(
 ):
     try:
         saved = await upload_media(session, file, event_id)
-        return {"success": True, "data": {"id": str(saved.id), "url": saved.file_url}}
+        out = EventMediaOut.from_orm(saved)
+        return {"success": True, "data": {
+            "id": str(saved.id), "url": saved.file_url, "raw_url": out.raw_url, "srcset": out.srcset,
+        }}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(400, str(e))
 
@@ -29,4 +86,59 @@ async def delete_event_banner(
     ok = await delete_media(session, media_id)
     if not ok:
         raise HTTPException(404, "Media not found")
-    return {"success": True}
\ No newline at end of file
+    return {"success": True}
+
+
+def _not_modified_since(request: Request, modified) -> bool:
+    since = request.headers.get("if-modified-since")
+    if not since or modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP dates have one-second resolution
+    return modified.replace(microsecond=0) <= since
+
+
+# SERVE MEDIA (local disk cache, Range, ETag / Last-Modified)
+@router.api_route("/{media_id}/raw", methods=["GET", "HEAD"])
+async def serve_event_media(
+    media_id: UUID,
+    request: Request,
+    variant: Literal["thumb", "card", "full"] = Query("full"),
+    format: Optional[Literal["webp", "jpeg"]] = Query(None),
+    session: AsyncSession = Depends(get_session)
+):
+    # without an explicit format, WebP for the browsers that accept it
+    fmt = format or ("webp" if "image/webp" in request.headers.get("accept", "") else "jpeg")
+    obj = await resolve_media_object(session, media_id, variant, fmt)
+    if obj is None:
+        raise HTTPException(404, "Media not found")
+    if obj.key is None:
+        # not in the configured store (written before a backend switch)
+        return RedirectResponse(obj.url, status_code=307)
+
+    headers = {
+        "ETag": f'"{object_digest(obj.key)}"',
+        "Cache-Control": f"public, max-age={MEDIA_MAX_AGE_SECONDS}",
+    }
+    if obj.modified is not None:
+        headers["Last-Modified"] = formatdate(obj.modified.timestamp(), usegmt=True)
+    if format is None:
+        headers["Vary"] = "Accept"
+
+    # If-None-Match wins over If-Modified-Since (RFC 9110 13.2.2)
+    if_none_match = request.headers.get("if-none-match")
+    if etag_matches(if_none_match, headers["ETag"]) or (
+        if_none_match is None and _not_modified_since(request, obj.modified)
+    ):
+        return Response(status_code=304, headers=headers)
+
+    cached = await media_cache.get_or_fetch(obj.key, lambda: get_storage().get(obj.key), obj.modified)
+    if cached is None:
+        raise HTTPException(404, "Media file not found")
+    path, st = cached
+    return media_cache.response(path, st, obj.content_type, headers)
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, Query
+from typing import Literal
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.session import get_session
+from app.schemas.search import SearchHit
+from app import crud
+
+router = APIRouter()
+
+
+# ------------------------------------------------------
+# RANKED FULL-TEXT SEARCH
+# ------------------------------------------------------
+@router.get("", response_model=dict)
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    type: Literal["all", "events", "announcements"] = Query("all"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
+    session: AsyncSession = Depends(get_session)
+):
+    hits, has_more = await crud.search.search(session, q, kind=type, limit=limit, offset=offset)
+
+    return {
+        "success": True,
+        "data": [SearchHit.model_validate(h).dict() for h in hits],
+        "next_offset": offset + limit if has_more else None,
+    }
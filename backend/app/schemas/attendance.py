@@ -1,14 +1,83 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Literal, Optional, Union
 from uuid import UUID
 from datetime import datetime, date
 
 class AttendanceCreate(BaseModel):
-    event_id: UUID
+    # str: virtual recurrence occurrence id, materialized on write
+    event_id: Union[UUID, str]
     participant_id: UUID
     attended_at: Optional[datetime] = None
     notes: Optional[str] = None
 
+class AttendanceBulkCreate(BaseModel):
+    # str: virtual recurrence occurrence id, materialized on write
+    event_id: Union[UUID, str]
+    participant_ids: list[UUID] = Field(..., min_length=1, max_length=2000)
+    attended_at: Optional[datetime] = None
+    notes: Optional[str] = None
+
+class AttendanceBulkItem(BaseModel):
+    participant_id: UUID
+    # created: checked in now; duplicate: already checked in that day;
+    # not_registered: not a participant of this event
+    status: Literal["created", "duplicate", "not_registered"]
+    attendance_id: Optional[UUID] = None
+
+class AttendanceBulkOut(BaseModel):
+    event_id: UUID
+    attendance_day: date
+    created: int
+    results: list[AttendanceBulkItem]
+
+class AttendanceSyncScan(BaseModel):
+    # client idempotency key, unique per device (e.g. a UUID made at scan time)
+    key: str = Field(..., min_length=1, max_length=200)
+    event_id: Union[UUID, str]
+    participant_id: UUID
+    # device clock at scan time; sets attended_at and attendance_day
+    scanned_at: datetime
+    notes: Optional[str] = None
+
+class AttendanceSyncIn(BaseModel):
+    device_id: str = Field(..., min_length=1, max_length=100)
+    scans: list[AttendanceSyncScan] = Field(..., max_length=10000)
+    # index of the first scan to apply (next_cursor of an interrupted sync)
+    cursor: int = Field(0, ge=0)
+
+class AttendanceSyncResult(BaseModel):
+    key: str
+    status: Literal["created", "duplicate", "not_registered"]
+    attendance_id: Optional[UUID] = None
+    # the key was applied before: this is the stored outcome, nothing was done
+    replayed: bool = False
+
+class AttendanceSyncOut(BaseModel):
+    applied: int
+    results: list[AttendanceSyncResult]
+    # None: the whole batch is applied; else resend with cursor=next_cursor
+    next_cursor: Optional[int] = None
+
+class ExportJobCreate(BaseModel):
+    kind: Literal["xlsx", "pdf", "csv"]
+    event_id: Optional[str] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+
+class ExportJobOut(BaseModel):
+    id: str
+    kind: str
+    event_id: Optional[str] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    status: Literal["queued", "running", "done", "failed"]
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    size: Optional[int] = None
+    error: Optional[str] = None
+    # set once status is "done"
+    download_url: Optional[str] = None
+
 class AttendanceOut(BaseModel):
     id: UUID
     event_id: UUID
@@ -20,6 +89,23 @@ class AttendanceOut(BaseModel):
 
     model_config = {"from_attributes": True}
 
+class AttendanceListItem(BaseModel):
+    id: UUID
+    event_id: UUID
+    participant_id: UUID
+    user_id: UUID
+    attended_at: datetime
+    attendance_day: date
+    marked_by: Optional[UUID]
+    notes: Optional[str]
+
+    # User details
+    user_full_name: Optional[str] = None
+    user_email: Optional[str] = None
+    user_phone: Optional[str] = None
+
+    model_config = {"from_attributes": True}
+
 class AttendanceReportRow(BaseModel):
     participant_id: UUID
     attended_count: int
\ No newline at end of file
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, Field
-from typing import Optional
-from datetime import datetime
+from pydantic import BaseModel, Field, computed_field
+from typing import Optional, Union
+from datetime import datetime, timedelta
 from uuid import UUID
 from app.schemas.participant import ParticipantOut
 
@@ -13,13 +13,42 @@ class EventCreate(BaseModel):
     slots_available: Optional[int] = Field(None, example=50)
     recurrence_pattern: Optional[str] = Field(None, example="weekly")
 
+class EventMediaVariantOut(BaseModel):
+    name: str
+    format: str
+    width: int
+    height: int
+    size_bytes: int
+    file_url: str
+    model_config = {"from_attributes": True}
+
 class EventMediaOut(BaseModel):
     id: UUID
     file_url: str
     file_type: Optional[str]
     uploaded_at: datetime
+    variants: list[EventMediaVariantOut] = []
     model_config = {"from_attributes": True}
 
+    # Paths of GET /api/media/{id}/raw (served from the API's disk cache),
+    # relative to the API origin
+    @computed_field
+    @property
+    def raw_url(self) -> str:
+        return f"/api/media/{self.id}/raw"
+
+    # format -> "path 320w, path 800w, ..." for <source srcset>; empty for
+    # media uploaded before renditions existed (use raw_url)
+    @computed_field
+    @property
+    def srcset(self) -> dict[str, str]:
+        out = {}
+        for v in sorted(self.variants, key=lambda v: v.width):
+            out.setdefault(v.format, []).append(
+                f"{self.raw_url}?variant={v.name}&format={v.format} {v.width}w"
+            )
+        return {fmt: ", ".join(items) for fmt, items in out.items()}
+
 class EventUpdate(BaseModel):
     title: Optional[str]
     description: Optional[str]
@@ -31,7 +60,8 @@ class EventUpdate(BaseModel):
     recurrence_pattern: Optional[str] = None
 
 class EventOut(BaseModel):
-    id: UUID
+    # str: virtual recurrence occurrence ("rec-..."), see services/occurrences.py
+    id: Union[UUID, str]
     title: str
     description: Optional[str] = None
     location: Optional[str] = None
@@ -41,7 +71,48 @@ class EventOut(BaseModel):
     is_cancelled: bool
     requires_registration: Optional[bool] = None
     slots_available: Optional[int] = None
+    registered_count: int = 0
+    recurrence_id: Optional[UUID] = None
+    series_id: Optional[UUID] = None
+    is_virtual: bool = False
     recurrence_pattern: Optional[str] = None
     media: Optional[list[EventMediaOut]] = None
 
     model_config = {"from_attributes": True}
+
+class EventSummaryOut(BaseModel):
+    id: Union[UUID, str]
+    title: str
+    description: Optional[str] = None
+    location: Optional[str] = None
+    event_date: datetime
+    created_at: datetime
+    updated_at: Optional[datetime]
+    is_cancelled: bool
+    requires_registration: Optional[bool] = None
+    slots_available: Optional[int] = None
+    participant_count: int = 0
+    slots_remaining: Optional[int] = None
+    recurrence_id: Optional[UUID] = None
+    series_id: Optional[UUID] = None
+    is_virtual: bool = False
+
+    model_config = {"from_attributes": True}
+
+
+# "This and following" series operations: from_date is the date of the first
+# occurrence affected (usually the one the admin opened)
+class SeriesUpdate(BaseModel):
+    from_date: datetime
+    title: Optional[str] = None
+    description: Optional[str] = None
+    location: Optional[str] = None
+    requires_registration: Optional[bool] = None
+    slots_available: Optional[int] = None
+
+class SeriesReschedule(BaseModel):
+    from_date: datetime
+    shift: timedelta = Field(..., example="PT2H")
+
+class SeriesCancel(BaseModel):
+    from_date: datetime
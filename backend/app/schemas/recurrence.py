@@ -1,16 +1,34 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 from datetime import datetime
 from uuid import UUID
 from typing import Optional
 
+from app.services.rrule import parse_by_day
+
+
+def _check_by_day(value: Optional[str]) -> Optional[str]:
+    parse_by_day(value)
+    return value.upper().replace(" ", "") if value else value
+
+
+def _check_day_of_month(value: Optional[int]) -> Optional[int]:
+    if value is not None and not (1 <= abs(value) <= 31):
+        raise ValueError("day_of_month must be 1..31 or -1..-31")
+    return value
+
 class RecurrenceBase(BaseModel):
     start_date: datetime
     frequency: str
     interval: int = 1
     day_of_month: Optional[int] = None
+    by_day: Optional[str] = None
+    count: Optional[int] = Field(None, ge=1)
     repeat_until: Optional[datetime] = None
     active: bool = True
 
+    _by_day = field_validator("by_day")(_check_by_day)
+    _day_of_month = field_validator("day_of_month")(_check_day_of_month)
+
 class RecurrenceCreate(RecurrenceBase):
     event_id: UUID
 
@@ -19,9 +37,14 @@ class RecurrenceUpdate(BaseModel):
     frequency: Optional[str] = None
     interval: Optional[int] = None
     day_of_month: Optional[int] = None
+    by_day: Optional[str] = None
+    count: Optional[int] = Field(None, ge=1)
     repeat_until: Optional[datetime] = None
     active: Optional[bool] = None
 
+    _by_day = field_validator("by_day")(_check_by_day)
+    _day_of_month = field_validator("day_of_month")(_check_day_of_month)
+
 class RecurrenceOut(RecurrenceBase):
     id: UUID
     event_id: UUID
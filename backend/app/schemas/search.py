@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+from uuid import UUID
+
+class SearchHit(BaseModel):
+    type: str
+    id: UUID
+    title: str
+    snippet: Optional[str] = None
+    rank: float
+    date: Optional[datetime] = None
+
+    model_config = {"from_attributes": True}
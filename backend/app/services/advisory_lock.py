@@ -0,0 +1,62 @@
+"""Postgres session advisory locks for cluster-wide leaders.
+
+The lock lives on a dedicated AUTOCOMMIT connection held for as long as the
+process is the leader. If the process dies, its connection closes, the lock
+is released, and another process takes it on its next try.
+"""
+import logging
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.database.session import engine
+
+logger = logging.getLogger(__name__)
+
+
+class AdvisoryLock:
+    def __init__(self, key: int, name: str):
+        self.key = key
+        self.name = name
+        self.conn: Optional[AsyncConnection] = None
+
+    @property
+    def held(self) -> bool:
+        return self.conn is not None
+
+    async def acquire(self) -> bool:
+        """Take the lock unless already held; False when another process has it."""
+        if self.conn is not None:
+            return True
+
+        conn = await engine.connect()
+        try:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            got = (
+                await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key})
+            ).scalar()
+        except Exception:
+            await conn.close()
+            raise
+
+        if not got:
+            await conn.close()
+            return False
+
+        self.conn = conn
+        logger.info("[Leader] Became %s leader", self.name)
+        return True
+
+    async def release(self):
+        conn, self.conn = self.conn, None
+        if conn is None:
+            return
+        try:
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.key})
+        except Exception:
+            # close() would put the connection back in the pool with the lock
+            # still held; discard it so the server session (and lock) ends
+            await conn.invalidate()
+        finally:
+            await conn.close()
@@ -0,0 +1,215 @@
+"""Attendance analytics: weekly curves, frequency histogram, per-event
+totals and cohort retention.
+
+The database returns three compact integer arrays (day number, participant
+index, event index) in a single row instead of one row per check-in, and
+everything else is numpy over those arrays: no Python loop touches
+individual attendance rows. compute_analytics() is pure and runs in a
+worker thread; the route caches its JSON per data version (cached_json).
+"""
+from datetime import date, timedelta
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import select, func, distinct, literal_column
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.attendance import Attendance
+from app.models.event import Event
+
+EPOCH = date(1970, 1, 1)
+# 1970-01-01 was a Thursday: (day + 3) // 7 numbers weeks starting on Monday
+_MONDAY_SHIFT = 3
+
+
+def _filtered(stmt, event_id=None, series_id=None, start_date=None, end_date=None):
+    if series_id:
+        stmt = stmt.join(Event, Event.id == Attendance.event_id).where(Event.series_id == series_id)
+    if event_id:
+        stmt = stmt.where(Attendance.event_id == event_id)
+    if start_date:
+        stmt = stmt.where(Attendance.attendance_day >= start_date)
+    if end_date:
+        stmt = stmt.where(Attendance.attendance_day <= end_date)
+    return stmt
+
+
+async def load_columns(
+    session: AsyncSession,
+    event_id: Optional[str] = None,
+    series_id: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+):
+    """(days, participants, events, event_ids): int32 arrays, one element per
+    check-in, plus the event UUIDs the event indexes refer to. Participant and
+    event UUIDs are replaced by dense ranks in SQL, so no UUID objects are
+    built per row."""
+    ranked = _filtered(
+        select(
+            (Attendance.attendance_day - literal_column("DATE '1970-01-01'")).label("d"),
+            (func.dense_rank().over(order_by=Attendance.participant_id) - 1).label("p"),
+            (func.dense_rank().over(order_by=Attendance.event_id) - 1).label("e"),
+            Attendance.event_id,
+        ),
+        event_id, series_id, start_date, end_date,
+    ).subquery("ranked")
+
+    # the event UUIDs come from the same statement (same snapshot) as the
+    # ranks: e is an index into this distinct, ordered list
+    row = (
+        await session.execute(
+            select(
+                func.array_agg(ranked.c.d),
+                func.array_agg(ranked.c.p),
+                func.array_agg(ranked.c.e),
+                func.array_agg(aggregate_order_by(distinct(ranked.c.event_id), ranked.c.event_id)),
+            )
+        )
+    ).one()
+
+    *columns, event_ids = row
+    days, participants, events = (np.asarray(col or (), dtype=np.int32) for col in columns)
+    return days, participants, events, event_ids or []
+
+
+def _day(n) -> str:
+    return (EPOCH + timedelta(days=int(n))).isoformat()
+
+
+def _month_index(days: np.ndarray) -> np.ndarray:
+    return days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int32)
+
+
+def _month(n) -> str:
+    return str(np.datetime64(int(n), "M")) + "-01"
+
+
+# Largest (major x minor) key space deduplicated with a bitmap (1 byte per
+# possible pair); beyond it, pairs are deduplicated by sorting
+_BITMAP_MAX_KEYS = 1 << 24
+
+
+def _unique_pairs(major: np.ndarray, minor: np.ndarray, minor_size: int):
+    """Distinct (major, minor) pairs, as two arrays sorted by major."""
+    keys = major.astype(np.int64) * minor_size + minor
+    space = (int(major.max()) + 1) * minor_size
+    if space <= _BITMAP_MAX_KEYS:
+        seen = np.zeros(space, dtype=bool)
+        seen[keys] = True
+        keys = np.flatnonzero(seen)
+    else:
+        keys = np.sort(keys)
+        keys = keys[np.r_[True, keys[1:] != keys[:-1]]]
+    return keys // minor_size, keys % minor_size
+
+
+def weekly_curve(days: np.ndarray, participants: np.ndarray, n_participants: int, window: int) -> dict:
+    weeks = (days + _MONDAY_SHIFT) // 7
+    first = int(weeks.min())
+    span = int(weeks.max()) - first + 1
+    offset = weeks - first
+
+    checkins = np.bincount(offset, minlength=span)
+    week_of_pair, _ = _unique_pairs(offset, participants, n_participants)
+    unique = np.bincount(week_of_pair, minlength=span)
+
+    # trailing mean of unique attendees; the first weeks average what exists
+    sums = np.cumsum(unique, dtype=np.float64)
+    sums[window:] = sums[window:] - sums[:-window]
+    moving = sums / np.minimum(np.arange(1, span + 1), window)
+
+    return {
+        "weeks": [_day(w * 7 - _MONDAY_SHIFT) for w in range(first, first + span)],
+        "checkins": checkins.tolist(),
+        "unique_attendees": unique.tolist(),
+        "moving_average": np.round(moving, 2).tolist(),
+        "window": window,
+    }
+
+
+def frequency_histogram(participants: np.ndarray, n_participants: int) -> dict:
+    per_participant = np.bincount(participants, minlength=n_participants)
+    histogram = np.bincount(per_participant)[1:]
+    return {
+        "attendances": list(range(1, len(histogram) + 1)),
+        "participants": histogram.tolist(),
+        "mean": round(float(per_participant.mean()), 2),
+        "median": float(np.median(per_participant)),
+    }
+
+
+def event_totals(events: np.ndarray, participants: np.ndarray, event_ids: list, n_participants: int) -> list:
+    n_events = len(event_ids)
+    checkins = np.bincount(events, minlength=n_events)
+    event_of_pair, _ = _unique_pairs(events, participants, n_participants)
+    unique = np.bincount(event_of_pair, minlength=n_events)
+    return [
+        {"event_id": str(eid), "checkins": int(c), "unique_attendees": int(u)}
+        for eid, c, u in zip(event_ids, checkins, unique)
+    ]
+
+
+def cohort_retention(days: np.ndarray, participants: np.ndarray, n_participants: int, period: str) -> dict:
+    """Participants grouped by the period of their first check-in (cohort);
+    matrix[i][k] is the share of cohort i that attended k periods later."""
+    if period == "month":
+        periods = _month_index(days)
+        label = _month
+    else:
+        periods = (days + _MONDAY_SHIFT) // 7
+        label = lambda w: _day(int(w) * 7 - _MONDAY_SHIFT)
+
+    first_period = int(periods.min())
+    span = int(periods.max()) - first_period + 1
+    periods = periods - first_period
+
+    pair_participant, pair_period = _unique_pairs(participants, periods, span)
+    # pairs are sorted by participant, then period: the first pair of each
+    # participant is their cohort
+    starts = np.flatnonzero(np.r_[True, pair_participant[1:] != pair_participant[:-1]])
+    counts = np.diff(np.r_[starts, len(pair_participant)])
+    cohort = np.repeat(pair_period[starts], counts)
+    since = pair_period - cohort
+
+    matrix = np.bincount(cohort * span + since, minlength=span * span).reshape(span, span)
+    sizes = matrix[:, 0]
+    present = np.flatnonzero(sizes)
+
+    shares = matrix[present] / sizes[present, None]
+    return {
+        "period": period,
+        "cohorts": [label(first_period + int(c)) for c in present],
+        "sizes": sizes[present].tolist(),
+        # a cohort can only be followed up to the last period in range
+        "matrix": [
+            np.round(row[: span - int(c)], 4).tolist()
+            for row, c in zip(shares, present)
+        ],
+    }
+
+
+def compute_analytics(
+    days: np.ndarray,
+    participants: np.ndarray,
+    events: np.ndarray,
+    event_ids: list,
+    period: str = "month",
+    window: int = 4,
+) -> dict:
+    if not len(days):
+        return {"checkins": 0, "participants": 0, "events": 0}
+
+    n_participants = int(participants.max()) + 1
+    return {
+        "checkins": int(len(days)),
+        "participants": n_participants,
+        "events": len(event_ids),
+        "first_day": _day(days.min()),
+        "last_day": _day(days.max()),
+        "weekly": weekly_curve(days, participants, n_participants, window),
+        "frequency": frequency_histogram(participants, n_participants),
+        "per_event": event_totals(events, participants, event_ids, n_participants),
+        "retention": cohort_retention(days, participants, n_participants, period),
+    }
@@ -0,0 +1,350 @@
+"""Attendance report exports that never hold the whole report in memory.
+
+Rows come off a server-side cursor (AsyncSession.stream) a partition at a
+time. Each partition is appended to a write-only openpyxl workbook in a
+worker thread; write-only sheets spool their rows to a temp file instead of
+keeping cell objects. The finished file is then streamed to the client in
+chunks and deleted. Memory stays at about one partition plus one chunk,
+however many rows the report has, and the event loop never runs openpyxl.
+
+PDFs are drawn the same way (partition by partition, in a worker thread)
+by PdfReportWriter, and the rendered files are kept in export_cache, keyed
+by the report parameters and the event's attendance report version (a
+counter the rollup trigger bumps, so check-ins from every worker invalidate
+it).
+"""
+import os
+import csv
+import asyncio
+import tempfile
+from typing import AsyncIterator, Awaitable, Callable, Hashable, Optional, Tuple
+from datetime import date, datetime
+
+from uuid import UUID
+
+from openpyxl import Workbook
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache, table_version
+from app.crud.attendance import attendance_report_query
+from app.models.attendance_rollup import AttendanceReportVersion
+from app.models.event import Event
+
+# Rows fetched from the cursor (and written) per step
+EXPORT_PARTITION_ROWS = int(os.getenv("EXPORT_PARTITION_ROWS", 5000))
+# Bytes per chunk sent to the client
+EXPORT_CHUNK_BYTES = int(os.getenv("EXPORT_CHUNK_BYTES", 64 * 1024))
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+CSV_MEDIA_TYPE = "text/csv; charset=utf-8"
+PDF_MEDIA_TYPE = "application/pdf"
+XLSX_HEADER = ["Participant ID", "Nama", "Total Hadir"]
+
+# Rendered export files kept per process (bytes on disk, not memory)
+EXPORT_CACHE_MAX_BYTES = int(os.getenv("EXPORT_CACHE_MAX_BYTES", 256 * 1024 * 1024))  # 256 MB
+EXPORT_CACHE_TTL_SECONDS = int(os.getenv("EXPORT_CACHE_TTL_SECONDS", 600))
+
+# Tables the report reads that the app writes: their (per-process) versions
+# are part of every export cache key. attendance_monthly_rollup is written
+# only by its trigger; report_data_version covers it.
+REPORT_TABLES = ("attendances", "participants", "users")
+
+
+async def iter_report_partitions(
+    session: AsyncSession,
+    event_id: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    size: int = EXPORT_PARTITION_ROWS,
+):
+    result = await session.stream(
+        attendance_report_query(event_id, start_date, end_date).execution_options(yield_per=size)
+    )
+    async for rows in result.partitions(size):
+        yield rows
+
+
+def _append_rows(ws, rows):
+    for row in rows:
+        ws.append([str(row.participant_id), row.participant_name, row.attended_count])
+
+
+async def write_attendance_xlsx(
+    session: AsyncSession,
+    event_id: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> str:
+    """Write the report to a temporary .xlsx file and return its path; the
+    caller owns (and must delete) the file."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Attendance Report")
+    ws.append(XLSX_HEADER)
+
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        async for rows in iter_report_partitions(session, event_id, start_date, end_date):
+            await asyncio.to_thread(_append_rows, ws, rows)
+        await asyncio.to_thread(wb.save, path)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path
+
+
+def _write_csv_rows(f, rows):
+    writer = csv.writer(f)
+    for row in rows:
+        writer.writerow([str(row.participant_id), row.participant_name, row.attended_count])
+
+
+async def write_attendance_csv(
+    session: AsyncSession,
+    event_id: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> str:
+    """Write the report to a temporary .csv file and return its path; the
+    caller owns (and must delete) the file."""
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    try:
+        # utf-8-sig: Excel opens names with accents correctly
+        with os.fdopen(fd, "w", newline="", encoding="utf-8-sig") as f:
+            csv.writer(f).writerow(XLSX_HEADER)
+            async for rows in iter_report_partitions(session, event_id, start_date, end_date):
+                await asyncio.to_thread(_write_csv_rows, f, rows)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path
+
+
+def open_file_stream(path: str, delete: bool = True, chunk_size: int = EXPORT_CHUNK_BYTES) -> Tuple[AsyncIterator[bytes], int]:
+    """Open a file now and return (chunk iterator, size). The chunks are read
+    in a worker thread. With delete=True the name is removed right away: the
+    open handle keeps the data until the stream ends or is dropped. Opening
+    up front also keeps a cached file readable if the cache evicts it
+    mid-response."""
+    f = open(path, "rb")
+    size = os.fstat(f.fileno()).st_size
+    if delete:
+        os.unlink(path)
+
+    async def chunks():
+        try:
+            while True:
+                chunk = await asyncio.to_thread(f.read, chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            f.close()
+
+    return chunks(), size
+
+
+
+# ---------------------------------------------------------
+# PDF
+# ---------------------------------------------------------
+class PdfReportWriter:
+    """Paginated attendance table on A4: a header and the column titles on
+    every page, rows drawn as they arrive. Not thread-safe; each export
+    drives one writer from one worker thread at a time."""
+
+    MARGIN = 40
+    ROW_HEIGHT = 16
+    FONT = "Helvetica"
+    FONT_BOLD = "Helvetica-Bold"
+    FONT_SIZE = 9
+    # (title, x offset from the left margin, width, right-aligned)
+    COLUMNS = (
+        ("No", 0, 36, True),
+        ("Nama", 46, 230, False),
+        ("Participant ID", 286, 170, False),
+        ("Total Hadir", 456, 59, True),
+    )
+
+    def __init__(self, path: str, title: str, subtitle: str):
+        self.title = title
+        self.subtitle = subtitle
+        self.width, self.height = A4
+        self.canvas = canvas.Canvas(path, pagesize=A4)
+        self.page = 0
+        self.count = 0
+        self.y = 0.0
+        self._new_page()
+
+    def _new_page(self):
+        if self.page:
+            self.canvas.showPage()
+        self.page += 1
+        c = self.canvas
+        top = self.height - self.MARGIN
+
+        c.setFont(self.FONT_BOLD, 13)
+        c.drawString(self.MARGIN, top, self.title)
+        c.setFont(self.FONT, self.FONT_SIZE)
+        c.drawString(self.MARGIN, top - 16, self.subtitle)
+        c.drawRightString(self.width - self.MARGIN, top, f"Halaman {self.page}")
+
+        y = top - 40
+        c.setFont(self.FONT_BOLD, self.FONT_SIZE)
+        self._draw_cells([name for name, *_ in self.COLUMNS], y)
+        c.line(self.MARGIN, y - 4, self.width - self.MARGIN, y - 4)
+        c.setFont(self.FONT, self.FONT_SIZE)
+        self.y = y - self.ROW_HEIGHT
+
+    def _fit(self, text: str, width: float) -> str:
+        if stringWidth(text, self.FONT, self.FONT_SIZE) <= width:
+            return text
+        while text and stringWidth(text + "...", self.FONT, self.FONT_SIZE) > width:
+            text = text[:-1]
+        return text + "..."
+
+    def _draw_cells(self, values, y: float):
+        for value, (_, offset, width, right) in zip(values, self.COLUMNS):
+            text = self._fit(str(value), width)
+            x = self.MARGIN + offset
+            if right:
+                self.canvas.drawRightString(x + width, y, text)
+            else:
+                self.canvas.drawString(x, y, text)
+
+    def add_rows(self, rows):
+        for row in rows:
+            if self.y < self.MARGIN:
+                self._new_page()
+            self.count += 1
+            self._draw_cells(
+                [self.count, row.participant_name or "-", row.participant_id, row.attended_count],
+                self.y,
+            )
+            self.y -= self.ROW_HEIGHT
+
+    def finish(self):
+        if not self.count:
+            self.canvas.drawString(self.MARGIN, self.y, "Belum ada data kehadiran.")
+        self.canvas.save()
+
+
+async def _event_title(session: AsyncSession, event_id) -> Optional[str]:
+    try:
+        event_id = UUID(str(event_id))
+    except ValueError:
+        return None
+    return (await session.execute(select(Event.title).where(Event.id == event_id))).scalar_one_or_none()
+
+
+def _date_range_label(start_date: Optional[date], end_date: Optional[date]) -> str:
+    if not start_date and not end_date:
+        return "Semua tanggal"
+    return f"{start_date or '...'} s/d {end_date or '...'}"
+
+
+async def write_attendance_pdf(
+    session: AsyncSession,
+    event_id: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    event_title: Optional[str] = None,
+) -> str:
+    """Render the report to a temporary PDF and return its path; the caller
+    owns (and must delete) the file."""
+    if event_title is None and event_id:
+        event_title = await _event_title(session, event_id)
+
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    os.close(fd)
+    try:
+        writer = await asyncio.to_thread(
+            PdfReportWriter,
+            path,
+            f"Laporan Kehadiran — {event_title or event_id or 'Semua Event'}",
+            f"{_date_range_label(start_date, end_date)} · dibuat {datetime.now():%Y-%m-%d %H:%M}",
+        )
+        async for rows in iter_report_partitions(session, event_id, start_date, end_date):
+            await asyncio.to_thread(writer.add_rows, rows)
+        await asyncio.to_thread(writer.finish)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path
+
+
+# ---------------------------------------------------------
+# RENDERED FILE CACHE
+# ---------------------------------------------------------
+class ExportFileCache(TTLCache):
+    """TTLCache of rendered export files: values are paths, sizes are file
+    sizes, and a dropped entry deletes its file."""
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        super().__init__(max_bytes, ttl_seconds)
+        self._locks: dict = {}
+
+    def _drop(self, key: Hashable):
+        path = self._entries[key][0]
+        super()._drop(key)
+        try:
+            # a response still streaming it keeps its open handle
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+    async def get_or_render(self, key: Hashable, render: Callable[[], Awaitable[str]]) -> Tuple[str, bool]:
+        """Return (path, owned): owned is False when the file belongs to the
+        cache, True when it was too large to cache and the caller must
+        delete it. Concurrent requests for the same key render once."""
+        # [lock, number of requests using it]
+        entry = self._locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                path = self.get(key)
+                if path is not None:
+                    return path, False
+
+                path = await render()
+                size = os.path.getsize(path)
+                if size > self.max_bytes:
+                    return path, True
+                self.put(key, path, size=size)
+                return path, False
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                self._locks.pop(key, None)
+
+
+export_cache = ExportFileCache(EXPORT_CACHE_MAX_BYTES, EXPORT_CACHE_TTL_SECONDS)
+
+
+async def report_data_version(session: AsyncSession, event_id=None) -> int:
+    """The event's attendance_report_versions counter (the sum over all events
+    for an all-events report). The rollup trigger bumps it on every added,
+    moved or removed check-in, committed by any process; one indexed row
+    read, no scan of the check-ins."""
+    if event_id:
+        stmt = select(AttendanceReportVersion.version).where(AttendanceReportVersion.event_id == event_id)
+    else:
+        stmt = select(func.sum(AttendanceReportVersion.version))
+    return (await session.execute(stmt)).scalar() or 0
+
+
+async def export_cache_key(
+    session: AsyncSession, kind: str, event_id, start_date: Optional[date], end_date: Optional[date]
+) -> tuple:
+    # check-ins: versioned in the database (shared by every worker); the
+    # table versions add writes in this process, e.g. renamed participants,
+    # which other processes pick up after the TTL
+    return (
+        kind, str(event_id), start_date, end_date,
+        await report_data_version(session, event_id),
+        tuple(table_version(t) for t in REPORT_TABLES),
+    )
@@ -0,0 +1,59 @@
+import logging
+from typing import Optional
+from sqlalchemy import select, delete, func, literal, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.models.attendance import Attendance
+from app.models.attendance_rollup import AttendanceMonthlyRollup, AttendanceReportVersion
+from app.models.event import Event
+from app.database.session import AsyncSessionLocal
+from app.core.cache import mark_written
+
+logger = logging.getLogger(__name__)
+
+
+async def rebuild_attendance_rollup(event_id: Optional[str] = None) -> int:
+    """Recompute attendance_monthly_rollup from attendances (all of it, or one
+    event's rows) in one transaction.
+
+    The rollup is maintained by a trigger, so this is only needed when
+    someone bypassed it (triggers disabled, a partial restore, ...).
+    attendances is locked in SHARE mode meanwhile: reads continue, check-ins
+    wait until the rebuild commits. Returns the number of rollup rows written.
+    """
+    month = func.date_trunc("month", Attendance.attendance_day).cast(AttendanceMonthlyRollup.month.type)
+    counts = select(
+        Attendance.event_id,
+        Attendance.participant_id,
+        month.label("month"),
+        func.count().label("attended_days"),
+    ).group_by(Attendance.event_id, Attendance.participant_id, month)
+
+    clear = delete(AttendanceMonthlyRollup)
+    if event_id:
+        counts = counts.where(Attendance.event_id == event_id)
+        clear = clear.where(AttendanceMonthlyRollup.event_id == event_id)
+
+    async with AsyncSessionLocal() as session:
+        await session.execute(text("LOCK TABLE attendances IN SHARE MODE"))
+        await session.execute(clear)
+        result = await session.execute(
+            pg_insert(AttendanceMonthlyRollup).from_select(
+                ["event_id", "participant_id", "month", "attended_days"], counts
+            )
+        )
+        # the trigger did not see these changes: bump the report versions
+        # (export cache keys) of every rebuilt event
+        events = select(Event.id, literal(1))
+        if event_id:
+            events = events.where(Event.id == event_id)
+        bump = pg_insert(AttendanceReportVersion).from_select(["event_id", "version"], events)
+        await session.execute(bump.on_conflict_do_update(
+            index_elements=[AttendanceReportVersion.event_id],
+            set_={"version": AttendanceReportVersion.version + 1},
+        ))
+        mark_written(session, "attendance_monthly_rollup")
+        await session.commit()
+
+    logger.info("[Rollup] Rebuilt %d attendance rollup rows%s", result.rowcount,
+                f" for event {event_id}" if event_id else "")
+    return result.rowcount
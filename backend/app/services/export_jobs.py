@@ -0,0 +1,243 @@
+"""Background attendance export jobs.
+
+POST /api/attendance/exports enqueues a job, GET polls it, and the finished
+file is downloaded from its own URL. Jobs run on a fixed number of worker
+tasks fed by a bounded queue, each with its own DB session, so a large
+report never holds the request that asked for it. When the queue is full,
+enqueue() raises instead of piling up work.
+
+A job is identified by (kind, event, date range, attendance data version
+read from the database), the same key as the PDF export cache. A request that matches
+a queued, running or finished job gets that job back instead of a new one.
+Finished files live in EXPORT_JOBS_DIR and are deleted, with their job,
+EXPORT_JOB_TTL_SECONDS after they finish: a timer sweeps expired jobs every
+EXPORT_SWEEP_INTERVAL_SECONDS, and files older than the TTL that no job
+owns (left by a crash or an earlier run) are purged on start and by the
+same timer. Jobs and files belong to the
+process that ran them: behind several workers, poll and download from the
+process that accepted the job (sticky sessions).
+"""
+import os
+import time
+import uuid
+import shutil
+import asyncio
+import logging
+import tempfile
+from datetime import date, datetime, timezone
+from typing import Optional
+
+from app.database.session import AsyncSessionLocal
+from app.services import attendance_export
+
+logger = logging.getLogger(__name__)
+
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", 2))
+EXPORT_QUEUE_SIZE = int(os.getenv("EXPORT_QUEUE_SIZE", 32))
+EXPORT_JOB_TTL_SECONDS = int(os.getenv("EXPORT_JOB_TTL_SECONDS", 3600))
+EXPORT_SWEEP_INTERVAL_SECONDS = int(os.getenv("EXPORT_SWEEP_INTERVAL_SECONDS", 60))
+EXPORT_JOBS_DIR = os.getenv("EXPORT_JOBS_DIR") or os.path.join(tempfile.gettempdir(), "attendance-exports")
+
+# kind -> (writer, media type, file extension)
+EXPORT_FORMATS = {
+    "xlsx": (attendance_export.write_attendance_xlsx, attendance_export.XLSX_MEDIA_TYPE, "xlsx"),
+    "pdf": (attendance_export.write_attendance_pdf, attendance_export.PDF_MEDIA_TYPE, "pdf"),
+    "csv": (attendance_export.write_attendance_csv, attendance_export.CSV_MEDIA_TYPE, "csv"),
+}
+
+
+class ExportQueueFull(Exception):
+    pass
+
+
+class ExportJob:
+    def __init__(self, kind: str, event_id: Optional[str], start_date: Optional[date], end_date: Optional[date], key: tuple):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.event_id = event_id
+        self.start_date = start_date
+        self.end_date = end_date
+        self.key = key
+        self.status = "queued"  # queued -> running -> done | failed
+        self.created_at = datetime.now(timezone.utc)
+        self.finished_at: Optional[datetime] = None
+        self.path: Optional[str] = None
+        self.size: Optional[int] = None
+        self.error: Optional[str] = None
+        self._expires_at: Optional[float] = None
+
+    @property
+    def media_type(self) -> str:
+        return EXPORT_FORMATS[self.kind][1]
+
+    @property
+    def filename(self) -> str:
+        return f"attendance.{EXPORT_FORMATS[self.kind][2]}"
+
+    def snapshot(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "event_id": self.event_id,
+            "start_date": self.start_date,
+            "end_date": self.end_date,
+            "status": self.status,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "size": self.size,
+            "error": self.error,
+        }
+
+
+class ExportJobManager:
+    def __init__(self, workers: int = EXPORT_WORKERS, queue_size: int = EXPORT_QUEUE_SIZE,
+                 ttl_seconds: int = EXPORT_JOB_TTL_SECONDS, directory: str = EXPORT_JOBS_DIR,
+                 sweep_seconds: int = EXPORT_SWEEP_INTERVAL_SECONDS):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.ttl_seconds = ttl_seconds
+        self.sweep_seconds = sweep_seconds
+        self.directory = directory
+        self._jobs: dict = {}
+        self._by_key: dict = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: list = []
+
+    # ---------------------------------------------------------
+    # API
+    # ---------------------------------------------------------
+    async def enqueue(self, kind: str, event_id: Optional[str] = None,
+                      start_date: Optional[date] = None, end_date: Optional[date] = None) -> ExportJob:
+        self._sweep()
+        async with AsyncSessionLocal() as session:
+            key = await attendance_export.export_cache_key(session, kind, event_id, start_date, end_date)
+
+        existing = self._jobs.get(self._by_key.get(key))
+        if existing is not None and existing.status != "failed":
+            return existing
+
+        self.start()
+        job = ExportJob(kind, event_id, start_date, end_date, key)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise ExportQueueFull()
+
+        self._jobs[job.id] = job
+        self._by_key[key] = job.id
+        return job
+
+    def get(self, job_id: str) -> Optional[ExportJob]:
+        self._sweep()
+        return self._jobs.get(job_id)
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        for job in list(self._jobs.values()):
+            self._forget(job)
+
+    def start(self):
+        """Start the workers and the sweep timer (app startup, or the first
+        enqueue)."""
+        if self._tasks:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._purge_files(set())
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [asyncio.create_task(self._worker(n)) for n in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._sweeper()))
+        logger.info("[Exports] %d workers started (queue=%d)", self.workers, self.queue_size)
+
+    # ---------------------------------------------------------
+    # WORKERS
+    # ---------------------------------------------------------
+
+    async def _worker(self, n: int):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: ExportJob):
+        if self._jobs.get(job.id) is not job:
+            return  # swept while queued
+
+        job.status = "running"
+        started = time.perf_counter()
+        writer = EXPORT_FORMATS[job.kind][0]
+        try:
+            async with AsyncSessionLocal() as session:
+                tmp = await writer(session, job.event_id, job.start_date, job.end_date)
+            path = os.path.join(self.directory, f"{job.id}.{EXPORT_FORMATS[job.kind][2]}")
+            await asyncio.to_thread(shutil.move, tmp, path)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.exception("[Exports] Job %s failed: %s", job.id, exc)
+            job.status = "failed"
+            job.error = str(exc)
+        else:
+            job.path = path
+            job.size = os.path.getsize(path)
+            job.status = "done"
+            logger.info("[Exports] Job %s (%s) done in %.2fs, %d bytes",
+                        job.id, job.kind, time.perf_counter() - started, job.size)
+
+        job.finished_at = datetime.now(timezone.utc)
+        job._expires_at = time.monotonic() + self.ttl_seconds
+
+    # ---------------------------------------------------------
+    # TTL EVICTION
+    # ---------------------------------------------------------
+    def _sweep(self):
+        now = time.monotonic()
+        for job in list(self._jobs.values()):
+            if job._expires_at is not None and job._expires_at <= now:
+                self._forget(job)
+
+    async def _sweeper(self):
+        while True:
+            await asyncio.sleep(self.sweep_seconds)
+            self._sweep()
+            owned = {job.path for job in self._jobs.values() if job.path}
+            try:
+                await asyncio.to_thread(self._purge_files, owned)
+            except OSError as exc:
+                logger.warning("[Exports] Purging %s failed: %s", self.directory, exc)
+
+    def _purge_files(self, owned: set):
+        # Only files older than the TTL: those are expired whichever process
+        # wrote them, so workers sharing the directory keep their live files
+        cutoff = time.time() - self.ttl_seconds
+        purged = 0
+        for entry in os.scandir(self.directory):
+            if entry.path in owned:
+                continue
+            try:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+                    purged += 1
+            except FileNotFoundError:
+                pass
+        if purged:
+            logger.info("[Exports] Purged %d stale files from %s", purged, self.directory)
+
+    def _forget(self, job: ExportJob):
+        self._jobs.pop(job.id, None)
+        if self._by_key.get(job.key) == job.id:
+            del self._by_key[job.key]
+        if job.path:
+            try:
+                # an open download keeps reading through its handle
+                os.unlink(job.path)
+            except FileNotFoundError:
+                pass
+
+
+export_jobs = ExportJobManager()
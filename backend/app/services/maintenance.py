@@ -0,0 +1,84 @@
+"""Periodic database maintenance, on in every deployment.
+
+Every RECONCILE_INTERVAL_SECONDS the process holding the maintenance
+advisory lock (one per cluster) runs:
+
+* reconcile_registered_counts(): fixes registered_count drift on recent events
+* prune_sync_keys(): expires old offline check-in keys
+* collect_media_blobs(): deletes blobs whose media rows are gone (e.g. by
+  ON DELETE CASCADE from events)
+
+This runs on its own timer, started with the app, whether or not the
+recurrence worker (ENABLE_RECURRENCE_WORKER) is enabled. The first round
+runs at start.
+"""
+import os
+import asyncio
+import logging
+from typing import Optional
+
+from app.crud.attendance import prune_sync_keys
+from app.database.session import AsyncSessionLocal
+from app.services.advisory_lock import AdvisoryLock
+from app.services.media_service import collect_media_blobs
+from app.services.occupancy import reconcile_registered_counts
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_INTERVAL_SECONDS = int(os.getenv("RECONCILE_INTERVAL_SECONDS", 3600))
+
+# pg_advisory_lock key shared by every process of this app
+MAINTENANCE_LOCK_KEY = int(os.getenv("MAINTENANCE_LOCK_KEY", 7_402_511_024))
+
+
+class MaintenanceRunner:
+    def __init__(self, interval_seconds: int = RECONCILE_INTERVAL_SECONDS, lock_key: int = MAINTENANCE_LOCK_KEY):
+        self.interval_seconds = interval_seconds
+        self._lock = AdvisoryLock(lock_key, "maintenance")
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+            logger.info("[Maintenance] Timer started (every %ds)", self.interval_seconds)
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        await self._lock.release()
+
+    async def run_once(self) -> bool:
+        """One maintenance round; False when another process holds the lock."""
+        if not await self._lock.acquire():
+            return False
+        try:
+            drifted = await reconcile_registered_counts()
+            if drifted:
+                logger.warning("[Maintenance] Fixed registered_count drift on %d events", len(drifted))
+            async with AsyncSessionLocal() as session:
+                pruned = await prune_sync_keys(session)
+                collected = await collect_media_blobs(session)
+            if pruned:
+                logger.info("[Maintenance] Expired %d offline check-in keys", pruned)
+            if collected:
+                logger.info("[Maintenance] Deleted %d unreferenced media blobs", collected)
+        except Exception:
+            # the lock connection may be broken: step down, retry next round
+            await self._lock.release()
+            raise
+        return True
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.exception("[Maintenance] Round failed: %s", exc)
+            await asyncio.sleep(self.interval_seconds)
+
+
+maintenance = MaintenanceRunner()
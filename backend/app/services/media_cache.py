@@ -0,0 +1,174 @@
+"""On-disk LRU cache of media objects for GET /api/media/{id}/raw.
+
+Objects are fetched from storage once per process and kept in
+MEDIA_CACHE_DIR under a byte budget (MEDIA_CACHE_MAX_BYTES); the least
+recently served files are deleted first. A storage key never changes
+content (every upload gets new keys), so cached files are not revalidated
+against storage; they leave the cache through eviction or the TTL. The
+index is rebuilt from the directory on first use, so a restart starts warm.
+
+Files are sent with FileResponse: HEAD, Range and If-Range come with it, and
+on servers that offer the http.response.pathsend extension the file is
+handed to the server to send zero-copy. A file evicted while a response is
+still sending it is deleted when that response finishes.
+"""
+import os
+import asyncio
+import hashlib
+import logging
+import tempfile
+from datetime import datetime
+from typing import Awaitable, Callable, Hashable, Optional, Tuple
+
+from starlette.responses import FileResponse
+
+from app.core.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+MEDIA_CACHE_DIR = os.getenv("MEDIA_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "media-cache")
+MEDIA_CACHE_MAX_BYTES = int(os.getenv("MEDIA_CACHE_MAX_BYTES", 512 * 1024 * 1024))  # 512 MB
+MEDIA_CACHE_TTL_SECONDS = int(os.getenv("MEDIA_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+
+
+def object_digest(key: str) -> str:
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+class _PinnedFileResponse(FileResponse):
+    def __init__(self, cache: "MediaDiskCache", path: str, **kwargs):
+        super().__init__(path, **kwargs)
+        self._cache = cache
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._cache._release(self.path)
+
+
+class MediaDiskCache(TTLCache):
+    """TTLCache of files: keys are paths in the cache directory, values are
+    their os.stat_result, sizes are file sizes, and a dropped entry deletes
+    its file (once no response is sending it)."""
+
+    def __init__(self, directory: str, max_bytes: int, ttl_seconds: float):
+        super().__init__(max_bytes, ttl_seconds)
+        self.directory = directory
+        self._locks: dict = {}
+        # path -> number of responses sending it
+        self._pins: dict = {}
+        # evicted (or too large to keep) while pinned: deleted on release
+        self._doomed: set = set()
+        self._loaded = False
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, object_digest(key) + os.path.splitext(key)[1])
+
+    # ---------------------------------------------------------
+    # FILES
+    # ---------------------------------------------------------
+    def _unlink(self, path: str):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+    def _drop(self, key: Hashable):
+        super()._drop(key)
+        if key in self._pins:
+            self._doomed.add(key)
+        else:
+            self._unlink(key)
+
+    def _release(self, path: str):
+        remaining = self._pins.pop(path) - 1
+        if remaining:
+            self._pins[path] = remaining
+        elif path in self._doomed:
+            self._doomed.discard(path)
+            self._unlink(path)
+
+    def _scan(self) -> list:
+        os.makedirs(self.directory, exist_ok=True)
+        found = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".tmp"):
+                self._unlink(entry.path)  # left by a crash mid-write
+            elif entry.is_file():
+                st = entry.stat()
+                found.append((st.st_atime, entry.path, st))
+        found.sort()
+        return found
+
+    def _write(self, path: str, data: bytes, modified: Optional[datetime]) -> os.stat_result:
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        if modified is not None:
+            # Last-Modified is the file's mtime: make it the upload time, the
+            # same in every process
+            ts = modified.timestamp()
+            os.utime(tmp, (ts, ts))
+        os.replace(tmp, path)
+        return os.stat(path)
+
+    async def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        found = await asyncio.to_thread(self._scan)
+        for _, path, st in found:
+            if path not in self._entries:
+                self.put(path, st, size=st.st_size)
+        logger.info("[MediaCache] %d files (%d bytes) in %s", len(self._entries), self.size, self.directory)
+
+    # ---------------------------------------------------------
+    # API
+    # ---------------------------------------------------------
+    async def get_or_fetch(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Optional[bytes]]],
+        modified: Optional[datetime] = None,
+    ) -> Optional[Tuple[str, os.stat_result]]:
+        """(path, stat) of the cached copy of a storage object, fetching it
+        on a miss; None if fetch() finds nothing. Concurrent misses for the
+        same key fetch once."""
+        await self._ensure_loaded()
+        path = self.path_for(key)
+
+        # [lock, number of requests using it]
+        entry = self._locks.setdefault(path, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                st = self.get(path)
+                if st is not None:
+                    return path, st
+
+                data = await fetch()
+                if data is None:
+                    return None
+                st = await asyncio.to_thread(self._write, path, data, modified)
+                # rewritten under the same name: a pinned response for the
+                # old entry must not delete it
+                self._doomed.discard(path)
+                if st.st_size > self.max_bytes:
+                    self._doomed.add(path)  # serve it once, do not keep it
+                else:
+                    self.put(path, st, size=st.st_size)
+                return path, st
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                self._locks.pop(path, None)
+
+    def response(self, path: str, st: os.stat_result, media_type: Optional[str], headers: dict) -> FileResponse:
+        """FileResponse for a path returned by get_or_fetch(), keeping the file
+        on disk until it has been sent."""
+        self._pins[path] = self._pins.get(path, 0) + 1
+        return _PinnedFileResponse(self, path, stat_result=st, media_type=media_type, headers=headers)
+
+
+media_cache = MediaDiskCache(MEDIA_CACHE_DIR, MEDIA_CACHE_MAX_BYTES, MEDIA_CACHE_TTL_SECONDS)
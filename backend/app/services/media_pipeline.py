@@ -0,0 +1,203 @@
+"""Off-loop processing for media uploads.
+
+An upload goes through two steps, neither of which blocks the event loop:
+
+* read_upload() reads the uploaded file in MEDIA_CHUNK_BYTES chunks and
+  stops as soon as it passes MAX_MEDIA_BYTES. The declared content type and
+  the file's magic bytes must both be in ALLOWED_MIME. By then Starlette
+  has spooled the multipart body, so the request body itself is capped
+  before parsing by routes.media.MediaUploadRoute.
+* process_image() decodes the image once and encodes every rendition
+  (full, card, thumb; WebP and JPEG) in a process pool
+  (MEDIA_PROCESS_WORKERS). Large JPEGs are decoded at reduced scale with
+  Image.draft, so a 24 MP photo never materializes at full size.
+
+Storing the result is async I/O, see services.storage.
+
+encode_renditions() is a plain function of bytes so it can be pickled to the
+worker processes; it must not touch the app's clients or DB state.
+"""
+import io
+import os
+import hashlib
+import asyncio
+import logging
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from fastapi import HTTPException
+from PIL import Image, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+MAX_MEDIA_BYTES = int(os.getenv("MAX_MEDIA_BYTES", 4 * 1024 * 1024))  # 4 MB default
+ALLOWED_MIME = {"image/jpeg", "image/png", "image/webp"}
+
+MEDIA_CHUNK_BYTES = int(os.getenv("MEDIA_CHUNK_BYTES", 64 * 1024))
+MEDIA_PROCESS_WORKERS = int(os.getenv("MEDIA_PROCESS_WORKERS", min(2, os.cpu_count() or 1)))
+# longest side of each stored rendition; larger images are scaled down
+MEDIA_MAX_DIMENSION = int(os.getenv("MEDIA_MAX_DIMENSION", 2560))
+MEDIA_CARD_DIMENSION = int(os.getenv("MEDIA_CARD_DIMENSION", 800))
+MEDIA_THUMB_DIMENSION = int(os.getenv("MEDIA_THUMB_DIMENSION", 320))
+MEDIA_JPEG_QUALITY = int(os.getenv("MEDIA_JPEG_QUALITY", 85))
+MEDIA_WEBP_QUALITY = int(os.getenv("MEDIA_WEBP_QUALITY", 80))
+# decoded size limit: a few MB of compressed PNG can expand to gigabytes
+MEDIA_MAX_PIXELS = int(os.getenv("MEDIA_MAX_PIXELS", 50_000_000))
+
+
+# ---------------------------------------------------------
+# UPLOAD CHECKS
+# ---------------------------------------------------------
+def sniff_mime(head: bytes) -> Optional[str]:
+    """Image type from the first bytes of a file, None if not recognized."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+async def read_upload(file, max_bytes: int = MAX_MEDIA_BYTES, allowed=ALLOWED_MIME) -> bytes:
+    """Read a (spooled) UploadFile chunk by chunk, rejecting it (413/415) as
+    soon as it is too large or not an allowed image; no more than max_bytes
+    + one chunk is ever held in memory."""
+    if file.content_type not in allowed:
+        raise HTTPException(415, f"Unsupported media type: {file.content_type}")
+
+    buf = bytearray()
+    while True:
+        chunk = await file.read(MEDIA_CHUNK_BYTES)
+        if not chunk:
+            break
+        buf += chunk
+        if len(buf) > max_bytes:
+            raise HTTPException(413, f"File exceeds {max_bytes} bytes")
+
+    if not buf:
+        raise HTTPException(400, "Empty file")
+    if sniff_mime(bytes(buf[:12])) not in allowed:
+        raise HTTPException(415, "File content is not an allowed image type")
+    return bytes(buf)
+
+
+# ---------------------------------------------------------
+# IMAGE PROCESSING (runs in worker processes)
+# ---------------------------------------------------------
+# (name, longest side), largest first: each rendition is scaled down from
+# the previous one instead of from the decoded original
+RENDITIONS = (
+    ("full", MEDIA_MAX_DIMENSION),
+    ("card", MEDIA_CARD_DIMENSION),
+    ("thumb", MEDIA_THUMB_DIMENSION),
+)
+# format -> (Pillow format, content type, extension)
+RENDITION_FORMATS = {
+    "webp": ("WEBP", "image/webp", "webp"),
+    "jpeg": ("JPEG", "image/jpeg", "jpg"),
+}
+
+
+def _encode(img: Image.Image, fmt: str, jpeg_quality: int, webp_quality: int) -> bytes:
+    out = io.BytesIO()
+    if fmt == "webp":
+        img.save(out, format="WEBP", quality=webp_quality, method=4)
+    else:
+        img.save(out, format="JPEG", quality=jpeg_quality, optimize=True, progressive=True)
+    return out.getvalue()
+
+
+def decode_scaled(data: bytes, largest: int, max_pixels: int = MEDIA_MAX_PIXELS) -> Image.Image:
+    """Decode to RGB, at reduced scale when the image is a JPEG whose longest
+    side is over largest (never below largest)."""
+    img = Image.open(io.BytesIO(data))
+    if img.width * img.height > max_pixels:
+        raise ValueError(f"Image is too large ({img.width}x{img.height})")
+
+    longest = max(img.size)
+    if img.format == "JPEG" and longest > largest:
+        # let the JPEG decoder scale down by 1/2, 1/4 or 1/8 while decoding;
+        # draft never goes below the requested size in either dimension, so
+        # ask for the full rendition's own size (a square box would hold a
+        # 3:2 photo at full size)
+        img.draft("RGB", (img.width * largest // longest, img.height * largest // longest))
+    return img.convert("RGB")
+
+
+def encode_renditions(data: bytes, renditions=RENDITIONS, jpeg_quality: int = MEDIA_JPEG_QUALITY,
+                      webp_quality: int = MEDIA_WEBP_QUALITY, max_pixels: int = MEDIA_MAX_PIXELS) -> tuple:
+    """Decode once and encode every rendition in every RENDITION_FORMATS.
+
+    Returns (content_hash, renditions): the sha256 of the normalized
+    full-size pixels, which is the same for every file that decodes to the
+    same image, and dicts with name, format, width, height and data. A
+    rendition that would not be smaller than the previous one (small source
+    image) is skipped, so the list always starts with "full"."""
+    img = decode_scaled(data, renditions[0][1], max_pixels)
+
+    results = []
+    content_hash = None
+    previous = None
+    for name, dimension in renditions:
+        if max(img.size) > dimension:
+            img.thumbnail((dimension, dimension))
+        if content_hash is None:
+            content_hash = hashlib.sha256(b"%dx%d:" % img.size + img.tobytes()).digest()
+        if img.size == previous:
+            continue
+        previous = img.size
+        for fmt in RENDITION_FORMATS:
+            results.append({
+                "name": name,
+                "format": fmt,
+                "width": img.width,
+                "height": img.height,
+                "data": _encode(img, fmt, jpeg_quality, webp_quality),
+            })
+    return content_hash, results
+
+
+# ---------------------------------------------------------
+# EXECUTORS
+# ---------------------------------------------------------
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        # spawn: forking a process that runs an event loop and DB pool threads
+        # can copy held locks into the child
+        _process_pool = ProcessPoolExecutor(
+            max_workers=MEDIA_PROCESS_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _process_pool
+
+
+async def process_image(data: bytes, **options) -> tuple:
+    """encode_renditions() in the process pool; undecodable images raise 400."""
+    global _process_pool
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(
+            _get_process_pool(), functools.partial(encode_renditions, data, **options)
+        )
+    except BrokenProcessPool:
+        # a worker died (e.g. killed for memory); start a fresh pool next time
+        logger.error("[Media] Process pool broken, restarting")
+        _process_pool = None
+        raise HTTPException(500, "Image processing failed")
+    except (UnidentifiedImageError, Image.DecompressionBombError, ValueError, OSError) as exc:
+        raise HTTPException(400, f"Invalid image: {exc}")
+
+
+def shutdown():
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
@@ -1,90 +1,231 @@
-import io
-import uuid
 import os
-from PIL import Image, UnidentifiedImageError
-from supabase import create_client, Client
+import asyncio
+import hashlib
+import mimetypes
+from datetime import datetime
+from typing import NamedTuple, Optional
+from sqlalchemy import select, delete, literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import selectinload
 from app.models.event_media import EventMedia
+from app.models.event_media_variant import EventMediaVariant
+from app.models.media_blob import MediaBlob
+from app.services import media_pipeline
+from app.services.media_pipeline import MAX_MEDIA_BYTES, ALLOWED_MIME
+from app.services.storage import get_storage
+from app.core.cache import TTLCache, table_version
 from sqlalchemy.ext.asyncio import AsyncSession
 
-# config via env (adjust in your .env)
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
-SUPABASE_BUCKET = os.getenv("SUPABASE_BUCKET", "event-banners")
-SUPABASE_PUBLIC = os.getenv("SUPABASE_PUBLIC", "false").lower() == "true"
-
-# limits
-MAX_MEDIA_BYTES = int(os.getenv("MAX_MEDIA_BYTES", 4 * 1024 * 1024))  # 4 MB default
-ALLOWED_MIME = {"image/jpeg", "image/png", "image/webp"}
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+MEDIA_LOOKUP_MAX_ENTRIES = int(os.getenv("MEDIA_LOOKUP_MAX_ENTRIES", 10000))
+MEDIA_LOOKUP_TTL_SECONDS = int(os.getenv("MEDIA_LOOKUP_TTL_SECONDS", 300))
+
+
+# ---------------------------------------------------------
+# CONTENT-ADDRESSED BLOBS
+# ---------------------------------------------------------
+# Uploads are stored once per distinct image under blobs/<content hash>/,
+# whatever event they belong to. Each EventMedia points at its blob and
+# gets its own copy of the rendition rows (srcset); media_blobs.ref_count
+# counts the EventMedia rows (trigger), and a blob's objects are deleted
+# when it drops to zero.
+
+def _blob_key(content_hash: bytes, name: str, ext: str) -> str:
+    digest = content_hash.hex()
+    return f"blobs/{digest[:2]}/{digest}/{name}.{ext}"
+
+
+async def _find_blob(session: AsyncSession, column, digest: bytes):
+    # FOR SHARE: a concurrent collect_media_blobs() either deleted the row
+    # already (no match) or waits until our EventMedia has raised ref_count
+    return (
+        await session.execute(
+            select(MediaBlob.id, MediaBlob.renditions)
+            .where(column == digest)
+            .limit(1)
+            .with_for_update(read=True)
+        )
+    ).first()
+
+
+async def _store_blob(session: AsyncSession, storage, content_hash: bytes, source_hash: bytes, renditions: list):
+    records = []
+    for r in renditions:
+        ext = media_pipeline.RENDITION_FORMATS[r["format"]][2]
+        records.append({
+            "name": r["name"],
+            "format": r["format"],
+            "width": r["width"],
+            "height": r["height"],
+            "size_bytes": len(r["data"]),
+            "key": _blob_key(content_hash, r["name"], ext),
+        })
+
+    # A concurrent upload of the same image waits here on the conflicting
+    # row until we commit, then reuses it
+    stmt = pg_insert(MediaBlob).values(content_hash=content_hash, source_hash=source_hash, renditions=records)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[MediaBlob.content_hash],
+        set_={"content_hash": stmt.excluded.content_hash},
+    ).returning(MediaBlob.id, MediaBlob.renditions, literal_column("xmax = 0").label("inserted"))
+    blob = (await session.execute(stmt)).one()
+    if not blob.inserted:
+        return blob
+
+    # Upload all renditions at once; on any failure remove the ones that made it
+    results = await asyncio.gather(*(
+        storage.put(rec["key"], r["data"], media_pipeline.RENDITION_FORMATS[r["format"]][1])
+        for rec, r in zip(records, renditions)
+    ), return_exceptions=True)
+    failed = [res for res in results if isinstance(res, BaseException)]
+    if failed:
+        await session.rollback()
+        uploaded = [rec["key"] for rec, res in zip(records, results) if not isinstance(res, BaseException)]
+        await storage.delete(uploaded)
+        raise failed[0]
+    return blob
+
+
+async def collect_media_blobs(session: AsyncSession, blob_ids=None) -> int:
+    """Delete unreferenced blobs (all, or those in blob_ids) and their
+    objects. Objects are removed before the rows are committed, so an upload
+    waiting on one of these rows never gets a blob whose files are gone."""
+    storage = get_storage()
+    stmt = delete(MediaBlob).where(MediaBlob.ref_count == 0)
+    if blob_ids is not None:
+        stmt = stmt.where(MediaBlob.id.in_(blob_ids))
+    collected = (await session.execute(stmt.returning(MediaBlob.renditions))).scalars().all()
+
+    keys = [r["key"] for renditions in collected for r in renditions]
+    try:
+        await storage.delete(keys)
+    except Exception:
+        await session.rollback()
+        raise
+    await session.commit()
+    return len(collected)
 
 
+# ---------------------------------------------------------
+# UPLOAD / DELETE
+# ---------------------------------------------------------
 async def upload_media(session: AsyncSession, file, event_id: str):
-    import io
-    from PIL import Image
-
-    content = await file.read()
+    storage = get_storage()
 
-    # Open + compress
-    img = Image.open(io.BytesIO(content)).convert("RGB")
-    compressed_bytes = io.BytesIO()
-    img.save(compressed_bytes, format="JPEG", optimize=True, quality=85)
-    compressed_bytes.seek(0)
+    # Read with size/type limits (the body was capped before parsing)
+    content = await media_pipeline.read_upload(file, MAX_MEDIA_BYTES, ALLOWED_MIME)
+    source_hash = hashlib.sha256(content).digest()
 
-    file_id = str(uuid.uuid4())
-    file_path = f"events/{event_id}/media/{file_id}.jpg"   # recommended path
+    # Same file uploaded before: no decoding, no encoding, no upload
+    blob = await _find_blob(session, MediaBlob.source_hash, source_hash)
+    if blob is None:
+        # end the (lock-free) read transaction: no connection held while encoding
+        await session.commit()
+        content_hash, renditions = await media_pipeline.process_image(content)
 
-    # Upload to Supabase
-    result = supabase.storage.from_(SUPABASE_BUCKET).upload(
-        file_path,
-        compressed_bytes.getvalue(),
-        file_options={"content-type": "image/jpeg"}
-    )
-
-    # Check result
-    if hasattr(result, "error") and result.error:
-        raise Exception(result.error.message)
-    if isinstance(result, dict) and "error" in result:
-        raise Exception(result["error"]["message"])
+        # Same image in a different file (re-saved, other metadata): the
+        # encodes are dropped and nothing is uploaded
+        blob = await _find_blob(session, MediaBlob.content_hash, content_hash)
+        if blob is None:
+            blob = await _store_blob(session, storage, content_hash, source_hash, renditions)
 
-    # Build public URL
-    file_url = (
-        f"{SUPABASE_URL}/storage/v1/object/public/"
-        f"{SUPABASE_BUCKET}/{file_path}"
-    )
+    # file_url stays the full-size JPEG for clients that ignore variants
+    full_jpeg = next(r for r in blob.renditions if r["name"] == "full" and r["format"] == "jpeg")
 
-    # DB save
+    # DB save (the ref_count trigger takes the reference)
     media = EventMedia(
         event_id=event_id,
-        file_url=file_url,
-        file_type="banner"
+        file_url=storage.public_url(full_jpeg["key"]),
+        file_type="banner",
+        blob_id=blob.id,
+        variants=[
+            EventMediaVariant(
+                name=r["name"],
+                format=r["format"],
+                width=r["width"],
+                height=r["height"],
+                size_bytes=r["size_bytes"],
+                file_url=storage.public_url(r["key"]),
+            )
+            for r in blob.renditions
+        ],
     )
     session.add(media)
     await session.commit()
-    await session.refresh(media)
+    await session.refresh(media, ["uploaded_at"])
 
     return media
 
 async def delete_media(session: AsyncSession, media_id: str):
     """
-    Delete DB record and remove object in Supabase.
+    Delete DB record; its stored objects go with the last reference.
     """
-    media = await session.get(EventMedia, media_id)
+    storage = get_storage()
+    media = await session.get(EventMedia, media_id, options=[selectinload(EventMedia.variants)])
     if not media:
         return False
 
-    # Extract object path from our storage path structure
-    # If public URL format: .../{bucket}/events/{event_id}/media/{uuid}.jpg
-    # We want events/{event_id}/media/{uuid}.jpg
-    # This split is tolerant if you change domain.
-    try:
-        bucket_key = media.file_url.split(f"{SUPABASE_BUCKET}/")[-1]
-    except Exception:
-        bucket_key = None
-
-    if bucket_key:
-        supabase.storage.from_(SUPABASE_BUCKET).remove([bucket_key])
+    blob_id = media.blob_id
+    if blob_id is None:
+        # uploaded before deduplication: the objects belong to this media alone;
+        # URLs of another store (e.g. written before a backend switch) are left alone
+        urls = {media.file_url, *(v.file_url for v in media.variants)}
+        keys = [key for key in (storage.key_for_url(url) for url in urls if url) if key]
+        await storage.delete(keys)
 
     await session.delete(media)
     await session.commit()
-    return True
\ No newline at end of file
+
+    if blob_id is not None:
+        await collect_media_blobs(session, [blob_id])
+    return True
+
+
+# ---------------------------------------------------------
+# SERVING (GET /api/media/{id}/raw)
+# ---------------------------------------------------------
+# requested variant -> variants tried in order: a small source image has no
+# separate card/thumb rendition
+VARIANT_FALLBACK = {
+    "thumb": ("thumb", "card", "full"),
+    "card": ("card", "full"),
+    "full": ("full",),
+}
+
+
+class MediaObject(NamedTuple):
+    key: Optional[str]  # None: the URL is not in our store
+    url: str
+    content_type: Optional[str]
+    modified: Optional[datetime]
+
+
+# (media, variant, format, event_media version) -> MediaObject; sizes count
+# entries. Writes in this process (deletes) are seen at once, other
+# processes' after MEDIA_LOOKUP_TTL_SECONDS.
+_lookup_cache = TTLCache(MEDIA_LOOKUP_MAX_ENTRIES, MEDIA_LOOKUP_TTL_SECONDS)
+
+
+async def resolve_media_object(session: AsyncSession, media_id, variant: str, fmt: str) -> Optional[MediaObject]:
+    cache_key = (str(media_id), variant, fmt, table_version("event_media"))
+    found = _lookup_cache.get(cache_key)
+    if found is not None:
+        return found
+
+    media = await session.get(EventMedia, media_id, options=[selectinload(EventMedia.variants)])
+    # end the read transaction: callers go on to fetch from storage, which
+    # must not hold it open (idle_in_transaction_session_timeout)
+    await session.commit()
+    if media is None:
+        return None
+
+    by_name = {v.name: v for v in media.variants if v.format == fmt}
+    chosen = next((by_name[name] for name in VARIANT_FALLBACK[variant] if name in by_name), None)
+    if chosen is not None:
+        url, content_type = chosen.file_url, media_pipeline.RENDITION_FORMATS[fmt][1]
+    else:
+        # uploaded before renditions existed
+        url, content_type = media.file_url, mimetypes.guess_type(media.file_url)[0]
+
+    found = MediaObject(get_storage().key_for_url(url), url, content_type, media.uploaded_at)
+    _lookup_cache.put(cache_key, found, size=1)
+    return found
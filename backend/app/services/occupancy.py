@@ -0,0 +1,65 @@
+import os
+import logging
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, update, func, or_
+from app.models.event import Event
+from app.models.participant import Participant
+from app.database.session import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+# A pass checks events dated from this long ago on (upcoming ones, where
+# registrations happen) and events edited within it; older events are only
+# checked with all_events=True
+RECONCILE_LOOKBACK_HOURS = int(os.getenv("RECONCILE_LOOKBACK_HOURS", 48))
+
+
+async def reconcile_registered_counts(fix: bool = True, all_events: bool = False):
+    """Compare events.registered_count with the real participant counts.
+
+    The counter is maintained by a trigger, so drift means someone bypassed
+    it (manual SQL with triggers disabled, a restore, ...). Returns the
+    drifted (event_id, stored, actual) rows; with fix=True they are also
+    corrected. Only recent and upcoming events are counted unless
+    all_events is set, so a pass does not grow with the event history.
+    """
+    events = select(Event.id)
+    if not all_events:
+        since = datetime.now(timezone.utc) - timedelta(hours=RECONCILE_LOOKBACK_HOURS)
+        events = events.where(or_(Event.event_date >= since, Event.updated_at >= since))
+    events = events.subquery("checked")
+
+    actual = (
+        select(events.c.id.label("event_id"), func.count(Participant.id).label("n"))
+        .outerjoin(Participant, Participant.event_id == events.c.id)
+        .group_by(events.c.id)
+        .subquery("actual")
+    )
+
+    async with AsyncSessionLocal() as session:
+        drifted = (
+            await session.execute(
+                select(Event.id, Event.registered_count, actual.c.n)
+                .join(actual, actual.c.event_id == Event.id)
+                .where(Event.registered_count != actual.c.n)
+            )
+        ).all()
+
+        if fix and drifted:
+            # recomputed in the UPDATE itself, so it is exact even if more
+            # registrations landed since the check above
+            await session.execute(
+                update(Event)
+                .where(Event.id == actual.c.event_id, Event.registered_count != actual.c.n)
+                .values(registered_count=actual.c.n)
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+
+    for event_id, stored, real in drifted:
+        logger.warning(
+            "[Occupancy] event %s registered_count drift: stored=%s actual=%s%s",
+            event_id, stored, real, " (fixed)" if fix else "",
+        )
+
+    return drifted
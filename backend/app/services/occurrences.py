@@ -0,0 +1,413 @@
+"""Virtual (read-time) recurrence occurrences.
+
+With RECURRENCE_MODE=virtual the worker no longer inserts occurrences.
+Listings expand the active Recurrence rules on the fly and merge the
+results with the stored events. An occurrence becomes a real events row
+only when something needs one: registration, attendance, or an edit
+(see materialize_event_id).
+
+A virtual occurrence id is "rec-<recurrence uuid>-<UTC timestamp>". Stored
+occurrences carry (recurrence_id, recurrence_date), and that pair hides the
+virtual occurrence for the same rule slot, even after a reschedule.
+"""
+import os
+from datetime import datetime, timedelta, timezone
+from heapq import merge
+from itertools import islice
+from typing import Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import select, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.search import search_query
+from app.models.event import Event
+from app.models.recurrence import Recurrence
+from app.core.cache import TTLCache
+from app.core.pagination import split_page
+from app.services.rrule import Rule, rule_from_recurrence, expand, expand_all
+
+# "materialized" (default): the worker inserts occurrences up to the horizon
+# "virtual": occurrences are expanded at read time, see module docstring
+RECURRENCE_MODE = os.getenv("RECURRENCE_MODE", "materialized").lower()
+VIRTUAL_OCCURRENCES = RECURRENCE_MODE == "virtual"
+
+# Number of (rule, month) expansions kept in memory
+OCCURRENCE_CACHE_SIZE = int(os.getenv("OCCURRENCE_CACHE_SIZE", 8192))
+
+# How far an open-ended listing (no end_date) looks for occurrences of a rule
+VIRTUAL_LOOKAHEAD_MONTHS = int(os.getenv("VIRTUAL_LOOKAHEAD_MONTHS", 24))
+
+VIRTUAL_ID_PREFIX = "rec-"
+_STAMP = "%Y%m%dT%H%M%S%f"
+_TICK = timedelta(microseconds=1)
+
+
+def _not_found():
+    return HTTPException(
+        status_code=404,
+        detail={"code": "EVENT_NOT_FOUND", "message": "Event tidak ditemukan"},
+    )
+
+
+# ---------------------------------------------------------
+# IDS
+# ---------------------------------------------------------
+def virtual_id(recurrence_id, when: datetime) -> str:
+    return f"{VIRTUAL_ID_PREFIX}{recurrence_id}-{when.astimezone(timezone.utc).strftime(_STAMP)}"
+
+
+def is_virtual_id(value) -> bool:
+    return isinstance(value, str) and value.startswith(VIRTUAL_ID_PREFIX)
+
+
+def parse_virtual_id(value: str) -> Tuple[UUID, datetime]:
+    try:
+        recurrence_id, stamp = value[len(VIRTUAL_ID_PREFIX):].rsplit("-", 1)
+        return UUID(recurrence_id), datetime.strptime(stamp, _STAMP).replace(tzinfo=timezone.utc)
+    except ValueError:
+        raise _not_found()
+
+
+def parse_event_id(value: str):
+    """Id parser for cursors: UUID for stored events, str for virtual ones."""
+    if is_virtual_id(value):
+        parse_virtual_id(value)
+        return value
+    return UUID(value)
+
+
+def sort_key(row) -> Tuple[datetime, str]:
+    # Matches ORDER BY event_date, id: uuid order is the order of its
+    # canonical hex string, and "rec-..." sorts after any hex digit.
+    return row.event_date, str(row.id)
+
+
+# ---------------------------------------------------------
+# EXPANSION (memoized per rule and calendar month)
+# ---------------------------------------------------------
+def _next_month(year: int, month: int) -> Tuple[int, int]:
+    return (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+# (recurrence id, year, month, updated_at) -> occurrences; editing a rule
+# bumps updated_at, so stale months are never read again and age out
+_month_cache = TTLCache(OCCURRENCE_CACHE_SIZE, float("inf"))
+
+
+def _month_window(year: int, month: int) -> Tuple[datetime, datetime]:
+    start = datetime(year, month, 1, tzinfo=timezone.utc)
+    end = datetime(*_next_month(year, month), 1, tzinfo=timezone.utc)
+    return start - _TICK, end - _TICK
+
+
+def month_occurrences(
+    recurrence_id: UUID, year: int, month: int, updated_at: Optional[datetime], rule: Rule
+) -> Tuple[datetime, ...]:
+    """Occurrences of one rule in one UTC calendar month."""
+    key = (recurrence_id, year, month, updated_at)
+    found = _month_cache.get(key)
+    if found is None:
+        found = tuple(expand(rule, *_month_window(year, month)))
+        _month_cache.put(key, found, size=1)
+    return found
+
+
+def prefetch_months(slots: List[Tuple[UUID, Optional[datetime], Rule, int, int]]):
+    """Expand the (recurrence id, updated_at, rule, year, month) slots that
+    are not cached yet in one expand_all() pass."""
+    missing = [
+        slot for slot in slots
+        if _month_cache.get((slot[0], slot[3], slot[4], slot[1])) is None
+    ]
+    expanded = expand_all((rule, *_month_window(year, month)) for _, _, rule, year, month in missing)
+    for (recurrence_id, updated_at, _, year, month), found in zip(missing, expanded):
+        _month_cache.put((recurrence_id, year, month, updated_at), tuple(found), size=1)
+
+
+def _first_month_start(rule: Rule, after: datetime) -> datetime:
+    return max(after, rule.dtstart - _TICK).astimezone(timezone.utc)
+
+
+def iter_rule_occurrences(
+    recurrence_id: UUID,
+    updated_at: Optional[datetime],
+    rule: Rule,
+    after: datetime,
+    end: Optional[datetime] = None,
+) -> Iterator[datetime]:
+    """Occurrences with after < o <= end, read month by month from the cache."""
+    first = _first_month_start(rule, after)
+    year, month = first.year, first.month
+
+    last = end
+    if last is None:
+        months = first.month - 1 + VIRTUAL_LOOKAHEAD_MONTHS
+        last = first.replace(year=first.year + months // 12, month=months % 12 + 1, day=1)
+    if rule.until is not None:
+        last = min(last, rule.until)
+    last = last.astimezone(timezone.utc)
+
+    while (year, month) <= (last.year, last.month):
+        for occurrence in month_occurrences(recurrence_id, year, month, updated_at, rule):
+            if occurrence <= after:
+                continue
+            if occurrence > last:
+                return
+            yield occurrence
+        year, month = _next_month(year, month)
+
+
+# ---------------------------------------------------------
+# VIRTUAL ROWS
+# ---------------------------------------------------------
+class VirtualOccurrence:
+    """Stand-in for an events row that has not been materialized yet; has
+    the attributes EventOut and EventSummaryOut read."""
+
+    is_virtual = True
+    is_cancelled = False
+    registered_count = 0
+    participant_count = 0
+
+    def __init__(self, rule_row, when: datetime):
+        self.id = virtual_id(rule_row.recurrence_id, when)
+        self.recurrence_id = rule_row.recurrence_id
+        self.recurrence_date = when
+        self.series_id = rule_row.template_id
+        self.event_date = when
+        self.title = rule_row.title
+        self.description = rule_row.description
+        self.location = rule_row.location
+        self.requires_registration = rule_row.requires_registration
+        self.slots_available = rule_row.slots_available
+        self.slots_remaining = rule_row.slots_available
+        self.created_at = rule_row.created_at
+        self.updated_at = rule_row.updated_at
+        # generated occurrences never copy the template's media
+        self.media = []
+
+
+def _rules_query():
+    return (
+        select(
+            Recurrence.id.label("recurrence_id"),
+            Recurrence.updated_at.label("rule_updated_at"),
+            Recurrence.frequency,
+            Recurrence.start_date,
+            Recurrence.interval,
+            Recurrence.by_day,
+            Recurrence.day_of_month,
+            Recurrence.count,
+            Recurrence.repeat_until,
+            Event.id.label("template_id"),
+            Event.event_date.label("template_date"),
+            Event.title,
+            Event.description,
+            Event.location,
+            Event.requires_registration,
+            Event.slots_available,
+            Event.created_at,
+            Event.updated_at,
+        )
+        .join(Event, Event.id == Recurrence.event_id)
+        .where(Recurrence.active == True)
+    )
+
+
+def _iter_virtual(rule_row, rule: Rule, after: datetime, end: Optional[datetime]):
+    for when in iter_rule_occurrences(
+        rule_row.recurrence_id, rule_row.rule_updated_at, rule, after, end
+    ):
+        # the template itself is stored
+        if when != rule_row.template_date:
+            yield VirtualOccurrence(rule_row, when)
+
+
+async def _taken_slots(session: AsyncSession, batch: List[VirtualOccurrence]) -> set:
+    """(recurrence_id, recurrence_date) of the stored occurrences among the
+    slots of an (event_date-ordered) batch."""
+    stmt = select(Event.recurrence_id, Event.recurrence_date).where(
+        Event.recurrence_id.in_({o.recurrence_id for o in batch}),
+        Event.recurrence_date.between(batch[0].event_date, batch[-1].event_date),
+    )
+    return set((await session.execute(stmt)).all())
+
+
+async def list_virtual_occurrences(
+    session: AsyncSession,
+    q: Optional[str] = None,
+    upcoming: bool = False,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    after: Optional[Tuple[datetime, object]] = None,
+    limit: int = 50,
+) -> List[VirtualOccurrence]:
+    """First `limit` virtual occurrences after the keyset cursor `after`,
+    in (event_date, id) order, for the same filters as the event listing."""
+    bounds = [b for b in (start_date, after[0] if after else None) if b is not None]
+    if upcoming:
+        bounds.append(datetime.now(timezone.utc))
+    lower = max(bounds) if bounds else None
+
+    stmt = _rules_query()
+    if lower is not None:
+        stmt = stmt.where(or_(Recurrence.repeat_until.is_(None), Recurrence.repeat_until >= lower))
+    if end_date is not None:
+        stmt = stmt.where(Recurrence.start_date <= end_date)
+    if q:
+        stmt = stmt.where(Event.search_vector.op("@@")(search_query(q)))
+
+    rule_rows = (await session.execute(stmt)).all()
+    rules = []
+    for row in rule_rows:
+        try:
+            rule = rule_from_recurrence(row)
+        except ValueError:
+            continue
+        if rule is not None:
+            rules.append((row, rule))
+    if not rules:
+        return []
+
+    start_after = lower - _TICK if lower is not None else datetime.min.replace(tzinfo=timezone.utc)
+    # every stream is read from its first month on: expand those together
+    firsts = [(row, rule, _first_month_start(rule, start_after)) for row, rule in rules]
+    prefetch_months([
+        (row.recurrence_id, row.rule_updated_at, rule, first.year, first.month)
+        for row, rule, first in firsts
+    ])
+    streams = [_iter_virtual(row, rule, start_after, end_date) for row, rule in rules]
+    candidates = (
+        occurrence for occurrence in merge(*streams, key=sort_key)
+        if after is None or sort_key(occurrence) > (after[0], str(after[1]))
+    )
+
+    # Stored occurrences hide their virtual slot. They are looked up only for
+    # the slots of the page's candidates, in batches that double while
+    # stored slots leave the page short; never over every rule's full range.
+    page = []
+    batch_size = limit
+    while len(page) < limit:
+        batch = list(islice(candidates, batch_size))
+        if not batch:
+            break
+        taken = await _taken_slots(session, batch)
+        page.extend(o for o in batch if (o.recurrence_id, o.event_date) not in taken)
+        batch_size *= 2
+    return page[:limit]
+
+
+def merge_page(stored: list, virtual: list, limit: int) -> list:
+    """Merge two (event_date, id)-ordered lists and keep the first `limit`."""
+    return list(merge(stored, virtual, key=sort_key))[:limit]
+
+
+async def list_page(
+    session: AsyncSession,
+    list_rows,
+    q: Optional[str] = None,
+    upcoming: bool = False,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    after: Optional[Tuple[datetime, object]] = None,
+    limit: int = 50,
+) -> Tuple[list, Optional[str]]:
+    """One page of a stored-event listing (crud.event.list_event_rows or
+    list_event_summary_rows) and the cursor for the next page (or None).
+    With RECURRENCE_MODE=virtual, not-yet-stored occurrences are interleaved."""
+    rows = await list_rows(session, q, upcoming, start_date, end_date, after, limit)
+    if VIRTUAL_OCCURRENCES:
+        virtual = await list_virtual_occurrences(session, q, upcoming, start_date, end_date, after, limit + 1)
+        rows = merge_page(rows, virtual, limit + 1)
+    return split_page(rows, limit)
+
+
+# ---------------------------------------------------------
+# SINGLE OCCURRENCE / MATERIALIZATION
+# ---------------------------------------------------------
+async def _load_slot(session: AsyncSession, event_id: str):
+    """(rule row, occurrence date) for a virtual id; 404 unless the date is
+    really an occurrence of an active rule."""
+    recurrence_id, when = parse_virtual_id(event_id)
+
+    row = (
+        await session.execute(_rules_query().where(Recurrence.id == recurrence_id))
+    ).first()
+    if row is None:
+        raise _not_found()
+
+    try:
+        rule = rule_from_recurrence(row)
+    except ValueError:
+        rule = None
+    if rule is None or expand(rule, after=when - _TICK, end=when, limit=1) != [when]:
+        raise _not_found()
+
+    return row, when
+
+
+async def get_virtual_occurrence(session: AsyncSession, event_id: str):
+    """The stored event id for the slot if it has one (materialized, or the
+    template itself), else a VirtualOccurrence."""
+    row, when = await _load_slot(session, event_id)
+
+    stored_id = await _stored_occurrence_id(session, row, when)
+    if stored_id is not None:
+        return stored_id
+    return VirtualOccurrence(row, when)
+
+
+async def _stored_occurrence_id(session: AsyncSession, row, when) -> Optional[UUID]:
+    if when == row.template_date:
+        return row.template_id
+
+    return (
+        await session.execute(
+            select(Event.id).where(
+                Event.recurrence_id == row.recurrence_id,
+                Event.recurrence_date == when,
+            )
+        )
+    ).scalar_one_or_none()
+
+
+async def materialize_event_id(session: AsyncSession, event_id) -> str:
+    """Turn a virtual occurrence id into a stored event id, inserting the row
+    if needed; stored ids pass through. Concurrent callers get the same row."""
+    if not is_virtual_id(event_id):
+        return str(event_id)
+
+    row, when = await _load_slot(session, event_id)
+
+    stored_id = await _stored_occurrence_id(session, row, when)
+    if stored_id is not None:
+        return str(stored_id)
+
+    inserted = (
+        await session.execute(
+            pg_insert(Event)
+            .values(
+                recurrence_id=row.recurrence_id,
+                recurrence_date=when,
+                series_id=row.template_id,
+                event_date=when,
+                title=row.title,
+                description=row.description,
+                location=row.location,
+                requires_registration=row.requires_registration,
+                slots_available=row.slots_available,
+            )
+            .on_conflict_do_nothing(constraint="uq_events_recurrence_occurrence")
+            .returning(Event.id)
+        )
+    ).scalar_one_or_none()
+
+    if inserted is not None:
+        await session.commit()
+        return str(inserted)
+
+    # lost the race to a concurrent request
+    return str(await _stored_occurrence_id(session, row, when))
@@ -1,101 +1,235 @@
+import os
+import logging
 from datetime import datetime, timedelta, timezone
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from typing import Optional, Tuple
+from sqlalchemy import select, update, func, bindparam
+from sqlalchemy.orm import aliased
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from app.models.recurrence import Recurrence
 from app.models.event import Event
 from app.database.session import AsyncSessionLocal
-
-async def generate_recurring_events():
+from app.services.rrule import rule_from_recurrence, expand_all
+from app.services.occurrences import VIRTUAL_OCCURRENCES
+
+logger = logging.getLogger(__name__)
+
+# Occurrences are created up to this far ahead of now
+RECURRENCE_HORIZON_DAYS = int(os.getenv("RECURRENCE_HORIZON_DAYS", 30))
+
+# Cap per rule per pass, so a daily rule after a long outage catches up over
+# a few passes instead of one huge batch
+RECURRENCE_MAX_PER_RULE = int(os.getenv("RECURRENCE_MAX_PER_RULE", 500))
+
+# Rows per INSERT statement / transaction; keeps each write short
+RECURRENCE_BATCH_SIZE = int(os.getenv("RECURRENCE_BATCH_SIZE", 1000))
+
+# Due rules planned per batch
+RECURRENCE_DUE_BATCH = int(os.getenv("RECURRENCE_DUE_BATCH", 5000))
+
+# How far past the horizon to look for a rule's next occurrence when setting
+# next_run; an open-ended rule with none in that window is re-checked later
+NEXT_RUN_SEARCH = timedelta(days=366)
+
+
+# ---------------------------------------------------------
+# READ: due rules (indexed), then their template + latest occurrence
+# ---------------------------------------------------------
+def due_rules_query(now: datetime, limit: int = RECURRENCE_DUE_BATCH):
+    # ix_recurrences_next_run_active: an idle tick is one empty index probe
+    return (
+        select(Recurrence.id, Recurrence.next_run)
+        .where(Recurrence.active == True, Recurrence.next_run <= now)
+        .order_by(Recurrence.next_run)
+        .limit(limit)
+    )
+
+
+def recurrence_rows_query(recurrence_ids):
+    template = aliased(Event)
+
+    # max() over uq_events_recurrence_occurrence (recurrence_id, recurrence_date)
+    # is a single backwards index probe per recurrence
+    latest_occurrence = (
+        select(func.max(Event.recurrence_date))
+        .where(Event.recurrence_id == Recurrence.id)
+        .correlate(Recurrence)
+        .scalar_subquery()
+    )
+    last_date = func.coalesce(latest_occurrence, template.event_date).label("last_date")
+
+    return (
+        select(
+            Recurrence.id.label("recurrence_id"),
+            Recurrence.event_id.label("series_id"),
+            Recurrence.frequency,
+            Recurrence.start_date,
+            Recurrence.interval,
+            Recurrence.by_day,
+            Recurrence.day_of_month,
+            Recurrence.count,
+            Recurrence.repeat_until,
+            template.title,
+            template.description,
+            template.location,
+            template.requires_registration,
+            template.slots_available,
+            last_date,
+        )
+        .join(template, template.id == Recurrence.event_id)
+        .where(Recurrence.id.in_(recurrence_ids))
+    )
+
+
+# ---------------------------------------------------------
+# PLAN: missing occurrences up to the horizon + next_run, no I/O
+# ---------------------------------------------------------
+def _next_run(rule, following: list, search_end: datetime, horizon: timedelta) -> Optional[datetime]:
+    if following:
+        # due as soon as the occurrence enters the horizon
+        return following[0] - horizon
+    if rule.count is not None or (rule.until is not None and rule.until <= search_end):
+        return None
+    return search_end - horizon
+
+
+def plan_occurrences(
+    rows,
+    now: datetime,
+    horizon: timedelta,
+    limit: int = RECURRENCE_MAX_PER_RULE,
+) -> Tuple[list, dict]:
+    """(event rows to insert, {recurrence_id: next_run}) for the given rules.
+    All the rules are expanded together (rrule.expand_all)."""
+    planned = []
+    next_runs = {}
+    horizon_end = now + horizon
+
+    rules = []
+    for row in rows:
+        try:
+            rule = rule_from_recurrence(row)
+        except ValueError as exc:
+            logger.warning("Skipping recurrence %s: %s", row.recurrence_id, exc)
+            rule = None
+        if rule is None:
+            next_runs[row.recurrence_id] = None
+        else:
+            rules.append((row, rule))
+
+    # Everything after the latest occurrence: missed dates are caught up
+    expanded = expand_all(((rule, row.last_date, horizon_end) for row, rule in rules), limit=limit)
+
+    searching = []
+    for (row, rule), dates in zip(rules, expanded):
+        for event_date in dates:
+            planned.append({
+                "recurrence_id": row.recurrence_id,
+                "recurrence_date": event_date,
+                "series_id": row.series_id,
+                "title": row.title,
+                "description": row.description,
+                "location": row.location,
+                "event_date": event_date,
+                "requires_registration": row.requires_registration,
+                "slots_available": row.slots_available,
+            })
+
+        if len(dates) == limit:
+            # catch-up was capped: still due, continue on the next batch
+            next_runs[row.recurrence_id] = now
+        else:
+            searching.append((row, rule, dates[-1] if dates else row.last_date))
+
+    # next_run from the first occurrence past the horizon; COUNT rules are
+    # finite, so they can be searched to the end
+    search_end = horizon_end + NEXT_RUN_SEARCH
+    following = expand_all(
+        (
+            (rule, max(last_generated, horizon_end), None if rule.count is not None else search_end)
+            for _, rule, last_generated in searching
+        ),
+        limit=1,
+    )
+    for (row, rule, _), found in zip(searching, following):
+        next_runs[row.recurrence_id] = _next_run(rule, found, search_end, horizon)
+
+    return planned, next_runs
+
+
+# ---------------------------------------------------------
+# WRITE: chunked INSERT ... ON CONFLICT DO NOTHING, then next_run
+# ---------------------------------------------------------
+async def insert_occurrences(planned: list, batch_size: int = RECURRENCE_BATCH_SIZE) -> int:
+    inserted = 0
+    for start in range(0, len(planned), batch_size):
+        chunk = planned[start:start + batch_size]
+        stmt = (
+            pg_insert(Event)
+            .values(chunk)
+            # an occurrence created by another worker / an earlier pass wins
+            .on_conflict_do_nothing(constraint="uq_events_recurrence_occurrence")
+            .returning(Event.id)
+        )
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(stmt)
+            inserted += len(result.all())
+            await session.commit()
+    return inserted
+
+
+async def schedule_next_runs(next_runs: dict):
+    if not next_runs:
+        return
+
+    table = Recurrence.__table__
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam("rid"))
+        # scheduling is not an edit: keep updated_at (the occurrence cache key)
+        .values(next_run=bindparam("nr"), updated_at=table.c.updated_at)
+    )
     async with AsyncSessionLocal() as session:
-        now = datetime.now(timezone.utc)
-
-        recs = (
-            await session.execute(
-                select(Recurrence)
-                .options(selectinload(Recurrence.event))
-                .where(Recurrence.active == True)
-            )
-        ).scalars().all()
-
-        for rec in recs:
-
-            # Get latest event
-            latest_event = (
-                await session.execute(
-                    select(Event)
-                    .where(Event.id == rec.event_id)
-                    .order_by(Event.event_date.desc())
-                    .limit(1)
-                )
-            ).scalar_one_or_none()
-
-            if not latest_event:
-                continue
-
-            # Only generate AFTER the last event has passed
-            if latest_event.event_date > now:
-                continue
-
-            next_date = compute_next_occurrence(rec, latest_event.event_date)
-            if not next_date:
-                continue
-
-            # ensure timezone-aware
-            if next_date.tzinfo is None:
-                next_date = next_date.replace(tzinfo=timezone.utc)
-
-            # respect repeat_until
-            if rec.repeat_until and next_date > rec.repeat_until:
-                continue
-
-            # Safety: next_date must be after the last date
-            if next_date <= latest_event.event_date:
-                continue
-
-            # --- DUPLICATE CHECK ---
-            exists = (
-                await session.execute(
-                    select(Event)
-                    .where(Event.title == latest_event.title)
-                    .where(Event.event_date == next_date)
-                )
-            ).scalar_one_or_none()
-
-            if exists:
-                continue  # Already exists → skip
-
-            # Create recurring event
-            new_event = Event(
-                title=latest_event.title,
-                description=latest_event.description,
-                location=latest_event.location,
-                event_date=next_date,
-                requires_registration=latest_event.requires_registration,
-                slots_available=latest_event.slots_available,
-            )
-            session.add(new_event)
-
+        await session.execute(stmt, [{"rid": rid, "nr": nr} for rid, nr in next_runs.items()])
         await session.commit()
 
-def compute_next_occurrence(rec, last_date):
-    """Always return timezone-aware datetime."""
-    if last_date.tzinfo is None:
-        last_date = last_date.replace(tzinfo=timezone.utc)
-
-    if rec.frequency == "daily":
-        return last_date + timedelta(days=rec.interval)
-
-    if rec.frequency == "weekly":
-        return last_date + timedelta(weeks=rec.interval)
 
-    if rec.frequency == "monthly":
-        month = last_date.month - 1 + rec.interval
-        year = last_date.year + month // 12
-        month = month % 12 + 1
-
-        try:
-            return last_date.replace(year=year, month=month)
-        except ValueError:
-            return None
-
-    return None
\ No newline at end of file
+async def process_due(
+    recurrence_ids: list,
+    now: datetime,
+    horizon_days: int = RECURRENCE_HORIZON_DAYS,
+) -> int:
+    """Generate occurrences for the given due rules and reschedule them.
+    Returns the number of events inserted."""
+    async with AsyncSessionLocal() as session:
+        rows = (await session.execute(recurrence_rows_query(recurrence_ids))).all()
+
+    planned, next_runs = plan_occurrences(rows, now, timedelta(days=horizon_days))
+
+    # rules whose template is gone: stop scheduling them
+    for rid in recurrence_ids:
+        next_runs.setdefault(rid, None)
+
+    inserted = await insert_occurrences(planned) if planned else 0
+    await schedule_next_runs(next_runs)
+    return inserted
+
+
+async def generate_recurring_events(horizon_days: int = RECURRENCE_HORIZON_DAYS) -> int:
+    """Process every rule that is due now, batch by batch.
+
+    Returns the number of events inserted. Callers that may run in several
+    processes at once go through services/scheduler.py, which holds the
+    leader lock. With RECURRENCE_MODE=virtual occurrences are expanded at
+    read time instead and nothing is inserted.
+    """
+    if VIRTUAL_OCCURRENCES:
+        return 0
+
+    now = datetime.now(timezone.utc)
+    inserted = 0
+    while True:
+        async with AsyncSessionLocal() as session:
+            due = (await session.execute(due_rules_query(now))).all()
+        if not due:
+            return inserted
+        inserted += await process_due([row.id for row in due], now, horizon_days)
@@ -0,0 +1,465 @@
+"""RRULE-style expansion of Recurrence rows (a subset of RFC 5545).
+
+Supported parts:
+    FREQ        daily / weekly / monthly / yearly   (Recurrence.frequency)
+    INTERVAL    every N periods                      (Recurrence.interval)
+    BYDAY       "MO,WE", "2TU", "-1FR"               (Recurrence.by_day)
+    BYMONTHDAY  1..31 or -1..-31 from month end      (Recurrence.day_of_month)
+    UNTIL       inclusive upper bound                (Recurrence.repeat_until)
+    COUNT       total occurrences incl. the first    (Recurrence.count)
+
+DTSTART is Recurrence.start_date; every occurrence keeps its time of day.
+Days (weekdays, month days, period boundaries) are those of the local
+calendar in RECURRENCE_TIMEZONE: an event at 06:00 WIB on Monday is 23:00
+Sunday in UTC. Occurrences are returned in UTC.
+
+expand() walks one rule period by period; expand_all() expands many
+windows at once with numpy (same results, see scripts/bench_rrule.py).
+Differences from RFC 5545, chosen for how the village schedules activities:
+  - a monthly/yearly rule with no BYDAY/BYMONTHDAY falls on the start day,
+    clamped to the month end (31st -> 30th/28th) instead of being skipped;
+  - yearly rules expand inside the start month only (no BYMONTH), so
+    "yearly;BYDAY=4TH" means the 4th Thursday of that month;
+  - BYDAY ordinals (2TU, -1FR) are only meaningful for monthly/yearly;
+    daily rules use BYDAY/BYMONTHDAY as filters, weekly rules ignore
+    BYMONTHDAY.
+"""
+import os
+from calendar import monthrange
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+# Calendar the rules are expanded in (the village's wall clock)
+RECURRENCE_TIMEZONE = ZoneInfo(os.getenv("RECURRENCE_TIMEZONE", "Asia/Jakarta"))
+
+FREQUENCIES = ("daily", "weekly", "monthly", "yearly")
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+# Give up on a rule after this many periods in a row without a candidate
+# (e.g. BYDAY=1MO with BYMONTHDAY=20 never matches)
+MAX_EMPTY_PERIODS = 5000
+
+
+class Rule(NamedTuple):
+    frequency: str
+    dtstart: datetime
+    interval: int = 1
+    by_day: Tuple[Tuple[int, int], ...] = ()   # (ordinal, weekday); ordinal 0 = every
+    by_month_day: Tuple[int, ...] = ()
+    until: Optional[datetime] = None
+    count: Optional[int] = None
+
+
+# ---------------------------------------------------------
+# PARSING
+# ---------------------------------------------------------
+def parse_by_day(value: Optional[str]) -> Tuple[Tuple[int, int], ...]:
+    """"MO,-1FR,2TU" -> ((0, 0), (-1, 4), (2, 1)). Raises ValueError."""
+    if not value:
+        return ()
+
+    parsed = []
+    for token in value.upper().replace(" ", "").split(","):
+        code, ordinal = token[-2:], token[:-2]
+        if code not in WEEKDAYS:
+            raise ValueError(f"Invalid BYDAY weekday: {token!r}")
+        try:
+            n = int(ordinal) if ordinal not in ("", "+") else 0
+        except ValueError:
+            raise ValueError(f"Invalid BYDAY ordinal: {token!r}")
+        if not -5 <= n <= 5:
+            raise ValueError(f"BYDAY ordinal out of range: {token!r}")
+        parsed.append((n, WEEKDAYS.index(code)))
+    return tuple(parsed)
+
+
+def _aware(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def rule_from_recurrence(rec) -> Optional[Rule]:
+    """Build a Rule from a Recurrence (or any row with the same attributes).
+    Returns None for frequencies that do not repeat ("none", unknown)."""
+    if rec.frequency not in FREQUENCIES:
+        return None
+
+    return Rule(
+        frequency=rec.frequency,
+        dtstart=_aware(rec.start_date),
+        interval=max(rec.interval or 1, 1),
+        by_day=parse_by_day(getattr(rec, "by_day", None)),
+        by_month_day=(rec.day_of_month,) if rec.day_of_month else (),
+        until=_aware(rec.repeat_until),
+        count=getattr(rec, "count", None),
+    )
+
+
+# ---------------------------------------------------------
+# CANDIDATE DAYS PER PERIOD
+# ---------------------------------------------------------
+def _add_months(year: int, month: int, months: int) -> Tuple[int, int]:
+    index = year * 12 + (month - 1) + months
+    return index // 12, index % 12 + 1
+
+
+def _days_in_month(rule: Rule, year: int, month: int) -> List[int]:
+    last = monthrange(year, month)[1]
+
+    by_month_day = set()
+    for d in rule.by_month_day:
+        day = d if d > 0 else last + d + 1
+        if 1 <= day <= last:
+            by_month_day.add(day)
+
+    by_day = set()
+    if rule.by_day:
+        first_weekday = date(year, month, 1).weekday()
+        for n, weekday in rule.by_day:
+            matches = range(1 + (weekday - first_weekday) % 7, last + 1, 7)
+            if n == 0:
+                by_day.update(matches)
+            elif abs(n) <= len(matches):
+                by_day.add(matches[n - 1] if n > 0 else matches[n])
+
+    if rule.by_day and rule.by_month_day:
+        return sorted(by_day & by_month_day)
+    if rule.by_day:
+        return sorted(by_day)
+    if rule.by_month_day:
+        return sorted(by_month_day)
+    return [min(rule.dtstart.day, last)]
+
+
+def _period(rule: Rule, k: int) -> Tuple[date, List[date]]:
+    """(first day of period k, candidate days in period k)."""
+    start = rule.dtstart.date()
+    step = k * rule.interval
+
+    if rule.frequency == "daily":
+        day = start + timedelta(days=step)
+        if rule.by_day and day.weekday() not in {wd for _, wd in rule.by_day}:
+            return day, []
+        if rule.by_month_day and day.day not in _days_in_month(
+            rule._replace(by_day=()), day.year, day.month
+        ):
+            return day, []
+        return day, [day]
+
+    if rule.frequency == "weekly":
+        week = start - timedelta(days=start.weekday()) + timedelta(weeks=step)
+        weekdays = sorted({wd for _, wd in rule.by_day}) or [start.weekday()]
+        return week, [week + timedelta(days=wd) for wd in weekdays]
+
+    if rule.frequency == "monthly":
+        year, month = _add_months(start.year, start.month, step)
+    else:  # yearly
+        year, month = start.year + step, start.month
+
+    return date(year, month, 1), [date(year, month, d) for d in _days_in_month(rule, year, month)]
+
+
+def _first_period(rule: Rule, after: date) -> int:
+    """Index of the period containing `after` (0 if before dtstart)."""
+    start = rule.dtstart.date()
+    if after <= start:
+        return 0
+
+    if rule.frequency == "daily":
+        units = (after - start).days
+    elif rule.frequency == "weekly":
+        week_of = lambda d: d - timedelta(days=d.weekday())
+        units = (week_of(after) - week_of(start)).days // 7
+    elif rule.frequency == "monthly":
+        units = (after.year - start.year) * 12 + after.month - start.month
+    else:
+        units = after.year - start.year
+    return max(units // rule.interval, 0)
+
+
+# ---------------------------------------------------------
+# EXPANSION
+# ---------------------------------------------------------
+def iter_occurrences(
+    rule: Rule,
+    after: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Iterator[datetime]:
+    """Occurrences of `rule` with after < o <= end, in order, in UTC.
+
+    COUNT is counted from dtstart, so rules with a COUNT are walked from
+    the first period; other rules jump straight to the period of `after`.
+    """
+    after, end = _aware(after), _aware(end)
+    stop = min(filter(None, (end, rule.until)), default=None)
+    if stop is None and rule.count is None:
+        raise ValueError("Unbounded rule: pass end or set UNTIL/COUNT")
+
+    # candidate days are local dates; comparisons stay on aware datetimes
+    rule = rule._replace(dtstart=_aware(rule.dtstart).astimezone(RECURRENCE_TIMEZONE))
+    stop_day = stop.astimezone(RECURRENCE_TIMEZONE).date() if stop is not None else None
+    time_of_day = rule.dtstart.timetz()
+    k = 0 if rule.count is not None or after is None else _first_period(
+        rule, after.astimezone(RECURRENCE_TIMEZONE).date()
+    )
+    seen = 0
+    empty = 0
+
+    while True:
+        try:
+            period_start, days = _period(rule, k)
+        except (ValueError, OverflowError):
+            return  # past year 9999 (a COUNT rule that never matches again)
+        if stop_day is not None and period_start > stop_day:
+            return
+
+        empty = 0 if days else empty + 1
+        if empty > MAX_EMPTY_PERIODS:
+            return
+
+        for day in days:
+            occurrence = datetime.combine(day, time_of_day)
+            if occurrence < rule.dtstart:
+                continue
+            if stop is not None and occurrence > stop:
+                return
+            seen += 1
+            if rule.count is not None and seen > rule.count:
+                return
+            if after is None or occurrence > after:
+                yield occurrence.astimezone(timezone.utc)
+        k += 1
+
+
+def expand(
+    rule: Rule,
+    after: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: Optional[int] = None,
+) -> List[datetime]:
+    occurrences = []
+    for occurrence in iter_occurrences(rule, after, end):
+        occurrences.append(occurrence)
+        if limit is not None and len(occurrences) >= limit:
+            break
+    return occurrences
+
+
+# ---------------------------------------------------------
+# BATCH EXPANSION (numpy)
+# ---------------------------------------------------------
+# expand_all() groups windows by FREQ and tests every local day of every
+# window in a group at once, with the same rules _period() applies per
+# period. Days are int64 day numbers (days since 1970-01-01, a Thursday).
+
+# cells (rule, day) tested per numpy pass
+EXPAND_BATCH_DAYS = int(os.getenv("EXPAND_BATCH_DAYS", 1_000_000))
+
+
+class _Window(NamedTuple):
+    index: int
+    rule: Rule
+    after: Optional[datetime]
+    stop: datetime
+    first_day: date       # local day the test starts at
+    days: int             # number of local days tested
+
+
+def _day_numbers(days: List[date]) -> np.ndarray:
+    return np.array(days, dtype="datetime64[D]").astype(np.int64)
+
+
+def _match_days(frequency: str, windows: List[_Window]) -> Tuple[np.ndarray, np.ndarray]:
+    """(window position, day number) of every matching day, in window then
+    day order, COUNT applied."""
+    n = len(windows)
+    rules = [w.rule for w in windows]
+    local_starts = [r.dtstart.astimezone(RECURRENCE_TIMEZONE).date() for r in rules]
+
+    start = _day_numbers(local_starts)
+    interval = np.array([r.interval for r in rules], dtype=np.int64)
+    count = np.array([r.count if r.count is not None else -1 for r in rules], dtype=np.int64)
+    has_by_day = np.array([bool(r.by_day) for r in rules])
+    has_month_day = np.array([bool(r.by_month_day) for r in rules])
+    # [window, weekday]: weekday listed with any ordinal
+    any_weekday = np.zeros((n, 7), dtype=bool)
+    # [window, weekday, ordinal + 5]
+    ordinal = np.zeros((n, 7, 11), dtype=bool)
+    # [window, day] for BYMONTHDAY=day and BYMONTHDAY=-day
+    month_day = np.zeros((n, 32), dtype=bool)
+    month_day_from_end = np.zeros((n, 32), dtype=bool)
+    for i, r in enumerate(rules):
+        for nth, weekday in r.by_day:
+            any_weekday[i, weekday] = True
+            ordinal[i, weekday, nth + 5] = True
+        for d in r.by_month_day:
+            if 0 < abs(d) <= 31:
+                (month_day if d > 0 else month_day_from_end)[i, abs(d)] = True
+
+    # one cell per (window, local day)
+    sizes = np.array([w.days for w in windows], dtype=np.int64)
+    row = np.repeat(np.arange(n), sizes)
+    offsets = np.arange(len(row)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    day = _day_numbers([w.first_day for w in windows])[row] + offsets
+
+    weekday = (day + 3) % 7
+    if frequency == "daily":
+        mask = (day - start[row]) % interval[row] == 0
+    elif frequency == "weekly":
+        weeks = ((day - weekday) - (start - (start + 3) % 7)[row]) // 7
+        mask = weeks % interval[row] == 0
+        mask &= np.where(has_by_day[row], any_weekday[row, weekday], weekday == (start[row] + 3) % 7)
+        return _apply_count(row, day, mask, count)
+
+    # calendar fields of each distinct day, then looked up per cell
+    first = int(day.min()) if len(day) else 0
+    calendar = np.arange(first, int(day.max()) + 1 if len(day) else 0, dtype=np.int64)
+    months = calendar.astype("datetime64[D]").astype("datetime64[M]")
+    month_first = months.astype("datetime64[D]").astype(np.int64)
+    position = day - first
+    month_index = months.astype(np.int64)[position]  # months since 1970-01
+    dom = (calendar - month_first + 1)[position]
+    last = ((months + 1).astype("datetime64[D]").astype(np.int64) - month_first)[position]
+    in_month_day = month_day[row, dom] | month_day_from_end[row, last - dom + 1]
+
+    if frequency == "daily":
+        mask &= ~has_by_day[row] | any_weekday[row, weekday]
+        mask &= ~has_month_day[row] | in_month_day
+        return _apply_count(row, day, mask, count)
+
+    start_month = start.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    if frequency == "monthly":
+        mask = (month_index - start_month[row]) % interval[row] == 0
+    else:  # yearly: the start month only
+        units = month_index - start_month[row]
+        mask = (units % 12 == 0) & ((units // 12) % interval[row] == 0)
+
+    nth = (dom - 1) // 7 + 1
+    nth_from_end = -((last - dom) // 7 + 1)
+    in_by_day = ordinal[row, weekday, 5] | ordinal[row, weekday, nth + 5] | ordinal[row, weekday, nth_from_end + 5]
+    start_dom = np.array([d.day for d in local_starts], dtype=np.int64)
+    mask &= np.where(
+        has_by_day[row] & has_month_day[row], in_by_day & in_month_day,
+        np.where(has_by_day[row], in_by_day,
+                 np.where(has_month_day[row], in_month_day, dom == np.minimum(start_dom[row], last))),
+    )
+    return _apply_count(row, day, mask, count)
+
+
+def _apply_count(row: np.ndarray, day: np.ndarray, mask: np.ndarray, count: np.ndarray):
+    hits = np.flatnonzero(mask)
+    row, day = row[hits], day[hits]
+    # COUNT windows start at dtstart, so a hit's rank in its window is its
+    # position in the series
+    rank = np.arange(len(row)) - np.searchsorted(row, row)
+    keep = (count[row] < 0) | (rank < count[row])
+    return row[keep], day[keep]
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_US = timedelta(microseconds=1)
+_DAY_US = 86_400_000_000
+
+
+def _micros(value: datetime) -> int:
+    """Microseconds since 1970-01-01 UTC."""
+    return (value - _EPOCH) // _US
+
+
+def _utc_offsets(local: np.ndarray) -> np.ndarray:
+    """UTC offset (µs) of local wall-clock times given as microseconds since
+    1970-01-01 local, as datetime.combine(...).astimezone() applies it.
+    Looked up once per local day, and per time only on days whose offset
+    changes (DST)."""
+    def offset(local_us: int) -> int:
+        wall = datetime(1970, 1, 1) + timedelta(microseconds=local_us)
+        return wall.replace(tzinfo=RECURRENCE_TIMEZONE).utcoffset() // _US
+
+    days, day_of = np.unique(local // _DAY_US, return_inverse=True)
+    starts = np.array([offset(d * _DAY_US) for d in days.tolist()], dtype=np.int64)
+    ends = np.array([offset(d * _DAY_US + _DAY_US - 1) for d in days.tolist()], dtype=np.int64)
+    offsets = starts[day_of]
+    changing = np.flatnonzero((starts != ends)[day_of])
+    if len(changing):
+        offsets[changing] = [offset(value) for value in local[changing].tolist()]
+    return offsets
+
+
+def _expand_group(frequency: str, windows: List[_Window], limit: Optional[int]) -> List[List[datetime]]:
+    rows, days = _match_days(frequency, windows)
+
+    # local wall clock -> UTC
+    time_of_day = np.array([
+        _micros(datetime.combine(date(1970, 1, 1), w.rule.dtstart.astimezone(RECURRENCE_TIMEZONE).time(),
+                                 tzinfo=timezone.utc))
+        for w in windows
+    ], dtype=np.int64)
+    local = days * _DAY_US + time_of_day[rows]
+    utc = local - _utc_offsets(local)
+
+    lowest = np.iinfo(np.int64).min
+    after = np.array([_micros(w.after) if w.after is not None else lowest for w in windows], dtype=np.int64)
+    stop = np.array([_micros(w.stop) for w in windows], dtype=np.int64)
+    keep = (utc > after[rows]) & (utc <= stop[rows])
+    rows, utc = rows[keep], utc[keep]
+    if limit is not None:
+        keep = np.arange(len(rows)) - np.searchsorted(rows, rows) < limit
+        rows, utc = rows[keep], utc[keep]
+
+    # one datetime per distinct instant, shared by the rules that have it
+    instants, instant_of = np.unique(utc, return_inverse=True)
+    values = np.empty(len(instants), dtype=object)
+    values[:] = [
+        datetime(d.year, d.month, d.day, d.hour, d.minute, d.second, d.microsecond, timezone.utc)
+        for d in instants.astype("datetime64[us]").tolist()
+    ]
+    occurrences = values[instant_of].tolist()
+
+    bounds = np.searchsorted(rows, np.arange(len(windows) + 1)).tolist()
+    return [occurrences[lo:hi] for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+
+def expand_all(
+    windows: Iterable[Tuple[Rule, Optional[datetime], Optional[datetime]]],
+    limit: Optional[int] = None,
+) -> List[List[datetime]]:
+    """expand() for many (rule, after, end) windows, with the same results.
+
+    Windows are grouped by FREQ and tested day by day in numpy passes of up
+    to EXPAND_BATCH_DAYS cells, so the cost is per day of window rather than
+    per rule. COUNT rules with neither end nor UNTIL have no last day and go
+    through expand() one by one.
+    """
+    results: List[Optional[List[datetime]]] = []
+    groups: dict = {}
+    for index, (rule, after, end) in enumerate(windows):
+        after, end = _aware(after), _aware(end)
+        rule = rule._replace(dtstart=_aware(rule.dtstart))
+        stop = min(filter(None, (end, rule.until)), default=None)
+        if stop is None:
+            results.append(expand(rule, after, end, limit))
+            continue
+
+        results.append(None)
+        start_day = rule.dtstart.astimezone(RECURRENCE_TIMEZONE).date()
+        first_day = start_day
+        if rule.count is None and after is not None:
+            first_day = max(start_day, after.astimezone(RECURRENCE_TIMEZONE).date())
+        days = max((stop.astimezone(RECURRENCE_TIMEZONE).date() - first_day).days + 1, 0)
+        groups.setdefault(rule.frequency, []).append(_Window(index, rule, after, stop, first_day, days))
+
+    for frequency, group in groups.items():
+        batch, cells = [], 0
+        for window in group + [None]:
+            if window is None or (batch and cells + window.days > EXPAND_BATCH_DAYS):
+                for w, occurrences in zip(batch, _expand_group(frequency, batch, limit)):
+                    results[w.index] = occurrences
+                batch, cells = [], 0
+            if window is not None:
+                batch.append(window)
+                cells += window.days
+    return results
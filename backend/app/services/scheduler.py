@@ -0,0 +1,183 @@
+"""Cluster-safe recurrence scheduler.
+
+Every process runs the loop, but only the one holding a Postgres session
+advisory lock does any work (the leader). The lock lives on a dedicated
+AUTOCOMMIT connection (services/advisory_lock.py). If the leader dies, its
+connection closes, the lock is released, and another process takes over on
+its next tick.
+
+A leader tick reads due rules from ix_recurrences_next_run_active on that
+connection. When nothing is due, that one indexed query is the whole tick.
+Database maintenance (registered_count reconciler, offline check-in key
+expiry, collect_media_blobs) runs separately in services/maintenance.py.
+
+Ticks from the loop and from run_once() (startup, the run-now endpoint)
+share the lock connection, so they run one at a time.
+"""
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.services.advisory_lock import AdvisoryLock
+from app.services.occurrences import VIRTUAL_OCCURRENCES
+from app.services.recurrence_engine import due_rules_query, process_due
+
+logger = logging.getLogger(__name__)
+
+# RECURRENCE_INTERVAL_SECONDS is the old name (one generation run per
+# interval, default 86400) and is still honoured when the new one is unset
+RECURRENCE_TICK_SECONDS = int(
+    os.getenv("RECURRENCE_TICK_SECONDS") or os.getenv("RECURRENCE_INTERVAL_SECONDS", 60)
+)
+
+# pg_advisory_lock key shared by every process of this app
+SCHEDULER_LOCK_KEY = int(os.getenv("SCHEDULER_LOCK_KEY", 7_402_511_023))
+
+
+class SchedulerMetrics:
+    def __init__(self):
+        self.is_leader = False
+        self.ticks = 0
+        self.busy_ticks = 0
+        self.errors = 0
+        self.events_created = 0
+        self.last_tick_at: Optional[datetime] = None
+        self.last_tick_seconds = 0.0
+        self.max_tick_seconds = 0.0
+        self.total_tick_seconds = 0.0
+        # how overdue the oldest due rule was when its tick started
+        self.last_lag_seconds = 0.0
+        self.max_lag_seconds = 0.0
+        self.last_due = 0
+        self.last_error: Optional[str] = None
+
+    def record_tick(self, started: float, lag: float, due: int, created: int):
+        duration = time.perf_counter() - started
+        self.ticks += 1
+        self.busy_ticks += 1 if due else 0
+        self.events_created += created
+        self.last_tick_at = datetime.now(timezone.utc)
+        self.last_tick_seconds = duration
+        self.max_tick_seconds = max(self.max_tick_seconds, duration)
+        self.total_tick_seconds += duration
+        self.last_lag_seconds = lag
+        self.max_lag_seconds = max(self.max_lag_seconds, lag)
+        self.last_due = due
+
+    def snapshot(self) -> dict:
+        return {
+            "is_leader": self.is_leader,
+            "ticks": self.ticks,
+            "busy_ticks": self.busy_ticks,
+            "errors": self.errors,
+            "events_created": self.events_created,
+            "last_tick_at": self.last_tick_at,
+            "last_tick_seconds": round(self.last_tick_seconds, 4),
+            "max_tick_seconds": round(self.max_tick_seconds, 4),
+            "avg_tick_seconds": round(self.total_tick_seconds / self.ticks, 4) if self.ticks else 0.0,
+            "last_lag_seconds": round(self.last_lag_seconds, 3),
+            "max_lag_seconds": round(self.max_lag_seconds, 3),
+            "last_due": self.last_due,
+            "last_error": self.last_error,
+        }
+
+
+class RecurrenceScheduler:
+    def __init__(self, tick_seconds: int = RECURRENCE_TICK_SECONDS, lock_key: int = SCHEDULER_LOCK_KEY):
+        self.tick_seconds = tick_seconds
+        self.lock_key = lock_key
+        self.metrics = SchedulerMetrics()
+        self._lock = AdvisoryLock(lock_key, "recurrence")
+        # one tick at a time on the lock connection (loop and run_once)
+        self._tick_lock = asyncio.Lock()
+        self._running = False
+
+    # ---------------------------------------------------------
+    # LEADERSHIP
+    # ---------------------------------------------------------
+    async def _acquire(self) -> bool:
+        got = await self._lock.acquire()
+        self.metrics.is_leader = got
+        return got
+
+    async def _release(self):
+        self.metrics.is_leader = False
+        await self._lock.release()
+
+    # ---------------------------------------------------------
+    # TICK
+    # ---------------------------------------------------------
+    async def tick(self) -> Optional[int]:
+        """One scheduler pass. Returns events created, or None when another
+        process is the leader."""
+        async with self._tick_lock:
+            return await self._tick()
+
+    async def _tick(self) -> Optional[int]:
+        if not await self._acquire():
+            return None
+
+        started = time.perf_counter()
+        now = datetime.now(timezone.utc)
+        created = due_total = 0
+        lag = 0.0
+
+        try:
+            if not VIRTUAL_OCCURRENCES:
+                while True:
+                    due = (await self._lock.conn.execute(due_rules_query(now))).all()
+                    if not due:
+                        break
+                    if not due_total:
+                        lag = (now - due[0].next_run).total_seconds()
+                    due_total += len(due)
+                    created += await process_due([row.id for row in due], now)
+
+        except Exception as exc:
+            self.metrics.errors += 1
+            self.metrics.last_error = repr(exc)
+            # the lock connection may be broken: step down, retry next tick
+            await self._release()
+            raise
+
+        self.metrics.record_tick(started, lag, due_total, created)
+        if created:
+            logger.info("[Scheduler] %d due rules, %d new events", due_total, created)
+        return created
+
+    async def run_once(self) -> Optional[int]:
+        """A single tick outside the loop (startup, manual trigger). Gives the
+        lock back afterwards unless this process is running the loop."""
+        async with self._tick_lock:
+            try:
+                return await self._tick()
+            finally:
+                if not self._running:
+                    await self._release()
+
+    async def run(self, stop_event: asyncio.Event):
+        logger.info(f"[Scheduler] Loop started (tick={self.tick_seconds}s)")
+        self._running = True
+
+        try:
+            while not stop_event.is_set():
+                try:
+                    await self.tick()
+                except Exception as exc:
+                    logger.exception("[Scheduler] Tick failed: %s", exc)
+
+                try:
+                    await asyncio.wait_for(stop_event.wait(), timeout=self.tick_seconds)
+                except asyncio.TimeoutError:
+                    continue
+        finally:
+            self._running = False
+            async with self._tick_lock:
+                await self._release()
+            logger.info("[Scheduler] Loop stopped")
+
+
+scheduler = RecurrenceScheduler()
@@ -0,0 +1,178 @@
+""""This and following" edits of a recurring series.
+
+A series is a template event, its recurrence rule and the occurrences
+generated (or, with RECURRENCE_MODE=virtual, expanded) from them. Editing
+from a date on means changing every stored occurrence from there and every
+one that is not stored yet, which comes from the template and its rule. So
+the rule is either replaced by a shifted copy (edit from the first
+occurrence) or split at the first occurrence on or after the date.
+
+The rule math lives here; the queries are in crud.event.
+"""
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.event import (
+    delete_recurrence,
+    get_rule_occurrence,
+    lock_series_rule,
+    update_occurrences,
+)
+from app.models.event import Event
+from app.models.recurrence import Recurrence
+from app.services import rrule
+from app.services.recurrence_engine import NEXT_RUN_SEARCH
+
+# Fields a series edit may set on every matching occurrence
+SERIES_EDITABLE_FIELDS = ("title", "description", "location", "requires_registration", "slots_available")
+
+_TICK = timedelta(microseconds=1)
+
+
+class UnsupportedShift(ValueError):
+    pass
+
+
+# ---------------------------------------------------------
+# RULE PLANNING
+# ---------------------------------------------------------
+def shifted_by_day(rec: Recurrence, shift: timedelta) -> Optional[str]:
+    """by_day of a rule whose start moves by shift: plain weekdays follow the
+    start to its new local day; ordinals and month days cannot follow it."""
+    zone = rrule.RECURRENCE_TIMEZONE
+    start = rrule.rule_from_recurrence(rec).dtstart
+    days = ((start + shift).astimezone(zone).date() - start.astimezone(zone).date()).days
+    if not days % 7:
+        return rec.by_day
+
+    by_day = rrule.parse_by_day(rec.by_day)
+    if rec.day_of_month or any(n for n, _ in by_day):
+        raise UnsupportedShift("Pergeseran hari tidak didukung untuk aturan dengan BYMONTHDAY atau urutan BYDAY")
+    return ",".join(rrule.WEEKDAYS[(wd + days) % 7] for _, wd in by_day) or None
+
+
+def split_point(rule: rrule.Rule, from_date: datetime) -> Optional[datetime]:
+    """First occurrence of rule on or after from_date, None if it ends before."""
+    first = rrule.expand(
+        rule,
+        after=from_date - _TICK,
+        end=None if rule.count or rule.until else max(from_date, rule.dtstart) + NEXT_RUN_SEARCH,
+        limit=1,
+    )
+    return first[0] if first else None
+
+
+def remaining_count(rule: rrule.Rule, pivot: datetime) -> Optional[int]:
+    """COUNT left for a rule restarting at pivot (None: no COUNT)."""
+    if rule.count is None:
+        return None
+    return rule.count - len(rrule.expand(rule, end=pivot - _TICK))
+
+
+# ---------------------------------------------------------
+# SERIES UPDATE
+# ---------------------------------------------------------
+async def update_series(
+    session: AsyncSession,
+    series_id: UUID,
+    from_date: datetime,
+    values: dict,
+    shift: Optional[timedelta] = None,
+) -> Tuple[int, UUID]:
+    """Apply values (and an optional event_date shift) to the series from
+    from_date on, including occurrences that are not stored yet.
+
+    Later occurrences are copied from the template and its rule, so those
+    change too, in the same transaction:
+      - from the first occurrence on, the template is edited and the rule
+        replaced by a shifted copy;
+      - otherwise the series is split at the first occurrence on or after
+        from_date: the old rule ends just before it, and that occurrence
+        becomes the template of a new series with its own rule (keeping its
+        rule slot, so a rescheduled one is not generated again).
+    Stored occurrences move to the new rule (one UPDATE). Returns (events
+    changed, series id of the edited occurrences). Raises UnsupportedShift
+    when shift moves a BYMONTHDAY or ordinal BYDAY rule to another day.
+    """
+    shift = shift or timedelta(0)
+    if not values and not shift:
+        return 0, series_id
+
+    rec = await lock_series_rule(session, series_id)
+    template = await session.get(Event, series_id) if rec is not None else None
+    rule = rrule.rule_from_recurrence(rec) if template is not None else None
+    pivot = split_point(rule, from_date) if rule is not None else None
+
+    if pivot is None:
+        # no rule, or it ends before from_date: only stored occurrences exist
+        changed = await update_occurrences(
+            session, (Event.series_id == series_id, Event.event_date >= from_date), values, shift
+        )
+        await session.commit()
+        return changed, series_id
+
+    by_day = shifted_by_day(rec, shift)
+    whole_series = pivot <= rule.dtstart
+    if whole_series:
+        head = template
+    else:
+        # the stored occurrence at the split (if any) heads the new series
+        head = await get_rule_occurrence(session, rec.id, pivot)
+        if head is None:
+            head = Event(
+                title=template.title,
+                description=template.description,
+                location=template.location,
+                requires_registration=template.requires_registration,
+                slots_available=template.slots_available,
+                event_date=pivot,
+            )
+            session.add(head)
+        head.recurrence_id = None
+        head.recurrence_date = None
+
+    changed = 0 if head.id is None else 1
+    for key, value in values.items():
+        setattr(head, key, value)
+    head.event_date = head.event_date + shift
+    await session.flush()
+    head.series_id = head.id
+
+    new_rec = Recurrence(
+        event_id=head.id,
+        start_date=pivot + shift,
+        frequency=rec.frequency,
+        interval=rec.interval,
+        by_day=by_day,
+        day_of_month=rec.day_of_month,
+        count=remaining_count(rule, pivot),
+        repeat_until=rec.repeat_until + shift if rec.repeat_until else None,
+        active=rec.active,
+        next_run=func.now(),
+    )
+    session.add(new_rec)
+    await session.flush()
+
+    # a fresh recurrence_id: shifted slots never collide with unshifted ones
+    criteria = [Event.recurrence_id == rec.id]
+    if not whole_series:
+        criteria.append(Event.recurrence_date > pivot)
+    changed += await update_occurrences(
+        session, criteria, values, shift, recurrence_id=new_rec.id, series_id=head.id
+    )
+
+    if whole_series:
+        await delete_recurrence(session, rec.id)
+    else:
+        head.recurrence_id = new_rec.id
+        head.recurrence_date = pivot + shift
+        until = pivot - _TICK
+        rec.repeat_until = min(rec.repeat_until, until) if rec.repeat_until else until
+        rec.next_run = func.now()
+
+    await session.commit()
+    return changed, head.id
@@ -0,0 +1,336 @@
+"""Object storage for uploaded media.
+
+Two backends with the same async interface (put/get/delete/list/stat plus
+URL mapping), chosen with STORAGE_BACKEND:
+
+* "supabase": Supabase Storage over its REST API, on one pooled
+  httpx.AsyncClient (STORAGE_MAX_CONNECTIONS) with retries and exponential
+  backoff for connection errors, 429 and 5xx. Puts are upserts, so a retried
+  upload whose first response was lost does not fail as a duplicate.
+* "local": files under LOCAL_STORAGE_DIR, served by the app at
+  LOCAL_STORAGE_URL. For tests, benchmarks and self-hosted installs without
+  network access.
+
+Keys are bucket-relative paths ("events/<event>/media/<id>/full.jpg").
+get_storage() creates the configured backend on first use; close_storage()
+releases its connections on shutdown.
+"""
+import os
+import asyncio
+import logging
+import mimetypes
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import NamedTuple, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
+SUPABASE_BUCKET = os.getenv("SUPABASE_BUCKET", "event-banners")
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND") or ("supabase" if SUPABASE_URL else "local")
+STORAGE_MAX_CONNECTIONS = int(os.getenv("STORAGE_MAX_CONNECTIONS", 16))
+STORAGE_TIMEOUT_SECONDS = float(os.getenv("STORAGE_TIMEOUT_SECONDS", 30))
+STORAGE_RETRIES = int(os.getenv("STORAGE_RETRIES", 3))
+STORAGE_RETRY_BACKOFF_SECONDS = float(os.getenv("STORAGE_RETRY_BACKOFF_SECONDS", 0.2))
+
+LOCAL_STORAGE_DIR = os.getenv("LOCAL_STORAGE_DIR", "media")
+LOCAL_STORAGE_URL = os.getenv("LOCAL_STORAGE_URL", "/media-files").rstrip("/")
+
+
+class StorageError(Exception):
+    pass
+
+
+class ObjectStat(NamedTuple):
+    key: str
+    size: int
+    content_type: Optional[str]
+    modified: Optional[datetime]
+
+
+class StorageBackend(ABC):
+    @abstractmethod
+    async def put(self, key: str, data: bytes, content_type: str) -> None:
+        ...
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """Object content, None if it does not exist."""
+
+    @abstractmethod
+    async def delete(self, keys: list) -> None:
+        """Delete objects; missing keys are ignored."""
+
+    @abstractmethod
+    async def list(self, prefix: str) -> list:
+        """ObjectStat of the objects directly under the folder prefix."""
+
+    @abstractmethod
+    async def stat(self, key: str) -> Optional[ObjectStat]:
+        ...
+
+    @abstractmethod
+    def public_url(self, key: str) -> str:
+        ...
+
+    @abstractmethod
+    def key_for_url(self, url: str) -> Optional[str]:
+        """Inverse of public_url(), None for URLs of another store."""
+
+    async def close(self) -> None:
+        pass
+
+
+# ---------------------------------------------------------
+# LOCAL FILESYSTEM
+# ---------------------------------------------------------
+class LocalStorage(StorageBackend):
+    def __init__(self, root: str = LOCAL_STORAGE_DIR, base_url: str = LOCAL_STORAGE_URL):
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip("/")
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise StorageError(f"Invalid key: {key}")
+        return path
+
+    def _stat(self, key: str, path: str) -> ObjectStat:
+        st = os.stat(path)
+        return ObjectStat(
+            key=key,
+            size=st.st_size,
+            content_type=mimetypes.guess_type(path)[0],
+            modified=datetime.fromtimestamp(st.st_mtime, timezone.utc),
+        )
+
+    def _write(self, path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write aside and rename: readers never see a partial file
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _read(self, path: str) -> Optional[bytes]:
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _remove(self, paths: list):
+        for path in paths:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    def _list(self, prefix: str) -> list:
+        folder = self._path(prefix.rstrip("/"))
+        try:
+            names = sorted(os.listdir(folder))
+        except FileNotFoundError:
+            return []
+        key_prefix = prefix.rstrip("/") + "/"
+        return [
+            self._stat(key_prefix + name, os.path.join(folder, name))
+            for name in names
+            if os.path.isfile(os.path.join(folder, name)) and not name.endswith(".tmp")
+        ]
+
+    def _stat_or_none(self, key: str) -> Optional[ObjectStat]:
+        try:
+            return self._stat(key, self._path(key))
+        except FileNotFoundError:
+            return None
+
+    async def put(self, key, data, content_type):
+        await asyncio.to_thread(self._write, self._path(key), data)
+
+    async def get(self, key):
+        return await asyncio.to_thread(self._read, self._path(key))
+
+    async def delete(self, keys):
+        await asyncio.to_thread(self._remove, [self._path(k) for k in keys])
+
+    async def list(self, prefix):
+        return await asyncio.to_thread(self._list, prefix)
+
+    async def stat(self, key):
+        return await asyncio.to_thread(self._stat_or_none, key)
+
+    def public_url(self, key):
+        return f"{self.base_url}/{key}"
+
+    def key_for_url(self, url):
+        prefix = self.base_url + "/"
+        return url[len(prefix):] if url.startswith(prefix) else None
+
+
+# ---------------------------------------------------------
+# SUPABASE STORAGE (REST)
+# ---------------------------------------------------------
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class SupabaseStorage(StorageBackend):
+    def __init__(self, url: str = SUPABASE_URL, key: str = SUPABASE_KEY, bucket: str = SUPABASE_BUCKET,
+                 max_connections: int = STORAGE_MAX_CONNECTIONS, timeout: float = STORAGE_TIMEOUT_SECONDS,
+                 retries: int = STORAGE_RETRIES, backoff: float = STORAGE_RETRY_BACKOFF_SECONDS):
+        if not url or not key:
+            raise StorageError("SUPABASE_URL and SUPABASE_SERVICE_KEY are required for the supabase backend")
+        self.url = url.rstrip("/")
+        self.bucket = bucket
+        self.retries = retries
+        self.backoff = backoff
+        self._client = httpx.AsyncClient(
+            base_url=f"{self.url}/storage/v1",
+            headers={"Authorization": f"Bearer {key}", "apikey": key},
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout,
+        )
+
+    async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        for attempt in range(self.retries + 1):
+            try:
+                res = await self._client.request(method, path, **kwargs)
+                if res.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    return res
+                reason = f"HTTP {res.status_code}"
+            except httpx.TransportError as exc:
+                if attempt == self.retries:
+                    raise StorageError(f"{method} {path}: {exc}") from exc
+                reason = repr(exc)
+            delay = self.backoff * (2 ** attempt)
+            logger.warning("[Storage] %s %s failed (%s), retrying in %.1fs", method, path, reason, delay)
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _check(res: httpx.Response, allow=()):
+        if res.is_success or res.status_code in allow:
+            return
+        try:
+            message = res.json().get("message") or res.text
+        except ValueError:
+            message = res.text
+        raise StorageError(f"Storage error {res.status_code}: {message}")
+
+    @staticmethod
+    def _stat_from_headers(key: str, headers) -> ObjectStat:
+        modified = headers.get("last-modified")
+        return ObjectStat(
+            key=key,
+            size=int(headers.get("content-length") or 0),
+            content_type=headers.get("content-type"),
+            modified=_parse_http_date(modified),
+        )
+
+    async def put(self, key, data, content_type):
+        res = await self._request(
+            "POST", f"/object/{self.bucket}/{key}", content=data,
+            headers={"Content-Type": content_type, "x-upsert": "true"},
+        )
+        self._check(res)
+
+    async def get(self, key):
+        res = await self._request("GET", f"/object/{self.bucket}/{key}")
+        if res.status_code in (400, 404):
+            # the storage API reports missing objects as 400 "not_found"
+            return None
+        self._check(res)
+        return res.content
+
+    async def delete(self, keys):
+        if not keys:
+            return
+        res = await self._request("DELETE", f"/object/{self.bucket}", json={"prefixes": list(keys)})
+        self._check(res)
+
+    async def list(self, prefix):
+        folder = prefix.rstrip("/")
+        stats, offset, page = [], 0, 1000
+        while True:
+            res = await self._request(
+                "POST", f"/object/list/{self.bucket}",
+                json={"prefix": folder, "limit": page, "offset": offset,
+                      "sortBy": {"column": "name", "order": "asc"}},
+            )
+            self._check(res)
+            entries = res.json()
+            for entry in entries:
+                meta = entry.get("metadata")
+                if not meta:
+                    continue  # sub-folder
+                stats.append(ObjectStat(
+                    key=f"{folder}/{entry['name']}",
+                    size=int(meta.get("size") or 0),
+                    content_type=meta.get("mimetype"),
+                    modified=_parse_http_date(meta.get("lastModified")),
+                ))
+            if len(entries) < page:
+                return stats
+            offset += page
+
+    async def stat(self, key):
+        res = await self._request("HEAD", f"/object/{self.bucket}/{key}")
+        if res.status_code in (400, 404):
+            return None
+        self._check(res)
+        return self._stat_from_headers(key, res.headers)
+
+    def public_url(self, key):
+        return f"{self.url}/storage/v1/object/public/{self.bucket}/{key}"
+
+    def key_for_url(self, url):
+        # tolerant of a changed domain: everything after "<bucket>/"
+        marker = f"/{self.bucket}/"
+        return url.split(marker, 1)[1] if marker in url else None
+
+    async def close(self):
+        await self._client.aclose()
+
+
+def _parse_http_date(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+
+
+# ---------------------------------------------------------
+# CONFIGURED BACKEND
+# ---------------------------------------------------------
+BACKENDS = {
+    "local": LocalStorage,
+    "supabase": SupabaseStorage,
+}
+
+_storage: Optional[StorageBackend] = None
+
+
+def get_storage() -> StorageBackend:
+    global _storage
+    if _storage is None:
+        if STORAGE_BACKEND not in BACKENDS:
+            raise StorageError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND}")
+        _storage = BACKENDS[STORAGE_BACKEND]()
+        logger.info("[Storage] Using %s backend", STORAGE_BACKEND)
+    return _storage
+
+
+async def close_storage():
+    global _storage
+    if _storage is not None:
+        await _storage.close()
+        _storage = None
@@ -0,0 +1,149 @@
+"""Benchmark: concurrent banner uploads against API latency.
+
+Serves a small app in-process with two routes, POST /upload (the banner
+pipeline, stored with the local storage backend in a temp directory) and
+GET /ping, then fires UPLOADS concurrent uploads of large synthetic JPEGs
+while a client pings in a loop. Run once per mode:
+
+* inline:   decode/encode and blocking file writes on the event loop (the
+            old upload_media)
+* pipeline: media_pipeline (chunked read, process pool) + async storage
+
+Before that it checks that the payload, and the same photo in portrait, is
+decoded at reduced scale (Image.draft) rather than at full size, and exits
+non-zero if not.
+
+Needs no database, Supabase or network.
+
+    python scripts/bench_media.py --uploads 16 --width 6000 --height 4000
+"""
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import io
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+import httpx
+from fastapi import FastAPI, UploadFile, File
+from PIL import Image
+
+from app.services import media_pipeline
+from app.services.storage import LocalStorage
+
+PING_INTERVAL = 0.01
+
+
+def make_jpeg(width: int, height: int) -> bytes:
+    # smooth gradient + noise: compresses like a photo rather than a flat fill
+    img = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    noise = Image.effect_noise((width, height), 40).convert("RGB")
+    img = Image.blend(img, noise, 0.3)
+    out = io.BytesIO()
+    img.save(out, format="JPEG", quality=92)
+    return out.getvalue()
+
+
+def check_decode(width: int, height: int):
+    largest = media_pipeline.RENDITIONS[0][1]
+    failed = False
+    for w, h in ((width, height), (height, width)):
+        decoded = media_pipeline.decode_scaled(make_jpeg(w, h), largest).size
+        # draft scales by 1/2, 1/4 or 1/8 and never below the full rendition
+        reduced = max(w, h) < 2 * largest or decoded != (w, h)
+        failed |= not reduced
+        print(f"decode: {w}x{h} JPEG -> {decoded[0]}x{decoded[1]}{'' if reduced else '  FULL SIZE'}")
+    if failed:
+        raise SystemExit("large JPEGs are decoded at full size")
+
+
+def build_app(mode: str, storage: LocalStorage) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {}
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        tag = os.urandom(8).hex()
+        if mode == "inline":
+            content = await file.read()
+            _, renditions = media_pipeline.encode_renditions(content)
+            for r in renditions:
+                storage._write(storage._path(f"{tag}/{r['name']}.{r['format']}"), r["data"])
+        else:
+            content = await media_pipeline.read_upload(file, max_bytes=len(payload) + 1)
+            _, renditions = await media_pipeline.process_image(content)
+            await asyncio.gather(*(
+                storage.put(f"{tag}/{r['name']}.{r['format']}", r["data"],
+                            media_pipeline.RENDITION_FORMATS[r["format"]][1])
+                for r in renditions
+            ))
+        size = sum(len(r["data"]) for r in renditions)
+        return {"size": size}
+
+    return app
+
+
+async def run(mode: str, uploads: int, root: str):
+    storage = LocalStorage(os.path.join(root, mode))
+    transport = httpx.ASGITransport(app=build_app(mode, storage))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        if mode == "pipeline":
+            # start the worker processes outside the measured window
+            await media_pipeline.process_image(make_jpeg(64, 64))
+
+        pings = []
+        done = asyncio.Event()
+
+        async def pinger():
+            # latency counts from when the ping was due, so time the loop
+            # spent blocked before it could even send counts too
+            due = time.perf_counter()
+            while not done.is_set():
+                await client.get("/ping")
+                pings.append(time.perf_counter() - due)
+                due += PING_INTERVAL
+                await asyncio.sleep(max(0.0, due - time.perf_counter()))
+
+        async def upload():
+            files = {"file": ("banner.jpg", payload, "image/jpeg")}
+            res = await client.post("/upload", files=files)
+            res.raise_for_status()
+
+        ping_task = asyncio.create_task(pinger())
+        started = time.perf_counter()
+        await asyncio.gather(*(upload() for _ in range(uploads)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await ping_task
+
+    pings.sort()
+    print(f"{mode:>8}: {uploads} uploads in {elapsed:.2f}s | "
+          f"ping n={len(pings)} p50={statistics.median(pings) * 1000:.1f}ms "
+          f"p95={pings[int(len(pings) * 0.95) - 1] * 1000:.1f}ms "
+          f"max={pings[-1] * 1000:.1f}ms")
+
+
+async def main(uploads: int):
+    with tempfile.TemporaryDirectory() as root:
+        for mode in ("inline", "pipeline"):
+            await run(mode, uploads, root)
+    media_pipeline.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--uploads", type=int, default=16)
+    parser.add_argument("--width", type=int, default=6000)
+    parser.add_argument("--height", type=int, default=4000)
+    args = parser.parse_args()
+
+    check_decode(args.width, args.height)
+    payload = make_jpeg(args.width, args.height)
+    print(f"payload: {args.width}x{args.height} JPEG, {len(payload) / 1e6:.1f} MB")
+    asyncio.run(main(args.uploads))
@@ -0,0 +1,99 @@
+"""Concurrency benchmark for POST /api/events/{id}/register.
+
+Creates a throw-away event with SLOTS capacity and USERS users, then fires
+every registration at once (one session per request, as the API does) and
+checks that the event was never overbooked. Needs a real DATABASE_URL.
+
+    python scripts/bench_registration.py --users 500 --slots 50
+"""
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timezone
+
+from fastapi import HTTPException
+from sqlalchemy import select, func, delete
+
+from app.database.session import AsyncSessionLocal, engine
+from app.models.event import Event
+from app.models.participant import Participant
+from app.models.user import User
+from app import crud
+
+
+async def register(event_id, user_id, latencies):
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as session:
+        try:
+            await crud.participation.register_for_event(session, event_id, user_id)
+            outcome = "registered"
+        except HTTPException as exc:
+            outcome = str(exc.detail)
+    latencies.append(time.perf_counter() - started)
+    return outcome
+
+
+async def main(users: int, slots: int):
+    tag = uuid.uuid4().hex[:8]
+
+    async with AsyncSessionLocal() as session:
+        event = Event(
+            title=f"bench-registration-{tag}",
+            event_date=datetime.now(timezone.utc),
+            requires_registration=True,
+            slots_available=slots,
+        )
+        session.add(event)
+        user_rows = [
+            User(email=f"bench-{tag}-{i}@example.com", hashed_password="x")
+            for i in range(users)
+        ]
+        session.add_all(user_rows)
+        await session.commit()
+        event_id = event.id
+        user_ids = [u.id for u in user_rows]
+
+    latencies = []
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(*(register(event_id, uid, latencies) for uid in user_ids))
+    elapsed = time.perf_counter() - started
+
+    async with AsyncSessionLocal() as session:
+        registered = (
+            await session.execute(
+                select(func.count()).select_from(Participant).where(Participant.event_id == event_id)
+            )
+        ).scalar()
+
+        await session.execute(delete(Event).where(Event.id == event_id))
+        await session.execute(delete(User).where(User.id.in_(user_ids)))
+        await session.commit()
+
+    await engine.dispose()
+
+    latencies.sort()
+    summary = {o: outcomes.count(o) for o in set(outcomes)}
+    print(f"requests:   {users} concurrent, capacity {slots}")
+    print(f"outcomes:   {summary}")
+    print(f"registered: {registered} rows")
+    print(f"wall time:  {elapsed:.2f}s ({users / elapsed:.0f} req/s)")
+    print(f"latency:    p50={latencies[len(latencies) // 2] * 1000:.1f}ms "
+          f"p99={latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f}ms")
+
+    if registered > slots:
+        raise SystemExit(f"OVERBOOKED: {registered} > {slots}")
+    if registered != min(users, slots):
+        raise SystemExit(f"UNDERFILLED: {registered} != {min(users, slots)}")
+    print("OK: no overbooking")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=300)
+    parser.add_argument("--slots", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.slots))
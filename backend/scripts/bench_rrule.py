@@ -0,0 +1,206 @@
+"""Microbenchmark + randomized checks for services/rrule.py (no database).
+
+Generates RULES random rules and times expanding all of them over a
+horizon, in one expand_all() batch and rule by rule with expand(). With
+--check it compares every batch expansion against expand() and a
+brute-force day-by-day reference (ordering, bounds, COUNT, BYDAY ordinals,
+month-end clamping, days of the local calendar for times near midnight,
+limit), and exits non-zero on any mismatch so it can gate CI.
+
+    python scripts/bench_rrule.py --rules 5000 --horizon-days 365 --check
+"""
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import argparse
+import random
+import time
+from calendar import monthrange
+from datetime import datetime, timedelta, timezone
+
+from app.services.rrule import Rule, WEEKDAYS, RECURRENCE_TIMEZONE, parse_by_day, expand, expand_all
+
+
+def random_rule(rnd: random.Random, now: datetime) -> Rule:
+    frequency = rnd.choice(("daily", "weekly", "monthly", "yearly"))
+    dtstart = (now - timedelta(days=rnd.randint(0, 800))).replace(
+        # any UTC hour: a third of them fall on the previous/next local day
+        hour=rnd.randint(0, 23), minute=rnd.choice((0, 30)), second=0, microsecond=0
+    )
+
+    by_day, by_month_day = "", ()
+    if frequency in ("daily", "weekly") and rnd.random() < 0.6:
+        by_day = ",".join(rnd.sample(WEEKDAYS, rnd.randint(1, 3)))
+    elif frequency in ("monthly", "yearly"):
+        pick = rnd.random()
+        if pick < 0.3:
+            by_day = f"{rnd.choice((1, 2, 3, 4, -1))}{rnd.choice(WEEKDAYS)}"
+        elif pick < 0.6:
+            by_month_day = (rnd.choice((1, 15, 28, 29, 30, 31, -1, -2)),)
+    if frequency == "daily" and rnd.random() < 0.1:
+        by_month_day = (rnd.choice((1, 15, -1)),)
+
+    return Rule(
+        frequency=frequency,
+        dtstart=dtstart,
+        interval=rnd.choice((1, 1, 1, 2, 3)),
+        by_day=parse_by_day(by_day),
+        by_month_day=by_month_day,
+        until=now + timedelta(days=rnd.randint(-30, 400)) if rnd.random() < 0.3 else None,
+        count=rnd.randint(1, 40) if rnd.random() < 0.2 else None,
+    )
+
+
+# ---------------------------------------------------------
+# Brute-force reference: test every day individually
+# ---------------------------------------------------------
+def _matches(rule: Rule, day) -> bool:
+    start = rule.dtstart.astimezone(RECURRENCE_TIMEZONE).date()
+    last = monthrange(day.year, day.month)[1]
+    nth = (day.day - 1) // 7 + 1
+    nth_from_end = -((last - day.day) // 7 + 1)
+
+    def in_by_day(ordinals: bool) -> bool:
+        return any(
+            wd == day.weekday() and (not ordinals or n == 0 or n in (nth, nth_from_end))
+            for n, wd in rule.by_day
+        )
+
+    def in_by_month_day() -> bool:
+        return any((d if d > 0 else last + d + 1) == day.day for d in rule.by_month_day)
+
+    if rule.frequency == "daily":
+        return ((day - start).days % rule.interval == 0
+                and (not rule.by_day or in_by_day(False))
+                and (not rule.by_month_day or in_by_month_day()))
+
+    if rule.frequency == "weekly":
+        weeks = ((day - timedelta(days=day.weekday())) - (start - timedelta(days=start.weekday()))).days // 7
+        weekdays = {wd for _, wd in rule.by_day} or {start.weekday()}
+        return weeks % rule.interval == 0 and day.weekday() in weekdays
+
+    if rule.frequency == "monthly":
+        units = (day.year - start.year) * 12 + day.month - start.month
+    else:
+        units = day.year - start.year
+        if day.month != start.month:
+            return False
+    if units % rule.interval:
+        return False
+
+    if rule.by_day and rule.by_month_day:
+        return in_by_day(True) and in_by_month_day()
+    if rule.by_day:
+        return in_by_day(True)
+    if rule.by_month_day:
+        return in_by_month_day()
+    return day.day == min(start.day, last)
+
+
+def reference(rule: Rule, after: datetime, end: datetime):
+    stop = min(end, rule.until) if rule.until else end
+    local_start = rule.dtstart.astimezone(RECURRENCE_TIMEZONE)
+    out, seen = [], 0
+    day = local_start.date()
+    while day <= stop.astimezone(RECURRENCE_TIMEZONE).date():
+        if _matches(rule, day):
+            occurrence = datetime.combine(day, local_start.timetz()).astimezone(timezone.utc)
+            if rule.dtstart <= occurrence <= stop:
+                seen += 1
+                if rule.count is not None and seen > rule.count:
+                    break
+                if occurrence > after:
+                    out.append(occurrence)
+        day += timedelta(days=1)
+    return out
+
+
+def check_midnight() -> int:
+    """06:00 WIB on Mondays is 23:00 UTC on Sundays: BYDAY and BYMONTHDAY
+    must match the local day, not the UTC one."""
+    failures = 0
+    monday_6am = datetime(2026, 10, 18, 23, 0, tzinfo=timezone.utc)  # Mon 19 Oct, 06:00 WIB
+    cases = [
+        (Rule("weekly", monday_6am, by_day=parse_by_day("MO")), "weekday", 0),
+        (Rule("daily", monday_6am, by_day=parse_by_day("MO,WE")), "weekday", None),
+        (Rule("monthly", monday_6am, by_day=parse_by_day("1MO")), "weekday", 0),
+        (Rule("monthly", monday_6am, by_month_day=(1,)), "day", 1),
+        (Rule("monthly", monday_6am, by_month_day=(-1,)), "last", None),
+    ]
+    for rule, kind, expected in cases:
+        for occurrence in expand(rule, end=monday_6am + timedelta(days=400)):
+            local = occurrence.astimezone(RECURRENCE_TIMEZONE)
+            if (local.hour, local.minute) != (6, 0):
+                ok = False
+            elif kind == "weekday":
+                ok = local.weekday() in ({expected} if expected is not None else {0, 2})
+            elif kind == "day":
+                ok = local.day == expected
+            else:
+                ok = local.day == monthrange(local.year, local.month)[1]
+            if not ok:
+                failures += 1
+                print(f"MIDNIGHT MISMATCH {rule}: {occurrence} ({local:%a %d %H:%M} local)")
+                break
+    return failures
+
+
+def main(rules: int, horizon_days: int, check: bool, seed: int):
+    rnd = random.Random(seed)
+    now = datetime(2026, 10, 18, tzinfo=timezone.utc)
+    end = now + timedelta(days=horizon_days)
+
+    windows = []
+    for _ in range(rules):
+        rule = random_rule(rnd, now)
+        after = rule.dtstart + timedelta(days=rnd.randint(0, 400))
+        windows.append((rule, after, end))
+
+    started = time.perf_counter()
+    results = expand_all(windows)
+    elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    one_by_one = [expand(rule, after, end_) for rule, after, end_ in windows]
+    scalar = time.perf_counter() - started
+
+    total = sum(map(len, results))
+    print(f"rules:       {rules} ({horizon_days}-day horizon)")
+    print(f"occurrences: {total}")
+    print(f"expand_all:  {elapsed * 1000:.1f}ms ({elapsed / rules * 1e6:.1f}us/rule)")
+    print(f"expand:      {scalar * 1000:.1f}ms ({scalar / rules * 1e6:.1f}us/rule)")
+
+    if not check:
+        return
+
+    failures = check_midnight()
+    limited = expand_all(windows, limit=3)
+    for (rule, after, end_), got, single, first in zip(windows, results, one_by_one, limited):
+        want = reference(rule, after, end_)
+        if got != want or single != want or first != want[:3]:
+            failures += 1
+            if failures <= 5:
+                print(f"MISMATCH {rule}\n  after={after}\n  got ={got[:5]}\n  one ={single[:5]}\n  want={want[:5]}")
+
+        # the same window expanded in two halves must concatenate to the whole
+        if got:
+            middle = got[len(got) // 2]
+            halves = expand(rule, after, middle) + expand(rule, middle, end_)
+            if halves != got:
+                failures += 1
+                print(f"SPLIT MISMATCH {rule}")
+
+    if failures:
+        print(f"FAILED: {failures} failing rules")
+        sys.exit(1)
+    print(f"OK: {rules} rules match the brute-force reference")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rules", type=int, default=5000)
+    parser.add_argument("--horizon-days", type=int, default=365)
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--seed", type=int, default=2025)
+    args = parser.parse_args()
+    main(args.rules, args.horizon_days, args.check, args.seed)
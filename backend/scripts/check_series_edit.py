@@ -0,0 +1,127 @@
+"""Check: "this and following" series edits hold past the generation horizon.
+
+Creates a weekly series (06:00 WIB), generates its occurrences and edits it
+from its third week on (new title, two hours later). Then expands the
+virtual occurrences over the next WEEKS weeks, and generates with the clock
+moved to the end of that range (far past the horizon). Either way every
+occurrence from the edit on must carry the new title and time, every
+earlier one the old, and no slot may appear twice.
+The series is deleted afterwards; point it at a scratch database.
+
+    python scripts/check_series_edit.py --weeks 30
+"""
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import argparse
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, delete
+
+from app.crud.event import create_event
+from app.database.session import AsyncSessionLocal, engine
+from app.models.event import Event
+from app.models.recurrence import Recurrence
+from app.services import occurrences
+from app.services.recurrence_engine import RECURRENCE_HORIZON_DAYS, process_due
+from app.services.rrule import RECURRENCE_TIMEZONE
+from app.services.series import update_series
+
+SHIFT = timedelta(hours=2)
+
+
+async def generate(now: datetime, series_ids: list):
+    async with AsyncSessionLocal() as session:
+        rule_ids = (
+            await session.execute(select(Recurrence.id).where(Recurrence.event_id.in_(series_ids)))
+        ).scalars().all()
+    return await process_due(list(rule_ids), now)
+
+
+def check(rows, tag: str, split: datetime) -> list:
+    errors, slots = [], set()
+    for row in rows:
+        local = row.event_date.astimezone(RECURRENCE_TIMEZONE)
+        edited = row.event_date >= split
+        want_title = f"{tag} edited" if edited else tag
+        want_time = (8, 0) if edited else (6, 0)
+        if row.title != want_title or (local.hour, local.minute) != want_time or local.weekday() != 0:
+            errors.append(f"{row.event_date.isoformat()} {row.title!r} ({local:%a %H:%M} local)")
+        if row.event_date in slots:
+            errors.append(f"{row.event_date.isoformat()} appears twice")
+        slots.add(row.event_date)
+    return errors
+
+
+async def load(series_ids: list, start: datetime, until: datetime):
+    """(stored occurrences, virtual ones not stored yet) of the series."""
+    async with AsyncSessionLocal() as session:
+        stored = (
+            await session.execute(
+                select(Event)
+                .where(Event.series_id.in_(series_ids), Event.event_date <= until)
+                .order_by(Event.event_date)
+            )
+        ).scalars().all()
+        virtual = await occurrences.list_virtual_occurrences(
+            session, start_date=start, end_date=until, limit=100_000
+        )
+    return stored, [v for v in virtual if v.series_id in series_ids]
+
+
+async def main(weeks: int):
+    tag = f"check-series-{uuid.uuid4().hex[:8]}"
+    now = datetime.now(timezone.utc)
+    today = now.astimezone(RECURRENCE_TIMEZONE)
+    monday = today - timedelta(days=today.weekday())
+    start = monday.replace(hour=6, minute=0, second=0, microsecond=0).astimezone(timezone.utc)
+    split = start + timedelta(weeks=2)
+    until = now + timedelta(weeks=weeks)
+
+    async with AsyncSessionLocal() as session:
+        template = await create_event(session, tag, None, "Balai Desa", start, recurrence_pattern="weekly")
+        series_id = template.id
+
+    failures = []
+    try:
+        await generate(now, [series_id])
+        async with AsyncSessionLocal() as session:
+            changed, new_series_id = await update_series(
+                session, series_id, split - timedelta(hours=1), {"title": f"{tag} edited"}, shift=SHIFT
+            )
+        series_ids = [series_id, new_series_id]
+        print(f"edit:         {changed} stored events changed, new series {new_series_id}")
+
+        # RECURRENCE_MODE=virtual: slots past the stored ones are expanded
+        stored, virtual = await load(series_ids, start, until)
+        rows = sorted([*stored, *virtual], key=lambda r: r.event_date)
+        failures += check(rows, tag, split)
+        print(f"virtual:      {len(stored)} stored + {len(virtual)} expanded up to {until:%Y-%m-%d}")
+
+        # materialized: generate with the clock moved to the end of the range
+        await generate(until - timedelta(days=RECURRENCE_HORIZON_DAYS), series_ids)
+        stored, _ = await load(series_ids, start, until)
+        failures += check(stored, tag, split)
+        print(f"materialized: {len(stored)} stored up to {until:%Y-%m-%d}")
+        if len(stored) != len(rows):
+            failures.append(f"{len(stored)} generated, {len(rows)} expanded")
+
+        for error in failures[:10]:
+            print(f"MISMATCH {error}")
+        if failures:
+            raise SystemExit(f"{len(failures)} wrong occurrences")
+        print("OK: the edit holds past the horizon")
+    finally:
+        async with AsyncSessionLocal() as session:
+            await session.execute(delete(Event).where(Event.title.startswith(tag)))
+            await session.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--weeks", type=int, default=30)
+    args = parser.parse_args()
+    asyncio.run(main(args.weeks))
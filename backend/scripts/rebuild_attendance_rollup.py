@@ -0,0 +1,30 @@
+"""Rebuild attendance_monthly_rollup from the raw attendance rows.
+
+Only needed if the attendances_monthly_rollup trigger was bypassed. Check-ins
+wait for the rebuild to commit.
+
+    python scripts/rebuild_attendance_rollup.py [--event-id <uuid>]
+"""
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import argparse
+import asyncio
+import time
+
+from app.database.session import engine
+from app.services.attendance_rollup import rebuild_attendance_rollup
+
+
+async def main(event_id):
+    started = time.perf_counter()
+    rows = await rebuild_attendance_rollup(event_id)
+    await engine.dispose()
+    print(f"rebuilt {rows} rollup rows in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--event-id", default=None)
+    args = parser.parse_args()
+    asyncio.run(main(args.event_id))
@@ -2,5 +2,9 @@
 # Run migrations first
 alembic upgrade head
 
-# Then start the server
+# Then start the server. One process: the in-process caches (app/core/cache.py)
+# see every write at once only when all writes go through this process
+#
+# Recurrence worker interval: RECURRENCE_TICK_SECONDS (default 60) replaces
+# RECURRENCE_INTERVAL_SECONDS, which is still read when the new one is unset
 uvicorn app.main:app --host 0.0.0.0 --port $PORT
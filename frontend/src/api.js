@@ -1,9 +1,8 @@
 import axios from "axios";
 
 // Use environment variable, fallback to localhost for development
-export const API_BASE = process.env.REACT_APP_API_URL 
-  ? `${process.env.REACT_APP_API_URL}/api`
-  : "http://localhost:8000/api";
+export const API_ORIGIN = process.env.REACT_APP_API_URL || "http://localhost:8000";
+export const API_BASE = `${API_ORIGIN}/api`;
 
 console.log("API_BASE:", API_BASE); // Debug log to verify
 
@@ -127,9 +126,30 @@ export async function deleteUser(id) {
 /* ---------------------------------------------------
    EVENTS
 --------------------------------------------------- */
+// Largest page the list endpoint serves (MAX_PAGE_SIZE in the backend)
+const EVENTS_PAGE_SIZE = 200;
+
+// GET /events is paginated (next_cursor). Pass limit/cursor to get one page;
+// without them every page is fetched and returned as one list.
 export async function fetchEvents(params = {}) {
-  const res = await api.get("/events", { params });
-  return res.data;
+  if (params.limit || params.cursor) {
+    const res = await api.get("/events", { params });
+    return res.data;
+  }
+
+  const data = [];
+  let cursor = null;
+  let page;
+  do {
+    const res = await api.get("/events", {
+      params: { ...params, limit: EVENTS_PAGE_SIZE, ...(cursor && { cursor }) },
+    });
+    page = res.data;
+    data.push(...page.data);
+    cursor = page.next_cursor;
+  } while (cursor);
+
+  return { ...page, data, next_cursor: null };
 }
 
 export async function fetchEvent(id) {
@@ -302,14 +322,34 @@ export async function exportAttendanceCSV(params) {
   });
 }
 
+// The export endpoints need the admin token, so they are fetched through
+// the api instance (not window.open) and saved from a blob
+async function downloadExport(path, params, filename) {
+  const res = await api.get(path, { params, responseType: "blob" });
+  const url = URL.createObjectURL(res.data);
+  const link = document.createElement("a");
+  link.href = url;
+  link.download = filename;
+  document.body.appendChild(link);
+  link.click();
+  link.remove();
+  URL.revokeObjectURL(url);
+}
+
 export function exportAttendanceExcel(eventId, start, end) {
-  const url = `${API_BASE}/attendance/export/excel?event_id=${eventId}&start_date=${start}&end_date=${end}`;
-  window.open(url, "_blank");
+  return downloadExport(
+    "/attendance/export/excel",
+    { event_id: eventId, start_date: start, end_date: end },
+    "attendance.xlsx"
+  );
 }
 
 export function exportAttendancePDF(eventId, start, end) {
-  const url = `${API_BASE}/attendance/export/pdf?event_id=${eventId}&start_date=${start}&end_date=${end}`;
-  window.open(url, "_blank");
+  return downloadExport(
+    "/attendance/export/pdf",
+    { event_id: eventId, start_date: start, end_date: end },
+    "attendance.pdf"
+  );
 }
 
 /* ---------------------------------------------------
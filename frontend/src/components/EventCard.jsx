@@ -1,10 +1,11 @@
 // src/components/EventCard.jsx
 import React from "react";
 import { Link } from "react-router-dom";
+import { MediaImage } from "./ui";
 
 export default function EventCard({ event }) {
   // Safely extract poster inside the component
-  const poster = event?.media?.length > 0 ? event.media[0].file_url : null;
+  const poster = event?.media?.length > 0 ? event.media[0] : null;
 
   return (
     <article className="bg-white border rounded-xl shadow-sm hover:shadow-md transition">
@@ -32,8 +33,10 @@ export default function EventCard({ event }) {
 
         {/* Right side - Image */}
         <div className="sm:w-48 sm:flex-shrink-0">
-          <img
-            src={poster || "/assets/placeholder.jpg"}
+          <MediaImage
+            media={poster}
+            fallback="/assets/placeholder.jpg"
+            sizes="(min-width: 640px) 192px, 100vw"
             alt={event.title}
             className="w-full h-32 sm:h-full object-cover rounded"
             loading="lazy"
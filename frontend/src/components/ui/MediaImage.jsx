@@ -0,0 +1,35 @@
+// src/components/ui/MediaImage.jsx
+import { API_ORIGIN } from '../../api';
+
+// Media paths ("/api/media/...") are relative to the API, not to this app
+const fromApi = (value) => value && value.replace(/(^|, )\//g, `$1${API_ORIGIN}/`);
+
+// Renders an event media item with its WebP/JPEG renditions so the browser
+// downloads the smallest one that fills `sizes`. Media without renditions
+// falls back to the full-size original.
+export const MediaImage = ({
+  media,
+  sizes = '100vw',
+  fallback,
+  alt = '',
+  className = '',
+  loading,
+}) => {
+  const srcset = media?.srcset || {};
+  const src = fromApi(media?.raw_url) || media?.file_url || fallback;
+
+  return (
+    <picture>
+      {srcset.webp && <source type="image/webp" srcSet={fromApi(srcset.webp)} sizes={sizes} />}
+      <img
+        src={src}
+        srcSet={fromApi(srcset.jpeg)}
+        sizes={srcset.jpeg ? sizes : undefined}
+        alt={alt}
+        className={className}
+        loading={loading}
+        decoding="async"
+      />
+    </picture>
+  );
+};
@@ -1,3 +1,4 @@
 // src/components/ui/index.js
 export { Heading, Text } from './Typography';
-export { FormGroup, Label, Input } from './FormComponent';
\ No newline at end of file
+export { FormGroup, Label, Input } from './FormComponent';
+export { MediaImage } from './MediaImage';
@@ -8,6 +8,7 @@ import {
   deleteEventMedia,
   api,
 } from "../../../api";
+import { MediaImage } from "../../../components/ui";
 
 export default function EventEdit() {
   const { id } = useParams();
@@ -263,8 +264,9 @@ export default function EventEdit() {
 
             {mediaList.map((m) => (
               <div key={m.id} className="relative group">
-                <img
-                  src={m.file_url}
+                <MediaImage
+                  media={m}
+                  sizes="(min-width: 768px) 25vw, 50vw"
                   alt="poster"
                   className="w-full h-32 object-cover rounded border"
                   loading="lazy"
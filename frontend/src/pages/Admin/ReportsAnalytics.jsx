@@ -73,12 +73,16 @@ export default function ReportsAnalytics() {
 
   const handleExportExcel = () => {
     if (!selectedEvent) return alert("Pilih acara terlebih dahulu");
-    exportAttendanceExcel(selectedEvent, startDate, endDate);
+    exportAttendanceExcel(selectedEvent, startDate, endDate).catch(() =>
+      alert("Gagal mengunduh laporan")
+    );
   };
 
   const handleExportPDF = () => {
     if (!selectedEvent) return alert("Pilih acara terlebih dahulu");
-    exportAttendancePDF(selectedEvent, startDate, endDate);
+    exportAttendancePDF(selectedEvent, startDate, endDate).catch(() =>
+      alert("Gagal mengunduh laporan")
+    );
   };
 
   return (
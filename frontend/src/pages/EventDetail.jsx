@@ -10,7 +10,7 @@ import {
 } from "../api";
 
 import { Container, Section } from "../components/layout";
-import { Heading, Text } from "../components/ui";
+import { Heading, Text, MediaImage } from "../components/ui";
 
 export default function EventDetail({ user }) {
   const { eventId } = useParams();
@@ -94,7 +94,7 @@ export default function EventDetail({ user }) {
   const slotsLeft = quota ? Math.max(quota - participantCount, 0) : null;
   const isFull = quota && participantCount >= quota;
 
-  const poster = event.media?.[0]?.file_url;
+  const poster = event.media?.[0];
 
   return (
     <Section className="bg-gray-100">
@@ -109,7 +109,12 @@ export default function EventDetail({ user }) {
 
         <div className="bg-white rounded-xl shadow overflow-hidden">
           {poster && (
-            <img src={poster} alt="Poster" className="w-full h-64 object-cover" />
+            <MediaImage
+              media={poster}
+              sizes="(min-width: 896px) 896px, 100vw"
+              alt="Poster"
+              className="w-full h-64 object-cover"
+            />
           )}
 
           <div className="p-8">